@@ -0,0 +1,172 @@
+"""Times the stages of a conversion on synthetic OSeMOSYS results
+
+Generates a results folder of the requested size with
+:func:`osemosys2iamc.synthetic.generate_results` and reports the wall time
+(best of ``--repeat`` runs) and the peak Python memory of each stage, and of a
+full conversion for each kind of config entry. No network access is needed.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --countries 30 --technologies 90 \\
+        --years 36 --output benchmark.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+import osemosys2iamc
+from osemosys2iamc.resultify import (
+    calculate_trade,
+    filter_regex,
+    iso_to_country,
+    main,
+    read_file,
+)
+from osemosys2iamc.synthetic import CONFIG_KINDS, generate_results, synthetic_config
+
+
+def measure(func: Callable, repeat: int) -> Dict[str, float]:
+    """Returns the best wall time and the peak memory of calling ``func``
+
+    The memory is traced in a separate call, as tracing slows down the code.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_mb": peak / 2**20}
+
+
+def run(args: argparse.Namespace, folder: str) -> List[Dict]:
+    """Runs all benchmarks on the synthetic results in ``folder``"""
+    sizes = dict(
+        countries=args.countries,
+        technologies=args.technologies,
+        years=args.years,
+        timeslices=args.timeslices,
+    )
+    rows = generate_results(folder, **sizes)
+    results = []
+
+    def record(stage: str, func: Callable, n_rows: int):
+        print(f"Running {stage}", file=sys.stderr)
+        results.append(dict(stage=stage, rows=n_rows, **measure(func, args.repeat)))
+
+    record(
+        "generate",
+        lambda: generate_results(os.path.join(folder, "generate"), **sizes),
+        sum(rows.values()),
+    )
+
+    param = "UseByTechnology"
+    n_rows = rows[param]
+    record("read_file", lambda: read_file(folder, param, "iso2_start"), n_rows)
+    record(
+        "read_file typed",
+        lambda: read_file(folder, param, "iso2_start", typed=True),
+        n_rows,
+    )
+
+    df = read_file(folder, param, "iso2_start")
+    patterns = ["^.{2}(EL)", "^.{2}(NG)", "(?=^.{2}(BM))^.{6}(X0)"]
+    record("filter_regex", lambda: filter_regex(df, patterns, "TECHNOLOGY"), n_rows)
+
+    names = df["TECHNOLOGY"].tolist()
+    record("iso_to_country", lambda: iso_to_country("iso2_start", names, param), n_rows)
+
+    trade = {
+        name: read_file(folder, name, "iso2_start")
+        for name in ["UseByTechnology", "ProductionByTechnologyAnnual"]
+    }
+    techs = ["(?=^.{2}(EL))^((?!00).)*$"]
+    record(
+        "calculate_trade",
+        lambda: calculate_trade(trade, techs),
+        sum(len(t) for t in trade.values()),
+    )
+
+    def rows_read(config: Dict) -> int:
+        params = set()
+        for entry in config.get("inputs", []) + config.get("results", []):
+            param = entry["osemosys_param"]
+            params.update(param if isinstance(param, list) else [param])
+        return sum(rows[param] for param in params)
+
+    for kind in CONFIG_KINDS:
+        config = synthetic_config([kind], entries=args.entries)
+        record(f"main {kind}", lambda: main(config, folder, folder), rows_read(config))
+    config = synthetic_config(entries=args.entries)
+    record("main", lambda: main(config, folder, folder), rows_read(config))
+
+    return results
+
+
+def entry_point():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark osemosys2iamc on synthetic OSeMOSYS results"
+    )
+    parser.add_argument("--countries", type=int, default=4)
+    parser.add_argument("--technologies", type=int, default=20)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--timeslices", type=int, default=4)
+    parser.add_argument(
+        "--entries", type=int, default=3, help="Config entries of each kind"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Report the best of this many runs"
+    )
+    parser.add_argument(
+        "--folder",
+        default=None,
+        help="Folder to write the synthetic results to, a temporary one by default",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Path to a JSON file to write the report to"
+    )
+    args = parser.parse_args()
+
+    if args.folder is None:
+        with tempfile.TemporaryDirectory() as folder:
+            results = run(args, folder)
+    else:
+        results = run(args, args.folder)
+
+    print(pd.DataFrame(results).to_string(index=False, float_format="{:.3f}".format))
+
+    if args.output:
+        report = {
+            "version": osemosys2iamc.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ["folder", "output"]
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+
+    entry_point()
@@ -0,0 +1,312 @@
+"""Converts many scenario result folders in one invocation
+
+A batch is described by a manifest which lists a scenario name, an inputs
+folder and a results folder per run, either as a CSV file with the columns
+``scenario``, ``inputs_path`` and ``results_path`` or as a YAML list of
+mappings with the same keys. Relative paths are resolved against the folder
+of the manifest.
+
+The configuration file is read and compiled once and shared by all runs,
+each of which overrides its ``scenario``.
+"""
+import argparse
+import dataclasses
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from yaml import load, SafeLoader
+
+from osemosys2iamc.engines import ENGINES
+from osemosys2iamc.plan import Plan, compile_config
+from osemosys2iamc.resultify import PARSERS, load_config, main
+from osemosys2iamc.writers import WRITERS, output_format, write
+
+if TYPE_CHECKING:
+    import pyam
+
+MANIFEST_COLUMNS = ["scenario", "inputs_path", "results_path"]
+
+
+def load_manifest(filepath: str) -> List[Dict[str, str]]:
+    """Reads a batch manifest
+
+    Arguments
+    ---------
+    filepath : str
+        Path to a ``.csv`` or ``.yaml`` manifest
+
+    Returns
+    -------
+    List[Dict[str, str]]
+        One mapping of ``scenario``, ``inputs_path`` and ``results_path`` per
+        run, in manifest order
+    """
+    if filepath.lower().endswith(".csv"):
+        runs = pd.read_csv(filepath, dtype=str, keep_default_na=False).to_dict(
+            "records"
+        )
+    else:
+        with open(filepath, "r") as manifest_file:
+            runs = load(manifest_file, Loader=SafeLoader) or []
+
+    folder = os.path.dirname(os.path.abspath(filepath))
+    manifest = []
+    seen = set()
+    for number, run in enumerate(runs, start=1):
+        missing = [key for key in MANIFEST_COLUMNS if not run.get(key)]
+        if missing:
+            raise ValueError(
+                f"Run {number} of manifest {filepath} is missing {', '.join(missing)}"
+            )
+        scenario = str(run["scenario"])
+        if scenario in seen:
+            raise ValueError(f"Scenario {scenario} appears twice in {filepath}")
+        seen.add(scenario)
+        manifest.append(
+            {
+                "scenario": scenario,
+                "inputs_path": os.path.join(folder, run["inputs_path"]),
+                "results_path": os.path.join(folder, run["results_path"]),
+            }
+        )
+    return manifest
+
+
+def scenario_filename(scenario: str, format: str) -> str:
+    """Returns the name of the file holding ``scenario`` with ``--split``
+
+    Characters other than letters, digits, spaces, ``-``, ``_`` and ``.`` are
+    replaced by ``_`` and leading or trailing dots and spaces are removed, so
+    that the file is always written into the output folder.
+    """
+    name = re.sub(r"[^\w\- .]", "_", scenario).strip(". ")
+    return f"{name or '_'}.{format}"
+
+
+def convert_scenario(plan: Plan, run: Dict[str, str], **options) -> "pyam.IamDataFrame":
+    """Converts the results of one manifest run
+
+    Arguments
+    ---------
+    plan : Plan
+        The compiled configuration, shared by all runs
+    run : dict
+        The ``scenario``, ``inputs_path`` and ``results_path`` of the run
+    **options
+        Passed on to :func:`osemosys2iamc.resultify.main`
+
+    Returns
+    -------
+    pyam.IamDataFrame
+    """
+    plan = dataclasses.replace(plan, scenario=run["scenario"])
+    try:
+        return main(plan, run["inputs_path"], run["results_path"], **options)
+    except ValueError as ex:
+        raise ValueError(f"Scenario {run['scenario']}: {ex}") from ex
+
+
+def iter_batch(
+    config: Union[Dict, Plan],
+    manifest: List[Dict[str, str]],
+    n_jobs: Optional[int] = None,
+    **options,
+) -> Iterator[Tuple[str, "pyam.IamDataFrame"]]:
+    """Converts every run of a manifest, yielding each run once it is converted
+
+    Only the runs converted but not yet consumed are held in memory, so that
+    the caller can write and drop each run in turn.
+
+    Arguments
+    ---------
+    config : dict or Plan
+        The configuration dictionary, or the plan compiled from it
+    manifest : list
+        The runs, as returned by :func:`load_manifest`
+    n_jobs: int, default=None
+        Number of worker processes, ``-1`` for one per CPU. By default the runs
+        are converted one after another in this process
+    **options
+        Passed on to :func:`osemosys2iamc.resultify.main`
+
+    Yields
+    ------
+    Tuple[str, pyam.IamDataFrame]
+        The scenario and converted data of each run, in manifest order, or
+        in order of completion with several processes
+    """
+    plan = config if isinstance(config, Plan) else compile_config(config)
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_workers = min(n_jobs or 1, len(manifest))
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {
+                pool.submit(convert_scenario, plan, run, **options): run["scenario"]
+                for run in manifest
+            }
+            for future in as_completed(futures):
+                # Drops the reference to the result held by the future
+                scenario = futures.pop(future)
+                yield scenario, future.result()
+    else:
+        for run in manifest:
+            yield run["scenario"], convert_scenario(plan, run, **options)
+
+
+def run_batch(
+    config: Union[Dict, Plan],
+    manifest: List[Dict[str, str]],
+    n_jobs: Optional[int] = None,
+    **options,
+) -> Dict[str, "pyam.IamDataFrame"]:
+    """Converts every run of a manifest
+
+    Arguments
+    ---------
+    config : dict or Plan
+        The configuration dictionary, or the plan compiled from it
+    manifest : list
+        The runs, as returned by :func:`load_manifest`
+    n_jobs: int, default=None
+        Number of worker processes, ``-1`` for one per CPU. By default the runs
+        are converted one after another in this process
+    **options
+        Passed on to :func:`osemosys2iamc.resultify.main`
+
+    Returns
+    -------
+    Dict[str, pyam.IamDataFrame]
+        The converted data of each scenario, in manifest order
+    """
+    converted = dict(iter_batch(config, manifest, n_jobs, **options))
+    return {run["scenario"]: converted[run["scenario"]] for run in manifest}
+
+
+def entry_point():
+
+    parser = argparse.ArgumentParser(
+        prog="osemosys2iamc-batch",
+        description="Convert many packages of OSeMOSYS results to the IAMC format",
+    )
+    parser.add_argument(
+        "manifest_path",
+        help="Path to a .csv or .yaml file listing scenario, inputs_path "
+        "and results_path of each run",
+    )
+    parser.add_argument(
+        "config_path",
+        help="Path to the config.yaml file containing the results mapping",
+    )
+    parser.add_argument(
+        "output_path",
+        help="Path to the .xlsx, .csv or .parquet file to write, or with --split "
+        "the folder to write one file per run to",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(WRITERS),
+        default=None,
+        help="Format of the output files, taken from the extension of "
+        "output_path by default and xlsx with --split",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Write one file per scenario instead of a combined file",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Convert the runs in this many processes, -1 for one per CPU",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream parameters in chunks of this many rows to bound memory use",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Keep typed Parquet copies of the CSV files in this folder "
+        "and read them in place of the CSV files (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandas",
+        help="Filter and sum the parameters with pandas, or with DuckDB queries "
+        "over the files (requires duckdb)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="c",
+        help="Parse the CSV files with the default parser, or with the "
+        "multi-threaded Arrow parser (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="THREADS",
+        help="Load parameters ahead of their use on this many threads",
+    )
+    args = parser.parse_args()
+
+    if not args.split:
+        try:
+            output_format(args.output_path, args.format)
+        except ValueError as ex:
+            parser.error(str(ex))
+
+    manifest = load_manifest(args.manifest_path)
+    if args.split:
+        format = args.format or "xlsx"
+        filenames = {}  # type: Dict[str, str]
+        for run in manifest:
+            filename = scenario_filename(run["scenario"], format)
+            if filename in filenames:
+                parser.error(
+                    f"Scenarios {filenames[filename]} and {run['scenario']} "
+                    f"would both be written to {filename}"
+                )
+            filenames[filename] = run["scenario"]
+
+    plan = compile_config(load_config(args.config_path))
+
+    options = dict(
+        n_jobs=args.jobs,
+        chunksize=args.chunksize,
+        cache_dir=args.cache_dir,
+        engine=args.engine,
+        parser=args.parser,
+        prefetch=args.prefetch,
+    )
+
+    if args.split:
+        # Each run is written as soon as it is converted and then dropped
+        os.makedirs(args.output_path, exist_ok=True)
+        for scenario, all_data in iter_batch(plan, manifest, **options):
+            outpath = os.path.join(
+                args.output_path, scenario_filename(scenario, format)
+            )
+            write(all_data, outpath, format)
+            del all_data
+    else:
+        import pyam
+
+        converted = run_batch(plan, manifest, **options)
+        write(pyam.concat(converted.values()), args.output_path, args.format)
+
+
+if __name__ == "__main__":
+
+    entry_point()
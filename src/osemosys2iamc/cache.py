@@ -0,0 +1,506 @@
+"""Caches used while converting a package of OSeMOSYS results
+
+A single run of :func:`osemosys2iamc.resultify.main` typically extracts many
+IAMC variables from the same few OSeMOSYS parameters. The
+:class:`ParameterCache` makes sure each parameter is parsed and region-tagged
+only once per run and is released as soon as no later config entry needs it.
+A :class:`Prefetcher` can load the parameters for it on background threads,
+ahead of the entries which need them.
+
+The :class:`ColumnarCache` keeps typed Parquet copies of the CSV files on disk
+so that repeated runs against the same results folder skip parsing CSV text.
+
+The :class:`ResultStore` keeps the extracted data of each config entry on disk,
+so that repeated runs only recompute the entries whose mapping or files changed.
+"""
+import glob
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from osemosys2iamc import sources
+
+CacheKey = Tuple[Hashable, str, str]
+
+
+class ParameterCache:
+    """Holds parsed, region-tagged OSeMOSYS parameters for one conversion run
+
+    Frames are keyed by ``(path, osemosys_param, region_name_option)``. Callers
+    must treat the returned frames as read-only as they are shared between all
+    config entries which use the same parameter.
+
+    Parameters
+    ----------
+    loader: Callable
+        Called as ``loader(path, osemosys_param, region_name_option)`` on a
+        cache miss, usually :func:`osemosys2iamc.resultify.read_file`
+    last_use: Dict[CacheKey, int], default=None
+        Position of the last config entry which needs each key. Frames are
+        evicted by :meth:`release` once the run has moved past that position
+    max_bytes: int, default=None
+        Memory budget for all cached frames. When exceeded, the least recently
+        used frames are evicted
+    """
+
+    def __init__(
+        self,
+        loader: Callable[..., pd.DataFrame],
+        last_use: Optional[Dict[CacheKey, int]] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self._loader = loader
+        self._frames = OrderedDict()  # type: OrderedDict[CacheKey, pd.DataFrame]
+        self._sizes = {}  # type: Dict[CacheKey, int]
+        self.last_use = dict(last_use or {})
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cached frames, as far as it is tracked"""
+        return sum(self._sizes.values())
+
+    def get(
+        self, path: Hashable, osemosys_param: str, region_name_option: str
+    ) -> pd.DataFrame:
+        """Returns the parsed parameter, reading it on the first request
+
+        Parameters
+        ----------
+        path: Hashable
+            Path to a folder of CSV files (OSeMOSYS inputs/outputs)
+        osemosys_param: str
+            Name of CSV file
+        region_name_option: str
+            Description of how the region is encoded in technology/fuel names
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        key = (path, osemosys_param, region_name_option)
+        if key in self._frames:
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return self._frames[key]
+
+        self.misses += 1
+        df = self._loader(path, osemosys_param, region_name_option)
+        self._frames[key] = df
+        if self.max_bytes is not None:
+            self._sizes[key] = int(df.memory_usage(deep=True).sum())
+            self._enforce_budget(keep=key)
+        return df
+
+    def release(self, position: int):
+        """Evicts every frame which no config entry after ``position`` needs"""
+        done = [
+            key
+            for key in self._frames
+            if key in self.last_use and self.last_use[key] <= position
+        ]
+        for key in done:
+            self.evict(key)
+
+    def evict(self, key: CacheKey):
+        """Removes ``key`` from the cache if it is present"""
+        self._frames.pop(key, None)
+        self._sizes.pop(key, None)
+
+    def clear(self):
+        """Removes all frames from the cache"""
+        self._frames.clear()
+        self._sizes.clear()
+
+    def _enforce_budget(self, keep: CacheKey):
+        """Evicts least recently used frames until the budget is met
+
+        The frame stored under ``keep`` is never evicted, so a single parameter
+        larger than the budget is still served to the entry which requested it
+        """
+        for key in list(self._frames):
+            if self.nbytes <= self.max_bytes:
+                break
+            if key != keep:
+                self.evict(key)
+
+
+class Prefetcher:
+    """Loads parameters on a pool of threads ahead of their first use
+
+    Use an instance as the ``loader`` of a :class:`ParameterCache`. Requests
+    for a parameter which is being loaded wait for its load to finish, and
+    each completed request starts loading the next parameter, so at most
+    ``window`` parameters are held in memory besides those in the cache.
+
+    Parameters
+    ----------
+    loader: Callable
+        Called as ``loader(path, osemosys_param, region_name_option)`` on the
+        threads of the pool
+    keys: List[CacheKey]
+        The parameters to load, in the order of their first use
+    threads: int
+        Number of threads loading parameters
+    window: int, default=None
+        Number of parameters loaded ahead of the requests, ``threads`` by
+        default
+    """
+
+    def __init__(
+        self,
+        loader: Callable[..., pd.DataFrame],
+        keys: List[CacheKey],
+        threads: int,
+        window: Optional[int] = None,
+    ):
+        self._loader = loader
+        self._pool = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="prefetch"
+        )
+        self._pending = deque(dict.fromkeys(keys))
+        self._futures = {}  # type: Dict[CacheKey, Future]
+        self.window = window or threads
+        self._fill()
+
+    def __call__(
+        self, path: Hashable, osemosys_param: str, region_name_option: str
+    ) -> pd.DataFrame:
+        key = (path, osemosys_param, region_name_option)
+        future = self._futures.pop(key, None)
+        if future is None:
+            # Requested out of order, or again after being evicted
+            if key in self._pending:
+                self._pending.remove(key)
+            df = self._loader(*key)
+        else:
+            df = future.result()
+        self._fill()
+        return df
+
+    def close(self):
+        """Cancels the loads which have not started and waits for the others"""
+        self._pending.clear()
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._pool.shutdown(wait=True)
+
+    def _fill(self):
+        while self._pending and len(self._futures) < self.window:
+            key = self._pending.popleft()
+            self._futures[key] = self._pool.submit(self._loader, *key)
+
+
+# Bump when the layout of the cached copies changes to invalidate older copies
+COLUMNAR_CACHE_VERSION = 1
+
+# Number of CSV rows converted at a time when building a cached copy
+BUILD_CHUNKSIZE = 1_000_000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as ex:
+        raise ImportError(
+            "The columnar cache requires pyarrow. "
+            "Install it with `pip install osemosys2iamc[cache]`"
+        ) from ex
+    return pyarrow
+
+
+class ColumnarCache:
+    """Typed Parquet copies of OSeMOSYS CSV files, kept in a cache directory
+
+    A copy is identified by the absolute path, size and modification time of
+    its CSV file, or of the archive holding it, so editing or regenerating a
+    CSV file invalidates its copy.
+    Copies are read memory-mapped and set columns are returned as
+    categoricals.
+
+    Requires the optional dependency ``pyarrow``.
+
+    Parameters
+    ----------
+    directory: str
+        Folder holding the cached copies. Created if it does not exist
+    dtype: Dict[str, str], default=None
+        Types of known columns, as passed to :func:`pandas.read_csv`. Columns of
+        type ``category`` are stored as strings and read back as categoricals
+    rebuild: bool, default=False
+        Rewrite the copy of each CSV file the first time it is requested
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dtype: Optional[Dict[str, str]] = None,
+        rebuild: bool = False,
+    ):
+        self.directory = directory
+        self.dtype = dict(dtype or {})
+        self.rebuild = rebuild
+        self._built = set()
+
+    def location(self, filename: str) -> str:
+        """Returns the path of the cached copy of ``filename``"""
+        source = os.path.abspath(filename)
+        stat = os.stat(sources.source_file(source))
+        version = f"{COLUMNAR_CACHE_VERSION}-{stat.st_size}-{stat.st_mtime_ns}"
+        return os.path.join(
+            self.directory, f"{_digest(source)}-{_digest(version)}.parquet"
+        )
+
+    def read(self, filename: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Returns the content of ``filename``, from its cached copy if possible
+
+        Parameters
+        ----------
+        filename: str
+            Path to the CSV file
+        columns: List[str], default=None
+            Columns to read, all by default
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        pyarrow = _import_pyarrow()
+        target = self.build(filename)
+        table = pyarrow.parquet.read_table(
+            target,
+            columns=columns,
+            memory_map=True,
+            read_dictionary=self._categorical(target, columns),
+        )
+        return table.to_pandas()
+
+    def read_chunks(
+        self, filename: str, chunksize: int, columns: Optional[List[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Yields the content of ``filename`` in chunks of ``chunksize`` rows
+
+        Parameters
+        ----------
+        filename: str
+            Path to the CSV file
+        chunksize: int
+            Number of rows per chunk
+        columns: List[str], default=None
+            Columns to read, all by default
+
+        Yields
+        ------
+        pandas.DataFrame
+        """
+        pyarrow = _import_pyarrow()
+        target = self.build(filename)
+        parquet = pyarrow.parquet.ParquetFile(
+            target,
+            memory_map=True,
+            read_dictionary=self._categorical(target, columns),
+        )
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+
+    def build(self, filename: str) -> str:
+        """Writes the cached copy of ``filename`` if it is missing or stale
+
+        The CSV file is converted in chunks, so building a copy needs no more
+        memory than reading the file in chunks.
+
+        Returns
+        -------
+        str
+            Path of the cached copy
+        """
+        pyarrow = _import_pyarrow()
+        target = self.location(filename)
+        fresh = target in self._built or (not self.rebuild and os.path.exists(target))
+        if fresh:
+            return target
+
+        os.makedirs(self.directory, exist_ok=True)
+        header = sources.read_csv(filename, nrows=0).columns
+        dtype = {
+            column: str if self.dtype[column] == "category" else self.dtype[column]
+            for column in header
+            if column in self.dtype
+        }
+        # Fixes the type of the values of parameters, as the schema of the copy
+        # is taken from the first chunk and later chunks may hold other numbers
+        if "VALUE" in header and len(header) > 1:
+            dtype["VALUE"] = "float64"
+
+        # Each build writes to its own file, so concurrent builders do not clash
+        handle, partial = tempfile.mkstemp(
+            dir=self.directory,
+            prefix=os.path.basename(target) + ".",
+            suffix=".partial",
+        )
+        os.close(handle)
+        writer = None
+        try:
+            for chunk in sources.read_csv_chunks(
+                filename, BUILD_CHUNKSIZE, dtype=dtype
+            ):
+                table = pyarrow.Table.from_pandas(
+                    chunk,
+                    schema=writer.schema if writer else None,
+                    preserve_index=False,
+                )
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(partial, table.schema)
+                writer.write_table(table)
+            if writer is None:
+                empty = pd.DataFrame(columns=header).astype(dtype)
+                writer = pyarrow.parquet.ParquetWriter(
+                    partial,
+                    pyarrow.Table.from_pandas(empty, preserve_index=False).schema,
+                )
+            writer.close()
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+        # Removes copies of earlier versions of the same CSV file
+        for stale in glob.glob(target.rsplit("-", 1)[0] + "-*.parquet"):
+            if stale != target:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+        try:
+            os.replace(partial, target)
+        except OSError:
+            # Another process finished the same copy first
+            os.remove(partial)
+            if not os.path.exists(target):
+                raise
+        self._built.add(target)
+        return target
+
+    def clear(self):
+        """Removes all cached copies from the cache directory"""
+        for copy in glob.glob(os.path.join(self.directory, "*.parquet")):
+            os.remove(copy)
+
+    def _categorical(self, target: str, columns: Optional[List[str]]) -> List[str]:
+        """Returns the columns to read as dictionaries, that is categoricals"""
+        pyarrow = _import_pyarrow()
+        names = columns or pyarrow.parquet.read_schema(target).names
+        return [c for c in names if self.dtype.get(c) == "category"]
+
+
+# Bump when the layout of the stored results changes to invalidate older results
+RESULT_STORE_VERSION = 1
+
+
+def file_fingerprint(filename: str, hash_contents: bool = False) -> str:
+    """Returns a string which changes whenever ``filename`` changes
+
+    The fingerprint holds the absolute path, size and modification time of the
+    file and, with ``hash_contents``, a hash of its contents, which also detects
+    files rewritten with the same size and time stamp. A file in an archive
+    changes whenever the archive changes.
+    """
+    source = os.path.abspath(filename)
+    stat = os.stat(sources.source_file(source))
+    fingerprint = f"{source}-{stat.st_size}-{stat.st_mtime_ns}"
+    if hash_contents:
+        digest = hashlib.sha1()
+        with open(sources.source_file(source), "rb") as contents:
+            for block in iter(lambda: contents.read(1 << 20), b""):
+                digest.update(block)
+        fingerprint += "-" + digest.hexdigest()
+    return fingerprint
+
+
+class ResultStore:
+    """Extracted data of config entries, kept in a directory between runs
+
+    Results are stored under a key made of a description of the entry and the
+    fingerprints of the files it reads, see :meth:`key`. Editing an entry or
+    one of its files changes the key, so only the affected entries are
+    recomputed. Stale results are left in place until :meth:`clear` is called.
+
+    Parameters
+    ----------
+    directory: str
+        Folder holding the stored results. Created if it does not exist
+    hash_contents: bool, default=False
+        Also hash the contents of the files, instead of relying on their size
+        and modification time only
+    """
+
+    def __init__(self, directory: str, hash_contents: bool = False):
+        self.directory = directory
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, description: str, filenames: List[str]) -> str:
+        """Returns the key of an entry described by ``description``
+
+        Parameters
+        ----------
+        description: str
+            Text which identifies how the entry computes its data
+        filenames: List[str]
+            Files the entry reads
+
+        Returns
+        -------
+        str
+        """
+        digest = hashlib.sha1(f"{RESULT_STORE_VERSION}\n{description}".encode("utf-8"))
+        for filename in filenames:
+            digest.update(file_fingerprint(filename, self.hash_contents).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Returns the stored data of ``key``, or ``None`` if there is none"""
+        location = self._location(key)
+        if not os.path.exists(location):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pd.read_pickle(location)
+
+    def put(self, key: str, df: pd.DataFrame):
+        """Stores the data of ``key``"""
+        os.makedirs(self.directory, exist_ok=True)
+        location = self._location(key)
+        partial = location + ".partial"
+        df.to_pickle(partial)
+        os.replace(partial, location)
+
+    def clear(self):
+        """Removes all stored results from the directory"""
+        for stored in glob.glob(os.path.join(self.directory, "*.pkl")):
+            os.remove(stored)
+
+    def _location(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,171 @@
+"""Query engines which filter and sum OSeMOSYS parameters
+
+By default parameters are read into pandas and filtered there. The optional
+``duckdb`` engine instead runs the filters and the sums as one query of an
+embedded DuckDB database over the CSV file, or over its Parquet copy in the
+columnar cache. DuckDB scans and aggregates the file with several threads,
+without loading it into pandas. Files are queried in place through views,
+so DuckDB streams them and reads only the columns and rows a query needs.
+
+DuckDB matches patterns with the RE2 library, which does not support
+lookaheads, lookbehinds or backreferences. Filters with such patterns are
+run by pandas instead, see :meth:`DuckDBEngine.supports`, as are files
+DuckDB cannot read in place, see :meth:`DuckDBEngine.reads`.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+ENGINES = ["pandas", "duckdb"]
+
+
+def _import_duckdb():
+    try:
+        import duckdb
+    except ImportError as ex:
+        raise ImportError(
+            "The duckdb engine requires duckdb. "
+            "Install it with `pip install osemosys2iamc[duckdb]`"
+        ) from ex
+    return duckdb
+
+
+def _literal(text: str) -> str:
+    """Returns ``text`` as an SQL string literal"""
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _identifier(name: str) -> str:
+    """Returns ``name`` as a quoted SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DuckDBEngine:
+    """Filters and sums parameter files with an in-memory DuckDB database
+
+    Parameters
+    ----------
+    threads: int, default=None
+        Number of threads DuckDB may use, one per CPU by default
+    """
+
+    def __init__(self, threads: Optional[int] = None):
+        duckdb = _import_duckdb()
+        self._error = duckdb.Error
+        self.connection = duckdb.connect(":memory:")
+        if threads is not None:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        self._supported = {}  # type: Dict[str, bool]
+        self._views = {}  # type: Dict[str, str]
+
+    def supports(self, patterns: Tuple[str, ...]) -> bool:
+        """Returns whether DuckDB can evaluate all of ``patterns``"""
+        for pattern in patterns:
+            if pattern not in self._supported:
+                try:
+                    self.connection.execute(
+                        f"SELECT regexp_matches('', {_literal(_anchored(pattern))})"
+                    ).fetchall()
+                    self._supported[pattern] = True
+                except self._error:
+                    self._supported[pattern] = False
+            if not self._supported[pattern]:
+                return False
+        return True
+
+    def reads(self, filename: str) -> bool:
+        """Returns whether DuckDB can read ``filename`` in place
+
+        Files in archives and CSV files compressed other than with gzip are
+        read by pandas instead.
+        """
+        return os.path.isfile(filename) and filename.lower().endswith(
+            (".csv", ".csv.gz", ".parquet")
+        )
+
+    def totals(
+        self,
+        filename: str,
+        filters: List[Tuple[str, Tuple[str, ...]]],
+        group: List[str],
+        keep_duplicates: bool = False,
+        years: Optional[Sequence[int]] = None,
+    ) -> pd.DataFrame:
+        """Returns the sums of VALUE by ``group`` and YEAR of the matching rows
+
+        Parameters
+        ----------
+        filename: str
+            Path to a CSV or Parquet file
+        filters: List[Tuple[str, Tuple[str, ...]]]
+            Pairs of a column and the patterns its values must match. The
+            patterns are anchored at the start of the values
+        group: List[str]
+            Columns to sum by, besides YEAR
+        keep_duplicates: bool, default=False
+            Count rows once for every combination of patterns they match
+        years: Sequence[int], default=None
+            Sum only the rows of these years, all rows by default
+
+        Returns
+        -------
+        pandas.DataFrame
+            The ``group`` columns as strings, YEAR and VALUE
+        """
+        source = self._source(filename)
+
+        conditions = []
+        weights = []
+        for column, patterns in filters:
+            value = f"CAST({_identifier(column)} AS VARCHAR)"
+            matches = [
+                f"regexp_matches({value}, {_literal(_anchored(p))})" for p in patterns
+            ]
+            if keep_duplicates:
+                count = " + ".join(f"CAST({m} AS INTEGER)" for m in matches) or "0"
+                conditions.append(f"({count}) > 0")
+                weights.append(f"({count})")
+            else:
+                conditions.append("(" + (" OR ".join(matches) or "false") + ")")
+        if years is not None:
+            listed = ", ".join(str(int(year)) for year in years)
+            conditions.append(f'CAST("YEAR" AS BIGINT) IN ({listed})')
+
+        keys = [f"CAST({_identifier(c)} AS VARCHAR) AS {_identifier(c)}" for c in group]
+        keys.append('CAST("YEAR" AS BIGINT) AS "YEAR"')
+        value = " * ".join(['CAST("VALUE" AS DOUBLE)'] + weights)
+        query = (
+            f"SELECT {', '.join(keys)}, SUM({value}) AS \"VALUE\" FROM {source}"
+            f" WHERE {' AND '.join(conditions) or 'true'}"
+            f" GROUP BY ALL"
+        )
+        return self.connection.execute(query).df()
+
+    def _source(self, filename: str) -> str:
+        """Returns the table expression to query ``filename``
+
+        A CSV file gets a view, which holds no data, so every query scans
+        the file itself. Its columns are read as text and cast by the query,
+        as DuckDB guesses their types from a sample of the rows, which would
+        read VALUE as integers when the first rows hold whole numbers.
+        """
+        if filename.endswith(".parquet"):
+            return f"read_parquet({_literal(filename)})"
+        if filename not in self._views:
+            view = f"parameter_{len(self._views)}"
+            self.connection.execute(
+                f"CREATE VIEW {view} AS "
+                f"SELECT * FROM read_csv({_literal(filename)}, "
+                f"header = true, all_varchar = true)"
+            )
+            self._views[filename] = view
+        return self._views[filename]
+
+    def close(self):
+        self.connection.close()
+
+
+def _anchored(pattern: str) -> str:
+    """Anchors ``pattern`` at the start of the value, as :func:`re.match` does"""
+    return "^(?:" + pattern + ")"
@@ -0,0 +1,461 @@
+"""Compiles a configuration file into a plan of operations
+
+:func:`compile_config` checks a configuration dictionary, as returned by
+:func:`osemosys2iamc.resultify.load_config`, and turns each entry into an
+:class:`EntryPlan` recording the filter to apply, its regular expressions and
+the parameters and columns it reads. All errors in the configuration are
+reported before any file is read.
+
+Units are converted in a single pass over the data, with a table which maps
+a unit to its converted unit and factor. The top-level ``unit_conversions``
+key of the configuration adds rules to, or replaces rules of, the default
+:data:`UNIT_CONVERSIONS`. It holds either the rules::
+
+    unit_conversions:
+      PJ/yr: {to: TWh/yr, factor: 277.78}
+      GW: {to: GW, factor: 1}  # keeps GW
+
+or the path to a YAML file of rules, relative to the configuration file.
+
+The top-level ``years`` and ``regions`` keys select the rows read from every
+parameter, before any filter is applied. ``years`` lists the years, or gives
+a range with a step::
+
+    years: {start: 2020, end: 2060, step: 5}
+    regions: [Austria, Belgium]
+
+A :class:`Plan` holds only plain values, so it can be reused across runs and
+sent to worker processes.
+"""
+import numbers
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from yaml import load, SafeLoader
+
+# Set columns each filter key matches its patterns against
+FILTER_COLUMNS = {
+    "variable_cost": ["TECHNOLOGY"],
+    "fuel": ["TECHNOLOGY", "FUEL"],
+    "emissions": ["EMISSION"],
+    "tech_emi": ["TECHNOLOGY"],
+    "capacity": ["TECHNOLOGY"],
+    "primary_technology": ["TECHNOLOGY"],
+    "excluded_prod_tech": ["TECHNOLOGY"],
+    "el_prod_technology": ["TECHNOLOGY"],
+    "demand": ["FUEL"],
+    "trade_tech": ["TECHNOLOGY"],
+}
+
+# Filter keys of ``results`` entries which sum technologies by region and year
+CAPACITY_KEYS = [
+    "capacity",
+    "primary_technology",
+    "excluded_prod_tech",
+    "el_prod_technology",
+]
+
+# Parameters of a trade entry, as exports and imports
+TRADE_PARAMETERS = ("UseByTechnology", "ProductionByTechnologyAnnual")
+
+TRANSFORMS = ["abs"]
+
+# Units converted in the output, as ``unit: (converted unit, factor)``
+UNIT_CONVERSIONS = {
+    "PJ/yr": ("EJ/yr", 0.001),
+    "ktCO2/yr": ("Mt CO2/yr", 0.001),
+    "MEUR_2015/PJ": ("EUR_2020/GJ", 1.05),
+    "MEUR_2015/GW": ("EUR_2020/kW", 1.05),
+    "kt CO2/yr": ("Mt CO2/yr", 0.001),
+}
+
+
+@dataclass(frozen=True)
+class EntryPlan:
+    """The operations which produce one IAMC variable
+
+    Attributes
+    ----------
+    position: int
+        Position of the entry, counting all ``inputs`` before all ``results``
+    section: str
+        ``inputs`` or ``results``
+    variable: str
+        Name of the IAMC variable
+    unit: str
+        Unit of the OSeMOSYS data
+    parameters: Tuple[str, ...]
+        OSeMOSYS parameters read by the entry
+    kernel: str
+        Name of the filter in :mod:`osemosys2iamc.resultify`
+    arguments: Tuple[Tuple[str, Any], ...]
+        Keyword arguments of the filter
+    columns: Tuple[str, ...], default=None
+        Set columns read from the parameters, ``None`` for all columns
+    aggregated: bool, default=True
+        Whether the filter sums the rows by region and year
+    net_trade: bool, default=False
+        Whether the result is the difference of the filtered exports and imports
+    expand_years: bool, default=False
+        Whether each row is repeated for every model year
+    years: Tuple[int, ...], default=None
+        The model years rows are repeated for, all years by default
+    transform: str, default=None
+        Transformation applied to the values
+    """
+
+    position: int
+    section: str
+    variable: str
+    unit: str
+    parameters: Tuple[str, ...]
+    kernel: str
+    arguments: Tuple[Tuple[str, Any], ...]
+    columns: Optional[Tuple[str, ...]] = None
+    aggregated: bool = True
+    net_trade: bool = False
+    expand_years: bool = False
+    years: Optional[Tuple[int, ...]] = None
+    transform: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Plan:
+    """The compiled form of a configuration file
+
+    Attributes
+    ----------
+    model: str
+    scenario: str
+    region: str
+        Description of how the region is encoded in technology/fuel names
+    entries: Tuple[EntryPlan, ...]
+        The entries in the order they are processed
+    float32: bool, default=False
+        Whether values are stored in single precision
+    unit_conversions: Tuple[Tuple[str, Tuple[str, float]], ...]
+        The items of the unit conversion table, :data:`UNIT_CONVERSIONS`
+        by default
+    years: Tuple[int, ...], default=None
+        The years read from every parameter, all years by default
+    regions: Tuple[str, ...], default=None
+        The regions read from every parameter, as named in the output, all
+        regions by default
+    """
+
+    model: str
+    scenario: str
+    region: str
+    entries: Tuple[EntryPlan, ...] = field(default_factory=tuple)
+    float32: bool = False
+    unit_conversions: Tuple[Tuple[str, Tuple[str, float]], ...] = tuple(
+        UNIT_CONVERSIONS.items()
+    )
+    years: Optional[Tuple[int, ...]] = None
+    regions: Optional[Tuple[str, ...]] = None
+
+
+def compile_config(config: Dict) -> Plan:
+    """Checks a configuration dictionary and compiles it into a plan
+
+    Arguments
+    ---------
+    config : dict
+        The configuration dictionary
+
+    Returns
+    -------
+    Plan
+
+    Raises
+    ------
+    ValueError
+        Listing every error found in the configuration
+    """
+    errors = []  # type: List[str]
+    for key in ["model", "scenario", "region"]:
+        if not isinstance(config.get(key), str):
+            errors.append(f"The `{key}` key must be a string")
+    region = config.get("region")
+    if isinstance(region, str) and "iso" in region:
+        from osemosys2iamc.resultify import region_table
+
+        try:
+            region_table(region)
+        except ValueError as ex:
+            errors.append(str(ex))
+
+    unit_conversions = dict(UNIT_CONVERSIONS)
+    try:
+        unit_conversions.update(compile_units(config.get("unit_conversions")))
+    except ValueError as ex:
+        errors.append(str(ex))
+
+    selection = {}  # type: Dict[str, Optional[Tuple]]
+    try:
+        selection["years"] = compile_years(config.get("years"))
+    except ValueError as ex:
+        errors.append(str(ex))
+    regions = config.get("regions")
+    if regions is not None and (
+        not isinstance(regions, list)
+        or not regions
+        or not all(isinstance(r, str) for r in regions)
+    ):
+        errors.append("The `regions` key must be a list of region names")
+    elif regions is not None:
+        selection["regions"] = tuple(regions)
+
+    keep_duplicates = bool(config.get("keep_duplicate_matches", False))
+    entries = []
+    position = 0
+    for section in ["inputs", "results"]:
+        section_entries = config.get(section) or []
+        if not isinstance(section_entries, list):
+            errors.append(f"The `{section}` key must be a list of entries")
+            continue
+        for entry in section_entries:
+            try:
+                entries.append(compile_entry(entry, position, section, keep_duplicates))
+            except ValueError as ex:
+                errors.append(str(ex))
+            position += 1
+
+    if errors:
+        raise ValueError("Error in configuration file:\n- " + "\n- ".join(errors))
+
+    return Plan(
+        model=config["model"],
+        scenario=config["scenario"],
+        region=region,
+        entries=tuple(entries),
+        float32=bool(config.get("float32", False)),
+        unit_conversions=tuple(unit_conversions.items()),
+        **selection,
+    )
+
+
+def compile_years(years: Any) -> Optional[Tuple[int, ...]]:
+    """Checks the top-level ``years`` key of a configuration
+
+    Arguments
+    ---------
+    years : list or dict
+        The years, or a range as ``{start: year, end: year, step: n}``, with
+        ``end`` included and ``step`` 1 by default
+
+    Returns
+    -------
+    Tuple[int, ...]
+        The sorted years, ``None`` if no years are selected
+    """
+    if years is None:
+        return None
+    if isinstance(years, dict):
+        start, end, step = years.get("start"), years.get("end"), years.get("step", 1)
+        if set(years) - {"start", "end", "step"} or not all(
+            _is_int(value) for value in [start, end, step]
+        ):
+            raise ValueError(
+                "The `years` range needs integer `start`, `end` and `step` keys only"
+            )
+        if step < 1 or end < start:
+            raise ValueError(
+                "The `years` range needs a positive `step` and `end` after `start`"
+            )
+        return tuple(range(start, end + 1, step))
+    if not isinstance(years, list) or not years or not all(map(_is_int, years)):
+        raise ValueError("The `years` key must be a list of years or a range")
+    return tuple(sorted(set(years)))
+
+
+def compile_units(rules: Any) -> Dict[str, Tuple[str, float]]:
+    """Checks the ``unit_conversions`` key of a configuration
+
+    Arguments
+    ---------
+    rules : dict or str
+        The conversion rules, as ``unit: {to: converted unit, factor: factor}``,
+        or the path to a YAML file holding them
+
+    Returns
+    -------
+    Dict[str, Tuple[str, float]]
+        The converted unit and factor of each unit
+    """
+    if rules is None:
+        return {}
+    if isinstance(rules, str):
+        try:
+            with open(rules, "r") as units_file:
+                rules = load(units_file, Loader=SafeLoader) or {}
+        except OSError as ex:
+            raise ValueError(f"Cannot read the unit conversions in {rules}: {ex}")
+    if not isinstance(rules, dict):
+        raise ValueError(
+            "The `unit_conversions` key must be a mapping or the path to a file"
+        )
+
+    table = {}
+    for unit, rule in rules.items():
+        if not isinstance(rule, dict):
+            raise ValueError(f"The conversion of unit {unit} must be a mapping")
+        to, factor = rule.get("to"), rule.get("factor")
+        if not isinstance(to, str):
+            raise ValueError(f"The conversion of unit {unit} has no `to` unit")
+        if isinstance(factor, bool) or not isinstance(factor, numbers.Real):
+            raise ValueError(f"The conversion of unit {unit} needs a numeric `factor`")
+        table[str(unit)] = (to, float(factor))
+    return table
+
+
+def compile_entry(
+    entry: Dict, position: int, section: str, keep_duplicates: bool = False
+) -> EntryPlan:
+    """Compiles one entry of the ``inputs`` or ``results`` section
+
+    Arguments
+    ---------
+    entry : dict
+        The config entry
+    position: int
+        Position of the entry, counting all ``inputs`` before all ``results``
+    section: str
+        ``inputs`` or ``results``
+    keep_duplicates: bool, default=False
+        Count rows once for every pattern they match
+
+    Returns
+    -------
+    EntryPlan
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"Entry {position + 1} of the configuration is not a mapping")
+    name = entry.get("iamc_variable")
+    if not isinstance(name, str):
+        raise ValueError(
+            f"Entry {position + 1} of the configuration has no `iamc_variable`"
+        )
+    if not isinstance(entry.get("unit"), str):
+        raise ValueError(f"Entry {name} has no `unit`")
+    transform = entry.get("transform")
+    if transform is not None and transform not in TRANSFORMS:
+        raise ValueError(f"Entry {name} has an unknown transform {transform}")
+
+    param = entry.get("osemosys_param")
+    if not isinstance(param, (str, list)):
+        msg = f"Error in configuration file for entry {name}. The `osemosys_param` key must be a string or a list"
+        raise ValueError(msg)
+
+    def patterns(key: str) -> Tuple[str, ...]:
+        return _patterns(entry, key, name)
+
+    fields = dict(
+        position=position,
+        section=section,
+        variable=name,
+        unit=entry["unit"],
+        parameters=(param,),
+        columns=_columns(entry),
+        transform=transform,
+    )
+    filtered = dict(keep_duplicates=keep_duplicates)
+
+    if section == "inputs":
+        if not isinstance(param, str):
+            raise ValueError(f"The `osemosys_param` of entry {name} must be a string")
+        if "variable_cost" in entry:
+            technologies = patterns("variable_cost")
+            kernel, arguments = "filter_capacity", dict(technologies=technologies)
+        elif "reg_tech_param" in entry:
+            technologies = patterns("reg_tech_param")
+            kernel, arguments = "filter_technologies", dict(technologies=technologies)
+            fields.update(aggregated=False, expand_years=True, columns=None)
+            if "years" in entry:
+                fields.update(years=_years(entry, name))
+        else:
+            raise ValueError(
+                f"Entry {name} needs a `variable_cost` or `reg_tech_param` key"
+            )
+        arguments.update(filtered)
+
+    elif isinstance(param, list):
+        if "trade_tech" not in entry:
+            raise ValueError(f"No data found for {name}")
+        kernel = "filter_capacity"
+        arguments = dict(technologies=patterns("trade_tech"), **filtered)
+        fields.update(parameters=TRADE_PARAMETERS, net_trade=True)
+
+    elif "fuel" in entry:
+        kernel = "filter_technology_fuel"
+        arguments = dict(
+            technologies=patterns("technology"), fuels=patterns("fuel"), **filtered
+        )
+    elif "emissions" in entry:
+        kernel = "filter_emission_tech"
+        arguments = dict(
+            emission=patterns("emissions"),
+            technologies=patterns("tech_emi") if "tech_emi" in entry else None,
+            **filtered,
+        )
+    elif "demand" in entry:
+        kernel = "filter_final_energy"
+        arguments = dict(fuels=patterns("demand"), **filtered)
+    else:
+        keys = [key for key in CAPACITY_KEYS if key in entry]
+        if keys:
+            kernel = "filter_capacity"
+            arguments = dict(technologies=patterns(keys[0]), **filtered)
+        elif "technology" in entry:
+            kernel = "extract_results"
+            arguments = dict(technologies=_names(entry, "technology", name))
+            fields.update(aggregated=False)
+        else:
+            raise ValueError(f"Entry {name} has no filter key")
+
+    return EntryPlan(kernel=kernel, arguments=tuple(arguments.items()), **fields)
+
+
+def _columns(entry: Dict) -> Optional[Tuple[str, ...]]:
+    """Returns the set columns an entry reads from its parameters
+
+    Returns ``None`` for entries which pass rows through without aggregating
+    them (``reg_tech_param`` and plain technology lists), as every column
+    ends up in the output.
+    """
+    columns = []  # type: List[str]
+    for key, key_columns in FILTER_COLUMNS.items():
+        if key in entry:
+            columns.extend(c for c in key_columns if c not in columns)
+    return tuple(columns) or None
+
+
+def _names(entry: Dict, key: str, name: str) -> Tuple[str, ...]:
+    values = entry.get(key)
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"The `{key}` key of entry {name} must be a list of strings")
+    return tuple(values)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _years(entry: Dict, name: str) -> Tuple[int, ...]:
+    years = entry.get("years")
+    if not isinstance(years, list) or not years or not all(map(_is_int, years)):
+        raise ValueError(f"The `years` key of entry {name} must be a list of years")
+    return tuple(years)
+
+
+def _patterns(entry: Dict, key: str, name: str) -> Tuple[str, ...]:
+    patterns = _names(entry, key, name)
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as ex:
+            raise ValueError(
+                f"Invalid pattern '{pattern}' in the `{key}` key of entry {name}: {ex}"
+            ) from ex
+    return patterns
@@ -0,0 +1,279 @@
+"""Records where the time and memory of a conversion are spent
+
+Profiling is opt-in. Code paths of the conversion are wrapped in
+:func:`phase`, which does nothing unless a :class:`Profiler` is active::
+
+    with Profiler() as profiler:
+        all_data = main(config, inputs_path, results_path)
+    profiler.write("profile.json")
+    print(profiler.summary())
+
+For each config entry and phase the profiler records the number of calls, the
+wall time, the rows in and out, the number of patterns and the peak memory
+allocated in the phase, as traced by :mod:`tracemalloc`. The phases are
+listed in :data:`PHASES`. Reading a parameter, or a filter computed for
+several entries at once, is recorded against the entry which needed it first.
+Phases may run on several threads, the peak memory is then that of the whole
+process during the phase.
+"""
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+PHASES = [
+    "load",
+    "region tagging",
+    "filter",
+    "aggregate",
+    "pyam build",
+    "unit conversion",
+    "write",
+]
+
+# Columns of the report, one row per entry and phase
+REPORT_COLUMNS = [
+    "entry",
+    "phase",
+    "calls",
+    "seconds",
+    "rows_in",
+    "rows_out",
+    "patterns",
+    "peak_mb",
+]
+
+_active = None  # type: Optional[Profiler]
+
+
+class Profiler:
+    """Collects the measurements of :func:`phase` while it is active
+
+    Use as a context manager, or call :meth:`start` and :meth:`stop`.
+    Entering the profiler starts :mod:`tracemalloc` if it is not running
+    already, which slows down the conversion.
+    """
+
+    def __init__(self):
+        self.records = {}  # type: Dict[Tuple[str, str], Dict]
+        self._lock = threading.Lock()
+        # The current entry and open phases of each thread
+        self._local = threading.local()
+        self._tracing = False
+        self._previous = None  # type: Optional[Profiler]
+
+    def start(self) -> "Profiler":
+        global _active
+        self._previous, _active = _active, self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        return self
+
+    def stop(self):
+        global _active
+        _active = self._previous
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def entry(self) -> str:
+        """The config entry phases of the current thread are recorded against"""
+        return getattr(self._local, "entry", "")
+
+    @entry.setter
+    def entry(self, name: str):
+        self._local.entry = name
+
+    @property
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _update_peaks(self):
+        """Passes the peak since the last reset on to all open phases"""
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame["peak"] = max(frame["peak"], peak)
+        # Python 3.8 only reports the peak of the whole run
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def phase(
+        self,
+        name: str,
+        rows_in: Optional[int] = None,
+        patterns: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        entry = self.entry
+        self._update_peaks()
+        current = tracemalloc.get_traced_memory()[0]
+        frame = {"current": current, "peak": current}
+        measures = {"rows_out": None}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield measures
+        finally:
+            seconds = time.perf_counter() - start
+            self._update_peaks()
+            self._stack.pop()
+            self.add(
+                entry,
+                name,
+                seconds=seconds,
+                rows_in=rows_in,
+                rows_out=measures["rows_out"],
+                patterns=patterns,
+                peak_mb=(frame["peak"] - frame["current"]) / 2**20,
+            )
+
+    def add(self, entry: str, phase: str, calls: int = 1, **measures):
+        """Adds measurements of ``phase`` to the record of ``entry``
+
+        Times, calls and rows are summed over calls, the number of patterns
+        and the peak memory are the largest of any call.
+        """
+        with self._lock:
+            self._add(entry, phase, calls, measures)
+
+    def _add(self, entry: str, phase: str, calls: int, measures: Dict):
+        record = self.records.setdefault(
+            (entry, phase),
+            dict(
+                entry=entry,
+                phase=phase,
+                calls=0,
+                seconds=0.0,
+                rows_in=None,
+                rows_out=None,
+                patterns=None,
+                peak_mb=0.0,
+            ),
+        )
+        record["calls"] += calls
+        record["seconds"] += measures.get("seconds") or 0.0
+        for key in ["rows_in", "rows_out"]:
+            if measures.get(key) is not None:
+                record[key] = (record[key] or 0) + measures[key]
+        for key in ["patterns", "peak_mb"]:
+            if measures.get(key) is not None:
+                record[key] = max(record[key] or 0, measures[key])
+
+    def merge(self, records: List[Dict]):
+        """Adds the records of another profiler, such as one of a worker"""
+        for record in records:
+            record = dict(record)
+            self.add(record.pop("entry"), record.pop("phase"), **record)
+
+    def report(self) -> pd.DataFrame:
+        """Returns one row per entry and phase, in the order they were first run"""
+        report = pd.DataFrame(list(self.records.values()), columns=REPORT_COLUMNS)
+        return report.astype(
+            {"rows_in": "Int64", "rows_out": "Int64", "patterns": "Int64"}
+        )
+
+    def write(self, path: str):
+        """Writes the report to a ``.json`` or ``.csv`` file"""
+        report = self.report()
+        if os.path.splitext(path)[1].lower() == ".csv":
+            report.to_csv(path, index=False)
+        else:
+            report.to_json(path, orient="records", indent=2)
+
+    def summary(self, slowest: int = 10) -> str:
+        """Returns a table of the totals by phase and of the slowest entries"""
+        report = self.report()
+        if report.empty:
+            return "No phases were profiled"
+        by_phase = report.groupby("phase", sort=False).agg(
+            calls=("calls", "sum"),
+            seconds=("seconds", "sum"),
+            peak_mb=("peak_mb", "max"),
+        )
+        by_phase = by_phase.reindex(
+            [p for p in PHASES if p in by_phase.index]
+            + [p for p in by_phase.index if p not in PHASES]
+        )
+        entries = report[report.entry != ""]
+        by_entry = (
+            entries.groupby("entry", sort=False)
+            .agg(seconds=("seconds", "sum"), peak_mb=("peak_mb", "max"))
+            .nlargest(slowest, "seconds")
+        )
+        return "\n\n".join(
+            [
+                "Time by phase\n" + by_phase.to_string(float_format="{:.3f}".format),
+                "Slowest entries\n" + by_entry.to_string(float_format="{:.3f}".format),
+            ]
+        )
+
+
+def active() -> Optional[Profiler]:
+    """Returns the active profiler, if any"""
+    return _active
+
+
+def phase(
+    name: str, rows_in: Optional[int] = None, patterns: Optional[int] = None
+) -> contextlib.AbstractContextManager:
+    """Measures the code in a ``with`` block as phase ``name`` of the current entry
+
+    Yields a dictionary, set its ``rows_out`` key to record the rows returned
+    by the phase. Does nothing unless a :class:`Profiler` is active.
+    """
+    if _active is None:
+        return contextlib.nullcontext({})
+    return _active.phase(name, rows_in, patterns)
+
+
+def iterate(name: str, items: Iterable) -> Iterator:
+    """Yields from ``items``, measuring the production of each item as phase ``name``"""
+    if _active is None:
+        yield from items
+        return
+    items = iter(items)
+    while True:
+        with phase(name) as measures:
+            item = next(items, None)
+            if item is not None:
+                measures["rows_out"] = len(item)
+        if item is None:
+            return
+        yield item
+
+
+@contextlib.contextmanager
+def entry(name: str) -> Iterator[None]:
+    """Attributes the phases run in a ``with`` block to the config entry ``name``"""
+    if _active is None:
+        yield
+        return
+    previous, _active.entry = _active.entry, name
+    try:
+        yield
+    finally:
+        _active.entry = previous
+
+
+def profiled(func, *args, **kwargs) -> Tuple[object, List[Dict]]:
+    """Calls ``func`` under a new profiler and returns its result and records
+
+    Used to profile the work done by the processes of a pool.
+    """
+    with Profiler() as profiler:
+        result = func(*args, **kwargs)
+    return result, list(profiler.records.values())
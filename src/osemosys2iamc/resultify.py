@@ -12,130 +12,570 @@ where:
     ``output_path`` is the path to the CSV file written out in IAMC format
 
 """
+import argparse
+import dataclasses
 import functools
-from multiprocessing.sharedctypes import Value
-from sqlite3 import DatabaseError
+import logging
+import numpy as np
 import pandas as pd
-import pyam
-from iso3166 import countries_by_alpha2, countries_by_alpha3
-import sys
 import os
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from pandas.api.types import union_categoricals
 from yaml import load, SafeLoader
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from osemosys2iamc import profiling, sources
+from osemosys2iamc.cache import (
+    ColumnarCache,
+    ParameterCache,
+    Prefetcher,
+    ResultStore,
+)
+from osemosys2iamc.engines import ENGINES, DuckDBEngine
+from osemosys2iamc.plan import UNIT_CONVERSIONS, EntryPlan, Plan, compile_config
+from osemosys2iamc.sources import FrameSource, ParameterFrames
+from osemosys2iamc.writers import WRITERS, output_format, write
 import re
 
-# Creates an alias for United Kingdom and Greece using alternate 2-letter code
+# pyam, matplotlib, scipy and iso3166 are imported where they are used, so
+# that the command line starts quickly and reports usage errors at once
+if TYPE_CHECKING:
+    import pyam
+
+logger = logging.getLogger(__name__)
+
+# Alternate 2-letter codes for United Kingdom and Greece
 # (see issue https://github.com/OSeMOSYS/osemosys2iamc/issues/33)
-countries_by_alpha2["UK"] = countries_by_alpha2["GB"]
-countries_by_alpha2["EL"] = countries_by_alpha2["GR"]
+ISO2_ALIASES = {"UK": "GB", "EL": "GR"}
 
+# Country names used in IAMC templates which differ from the ISO 3166 names
+COUNTRY_NAME_VARIANTS = {
+    "Netherlands": "The Netherlands",
+    "Czechia": "Czech Republic",
+    "United Kingdom of Great Britain and Northern Ireland": "United Kingdom",
+}
 
-def iso_to_country(
-    iso_format: str, index: List[str], osemosys_param: str
-) -> pd.DataFrame:
-    """Reads in selected CSV file and applies chosen region naming convention
 
-    Uses naming convention as given in the config file into a Pandas DataFrame
+@functools.lru_cache(maxsize=None)
+def region_table(iso_format: str) -> Tuple[str, Dict[str, str]]:
+    """Returns the extraction regex and code to country name table of an ISO option
+
+    The table includes the aliases in ``ISO2_ALIASES`` and uses the names in
+    ``COUNTRY_NAME_VARIANTS`` in place of the ISO 3166 names.
 
     Parameters
     ----------
     iso_format: str
         Extraction format from technology/fuel name based on iso2 or iso3 and where the code is located
-    index: List[str]
-        List of technologies/fuels
-    osemosys_param: str
-        Name of CSV file
 
     Returns
     -------
-    List[str]
+    Tuple[str, Dict[str, str]]
     """
-    countries_list = []
-    no_country_extracted = []
     format_regex = r"^iso[23]_([1-9]\d*|start|end)$"
 
     # Verifies that given format is the expected format; Raises an error if expectation not met
-    if re.search(format_regex, iso_format) is not None:
-
-        iso_type, abbr_loc = iso_format[3:].split("_")
-
-        # Assigns the correct dictionary to search based on iso type
-        if iso_type == "2":
-            country_dict = countries_by_alpha2
-        elif iso_type == "3":
-            country_dict = countries_by_alpha3
-
-        # Creates the regex with the expected location of the ISO code
-        if abbr_loc == "start":
-            region_regex = r"^(.{" + iso_type + r"}).*$"
-        elif abbr_loc == "end":
-            region_regex = r"^.*(.{" + iso_type + r"})$"
-        elif abbr_loc.isnumeric:
-            region_regex = (
-                r"^.{" + str(int(abbr_loc) - 1) + r"}(.{" + iso_type + r"}).*$"
-            )
-
-        """
-        Checks every technology/fuel name for a valid code. If found,
-        adds that country to the list for that tech/fuel name, otherwise
-        adds an empty string for that tech/fuel. A position exceeding the
-        length of the name, adds an empty string instead
-        """
-        for i in index:
-            if re.search(region_regex, i.upper()) != None:
-                code = re.search(region_regex, i.upper()).groups()[0]
-                if code in country_dict:
-                    countries_list.append(country_dict[code].name)
-                else:
-                    countries_list.append("")
-                    no_country_extracted.append(i)
-            else:
-                countries_list.append("")
-                no_country_extracted.append(i)
-
-    else:
+    if re.search(format_regex, iso_format) is None:
         raise ValueError(
             "Invalid ISO type or abbreviation location. Valid locations are 'start', 'end', and a positive number denoting the start of the abbreviation in the string."
         )
 
+    from iso3166 import countries_by_alpha2, countries_by_alpha3
+
+    iso_type, abbr_loc = iso_format[3:].split("_")
+
+    # Assigns the correct dictionary to search based on iso type
+    if iso_type == "2":
+        country_dict = dict(countries_by_alpha2)
+        for alias, code in ISO2_ALIASES.items():
+            country_dict[alias] = countries_by_alpha2[code]
+    else:
+        country_dict = countries_by_alpha3
+
+    table = {
+        code: COUNTRY_NAME_VARIANTS.get(country.name, country.name)
+        for code, country in country_dict.items()
+    }
+
+    # Creates the regex with the expected location of the ISO code
+    if abbr_loc == "start":
+        region_regex = r"^(.{" + iso_type + r"}).*$"
+    elif abbr_loc == "end":
+        region_regex = r"^.*(.{" + iso_type + r"})$"
+    else:
+        region_regex = r"^.{" + str(int(abbr_loc) - 1) + r"}(.{" + iso_type + r"}).*$"
+
+    return region_regex, table
+
+
+def region_names(
+    iso_format: str,
+    names: pd.Series,
+    osemosys_param: str,
+    missing: Optional[Set[str]] = None,
+) -> Union[np.ndarray, pd.Categorical]:
+    """Returns the country of each technology/fuel name following ``iso_format``
+
+    Codes are extracted from the unique names only and mapped to country names
+    through :func:`region_table`. Names without a valid code get an empty
+    string. Categorical names give a categorical of countries.
+
+    Parameters
+    ----------
+    iso_format: str
+        Extraction format from technology/fuel name based on iso2 or iso3 and where the code is located
+    names: pandas.Series
+        Technology/fuel names
+    osemosys_param: str
+        Name of CSV file
+    missing: Set[str], default=None
+        Collects the names without a country instead of reporting them
+
+    Returns
+    -------
+    numpy.ndarray or pandas.Categorical
+    """
+    region_regex, table = region_table(iso_format)
+    codes, uniques = factorize_labels(names)
+
+    extracted = (
+        pd.Series(uniques, dtype=object)
+        .str.upper()
+        .str.extract(region_regex, expand=False)
+    )
+    countries = extracted.map(table)
+
+    not_found = set(uniques[countries.isna().to_numpy()])
+    if missing is None:
+        report_missing_countries(not_found, osemosys_param)
+    else:
+        missing.update(not_found)
+
+    countries = countries.fillna("").to_numpy(dtype=object)
+    # The extra trailing name is picked up by the code -1 of missing values
+    countries = np.append(countries, "")
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        labels, categories = pd.factorize(countries)
+        return pd.Categorical.from_codes(labels[codes], categories=categories)
+    return countries[codes]
+
+
+def report_missing_countries(names: Set[str], osemosys_param: str):
     """
     If countries were not found, user is notified for which names and
     in which CSV valid codes were not found. This may be intended by
     the user so the program is not halt and continues normally
     """
-    if len(no_country_extracted) > 0:
+    if len(names) > 0:
         print(
-            f"Using the ISO option, Countries were not found from the following technologies/fuels: {set(no_country_extracted)}"
+            f"Using the ISO option, Countries were not found from the following technologies/fuels: {names}"
         )
         print(
             f"Kindly check your region naming option or the technology/fuel names in file: {osemosys_param}.\n"
         )
 
-    return countries_list
 
+def iso_to_country(iso_format: str, index: List[str], osemosys_param: str) -> List[str]:
+    """Returns the country encoded in each technology/fuel name
 
-def read_file(path: str, osemosys_param: str, region_name_option: str) -> pd.DataFrame:
+    Parameters
+    ----------
+    iso_format: str
+        Extraction format from technology/fuel name based on iso2 or iso3 and where the code is located
+    index: List[str]
+        List of technologies/fuels
+    osemosys_param: str
+        Name of CSV file
+
+    Returns
+    -------
+    List[str]
+    """
+    return region_names(
+        iso_format, pd.Series(index, dtype=object), osemosys_param
+    ).tolist()
+
+
+# Narrow types for the columns of OSeMOSYS parameter files. Set elements are
+# held as categoricals as a few thousand names repeat over millions of rows
+OSEMOSYS_DTYPES = {
+    "REGION": "category",
+    "TECHNOLOGY": "category",
+    "FUEL": "category",
+    "EMISSION": "category",
+    "TIMESLICE": "category",
+    "STORAGE": "category",
+    "MODE_OF_OPERATION": "int16",
+    "YEAR": "int16",
+}
+
+# Parsers of the CSV files, as the ``engine`` of :func:`pandas.read_csv`
+PARSERS = ["c", "pyarrow"]
+
+# Columns from which the region is extracted with an ISO option, in order of preference
+REGION_SOURCE_COLUMNS = ["FUEL", "TECHNOLOGY", "EMISSION"]
+
+# Rows parsed at a time by :func:`read_file` when it selects rows while reading
+SELECT_CHUNKSIZE = 1_000_000
+
+
+def parameter_file(path: str, osemosys_param: str) -> str:
+    """Returns the path of the CSV file holding ``osemosys_param``
+
+    ``path`` may be a folder or an archive and the file may be compressed,
+    see :mod:`osemosys2iamc.sources`.
+    """
+    return sources.locate(path, osemosys_param + ".csv")
+
+
+def read_file(
+    path: Union[str, ParameterFrames],
+    osemosys_param: str,
+    region_name_option: str,
+    columns: Optional[List[str]] = None,
+    typed: bool = False,
+    float32: bool = False,
+    disk_cache: Optional[ColumnarCache] = None,
+    parser: str = "c",
+    years: Optional[Sequence[int]] = None,
+    regions: Optional[Sequence[str]] = None,
+    drop_zeros: bool = False,
+) -> pd.DataFrame:
     """Reads in selected CSV file and applies chosen region
     naming convention as given in the config file into a Pandas DataFrame
 
     Parameters
     ----------
-    path: str
-        Path to a folder of CSV files (OSeMOSYS inputs/outputs)
+    path: str or ParameterFrames
+        Path to a folder or archive of CSV files (OSeMOSYS inputs/outputs), or
+        the parameters held in memory
     osemosys_param: str
         Name of CSV file
     region_name_option: str
         Description of how the region is encoded in technology/fuel names and how it can be extracted
+    columns: List[str], default=None
+        Set columns needed by the caller. Other set columns are dropped while
+        parsing, YEAR and VALUE are always kept. By default all columns are read
+    typed: bool, default=False
+        Parse set columns as categoricals and years as ``int16``
+    float32: bool, default=False
+        Parse values as ``float32``
+    disk_cache: ColumnarCache, default=None
+        Read from (and create) a typed columnar copy of the CSV file
+    parser: str, default="c"
+        One of :data:`PARSERS`. ``pyarrow`` parses the file with several
+        threads, and requires ``pyarrow``
+    years: Sequence[int], default=None
+        Keep only the rows of these years, all rows by default
+    regions: Sequence[str], default=None
+        Keep only the rows of these regions, as tagged, all rows by default
+    drop_zeros: bool, default=False
+        Drop the rows whose value is zero
 
     Returns
     -------
     pandas.DataFrame
     """
+    selected = years is not None or drop_zeros
+
+    with profiling.phase("load") as measures:
+        if isinstance(path, ParameterFrames):
+            df = path.read(osemosys_param)
+            options = column_options(
+                df.columns, region_name_option, columns, typed, float32
+            )
+            df = select_columns(df, options["usecols"])
+            df = select_rows(df, years, drop_zeros)
+            df = csv_types(df, options["dtype"], typed)
+        else:
+            filename = parameter_file(path, osemosys_param)
+            options = csv_options(filename, region_name_option, columns, typed, float32)
+            if selected and (disk_cache is not None or parser == "c"):
+                # Rows are selected chunk by chunk, so the rows left out are
+                # never all held in memory
+                if disk_cache is None:
+                    chunks = sources.read_csv_chunks(
+                        filename, SELECT_CHUNKSIZE, **options
+                    )
+                else:
+                    chunks = (
+                        csv_types(chunk, options["dtype"], typed)
+                        for chunk in disk_cache.read_chunks(
+                            filename, SELECT_CHUNKSIZE, options["usecols"]
+                        )
+                    )
+                parts = [select_rows(chunk, years, drop_zeros) for chunk in chunks]
+                if parts:
+                    df = concat_parts(parts)
+                else:
+                    df = sources.read_csv(filename, nrows=0, **options)
+            elif disk_cache is None:
+                df = sources.read_csv(filename, engine=parser, **options)
+                df = select_rows(df, years, drop_zeros)
+            else:
+                df = disk_cache.read(filename, options["usecols"])
+                df = csv_types(df, options["dtype"], typed)
+        measures["rows_out"] = len(df)
+
+    with profiling.phase("region tagging", rows_in=len(df)) as measures:
+        df = tag_regions(df, region_name_option, osemosys_param, typed)
+        df = select_regions(df, regions)
+        measures["rows_out"] = len(df)
+    return df
+
+
+def read_file_chunks(
+    path: Union[str, ParameterFrames],
+    osemosys_param: str,
+    region_name_option: str,
+    chunksize: int,
+    columns: Optional[List[str]] = None,
+    typed: bool = False,
+    float32: bool = False,
+    disk_cache: Optional[ColumnarCache] = None,
+    years: Optional[Sequence[int]] = None,
+    regions: Optional[Sequence[str]] = None,
+    drop_zeros: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Reads the selected CSV file in chunks of ``chunksize`` rows
+
+    Each chunk is selected and region-tagged as by :func:`read_file`, so
+    only one chunk needs to be held in memory at a time. Names without a
+    country are reported once, after the last chunk.
+
+    Parameters
+    ----------
+    path: str or ParameterFrames
+        Path to a folder or archive of CSV files (OSeMOSYS inputs/outputs), or
+        the parameters held in memory
+    osemosys_param: str
+        Name of CSV file
+    region_name_option: str
+        Description of how the region is encoded in technology/fuel names and how it can be extracted
+    chunksize: int
+        Number of rows per chunk
+    columns: List[str], default=None
+        Set columns needed by the caller, see :func:`read_file`
+    typed: bool, default=False
+        Parse set columns as categoricals and years as ``int16``
+    float32: bool, default=False
+        Parse values as ``float32``
+    disk_cache: ColumnarCache, default=None
+        Read from (and create) a typed columnar copy of the CSV file
+    years: Sequence[int], default=None
+        Keep only the rows of these years, all rows by default
+    regions: Sequence[str], default=None
+        Keep only the rows of these regions, as tagged, all rows by default
+    drop_zeros: bool, default=False
+        Drop the rows whose value is zero
+
+    Yields
+    ------
+    pandas.DataFrame
+    """
+    in_memory = isinstance(path, ParameterFrames)
+    if in_memory:
+        data = path.read(osemosys_param)
+        options = column_options(
+            data.columns, region_name_option, columns, typed, float32
+        )
+        chunks = (
+            select_columns(data.iloc[start : start + chunksize], options["usecols"])
+            for start in range(0, len(data), chunksize)
+        )
+    else:
+        filename = parameter_file(path, osemosys_param)
+        options = csv_options(filename, region_name_option, columns, typed, float32)
+        if disk_cache is None:
+            chunks = sources.read_csv_chunks(filename, chunksize, **options)
+        else:
+            chunks = disk_cache.read_chunks(filename, chunksize, options["usecols"])
+    missing = set()
+    for chunk in profiling.iterate("load", chunks):
+        chunk = select_rows(chunk, years, drop_zeros)
+        if in_memory or disk_cache is not None:
+            chunk = csv_types(chunk, options["dtype"], typed)
+        with profiling.phase("region tagging", rows_in=len(chunk)) as measures:
+            chunk = tag_regions(
+                chunk, region_name_option, osemosys_param, typed, missing
+            )
+            chunk = select_regions(chunk, regions)
+            measures["rows_out"] = len(chunk)
+        yield chunk
+    report_missing_countries(missing, osemosys_param)
+
+
+def csv_options(
+    filename: str,
+    region_name_option: str,
+    columns: Optional[List[str]] = None,
+    typed: bool = False,
+    float32: bool = False,
+) -> Dict:
+    """Returns the ``usecols`` and ``dtype`` arguments of :func:`pandas.read_csv`
+
+    See :func:`read_file` for the parameters.
+    """
+    header = sources.read_csv(filename, nrows=0).columns
+    return column_options(header, region_name_option, columns, typed, float32)
+
+
+def column_options(
+    header: Iterable[str],
+    region_name_option: str,
+    columns: Optional[List[str]] = None,
+    typed: bool = False,
+    float32: bool = False,
+) -> Dict:
+    """Returns the columns to keep and their types, given the columns of a file
+
+    See :func:`csv_options`.
+    """
+    header = list(header)
+    usecols = None
+    if columns is not None:
+        keep = set(columns) | {"YEAR", "VALUE"}
+        if "iso" in region_name_option:
+            keep.update(region_source(header))
+        elif region_name_option == "from_csv":
+            keep.add("REGION")
+        usecols = [c for c in header if c in keep]
+
+    dtype = {}
+    if typed:
+        dtype.update(OSEMOSYS_DTYPES)
+    if float32:
+        dtype["VALUE"] = "float32"
+    dtype = {c: t for c, t in dtype.items() if c in (usecols or header)}
+
+    return {"usecols": usecols, "dtype": dtype}
+
+
+def select_columns(df: pd.DataFrame, usecols: Optional[List[str]]) -> pd.DataFrame:
+    """Returns a new frame of the ``usecols`` columns of ``df``, all by default
+
+    The columns are shared with ``df``, not copied, and columns set on the
+    new frame do not change ``df``.
+    """
+    if usecols is None:
+        return df.copy(deep=False)
+    return pd.DataFrame({column: df[column] for column in usecols}, copy=False)
+
 
-    filename = os.path.join(path, osemosys_param + ".csv")
-    df = pd.read_csv(filename)
+def select_rows(
+    df: pd.DataFrame, years: Optional[Sequence[int]] = None, drop_zeros: bool = False
+) -> pd.DataFrame:
+    """Returns the rows of ``df`` in ``years``, without zero values if ``drop_zeros``
+
+    Parameters without a YEAR column are not selected by year. ``df`` is
+    returned as is if all its rows are kept.
+    """
+    keep = np.ones(len(df), dtype=bool)
+    if years is not None and "YEAR" in df.columns:
+        keep &= df["YEAR"].isin(years).to_numpy()
+    if drop_zeros:
+        keep &= (df["VALUE"] != 0).to_numpy()
+    if keep.all():
+        return df
+    return df[keep]
+
+
+def select_regions(
+    df: pd.DataFrame, regions: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Returns the rows of ``df`` whose REGION is in ``regions``, all by default"""
+    if regions is None:
+        return df
+    return df[df["REGION"].isin(regions).to_numpy()]
+
+
+def concat_parts(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates the parts of a parameter parsed in chunks
+
+    Categorical columns stay categorical, with the union of the categories
+    of the parts in sorted order, as when the file is parsed at once.
+    """
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+    columns = {}
+    for column, dtype in parts[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(
+                [part[column] for part in parts], sort_categories=True
+            )
+        else:
+            columns[column] = np.concatenate(
+                [part[column].to_numpy() for part in parts]
+            )
+    return pd.DataFrame(columns)
+
+
+def csv_types(df: pd.DataFrame, dtype: Dict, typed: bool) -> pd.DataFrame:
+    """Gives a frame not parsed from CSV the types of a parsed CSV file
+
+    Columns which have their type already are not copied.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Frame read from a :class:`~osemosys2iamc.cache.ColumnarCache`, or
+        held in memory
+    dtype: Dict
+        Types requested from :func:`pandas.read_csv`, see :func:`csv_options`
+    typed: bool
+        Whether typed loading was requested
+    """
+    if not typed:
+        df = plain_types(df)
+    return df.astype(dtype, copy=False)
+
+
+def region_source(columns: List[str]) -> List[str]:
+    """Returns the column from which ISO region options extract the region"""
+    for column in REGION_SOURCE_COLUMNS:
+        if column in columns:
+            return [column]
+    return []
+
+
+def tag_regions(
+    df: pd.DataFrame,
+    region_name_option: str,
+    osemosys_param: str,
+    typed: bool = False,
+    missing: Optional[Set[str]] = None,
+) -> pd.DataFrame:
+    """Fills the REGION column of ``df`` following ``region_name_option``
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Parsed OSeMOSYS parameter
+    region_name_option: str
+        Description of how the region is encoded in technology/fuel names and how it can be extracted
+    osemosys_param: str
+        Name of CSV file
+    typed: bool, default=False
+        Store a region given by name as a categorical
+    missing: Set[str], default=None
+        Collects the names without a country instead of reporting them
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
 
     """
     Returns list of countries to REGION column based on option defined by the user
@@ -143,37 +583,162 @@ def read_file(path: str, osemosys_param: str, region_name_option: str) -> pd.Dat
     intended name of the region
     """
     if "iso" in region_name_option:
-        if "FUEL" in df.columns:
-            df["REGION"] = iso_to_country(
-                region_name_option, df["FUEL"], osemosys_param
-            )
-        elif "TECHNOLOGY" in df.columns:
-            df["REGION"] = iso_to_country(
-                region_name_option, df["TECHNOLOGY"], osemosys_param
-            )
-        elif "EMISSION" in df.columns:
-            df["REGION"] = iso_to_country(
-                region_name_option, df["EMISSION"], osemosys_param
+        for column in region_source(df.columns):
+            df["REGION"] = region_names(
+                region_name_option, df[column], osemosys_param, missing
             )
     elif region_name_option == "from_csv":
         df["REGION"] = df["REGION"]
+    elif typed:
+        df["REGION"] = pd.Categorical.from_codes(
+            np.zeros(len(df), dtype=np.int8), categories=[region_name_option]
+        )
     else:
         df["REGION"] = region_name_option
 
     return df
 
 
-def filter_regex(df: pd.DataFrame, patterns: List[str], column: str) -> pd.DataFrame:
+# Backreferences refer to groups by number or name, which changes once several
+# patterns are joined into a single regular expression
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_patterns(patterns: Tuple[str, ...]) -> Callable[[str], bool]:
+    """Returns a function which tests whether a string matches any of ``patterns``
+
+    As for :meth:`pandas.Series.str.match`, the patterns are anchored at the
+    start of the string. Where possible the patterns are joined into one
+    alternation so each string is scanned by a single regular expression.
+
+    Parameters
+    ----------
+    patterns: Tuple[str, ...]
+        Regular expression patterns
+
+    Returns
+    -------
+    Callable[[str], bool]
+    """
+    if not patterns:
+        return lambda value: False
+
+    if len(patterns) > 1 and not any(_BACKREFERENCE.search(p) for p in patterns):
+        try:
+            union = re.compile("|".join("(?:" + p + ")" for p in patterns))
+        except re.error:
+            pass
+        else:
+            return lambda value: union.match(value) is not None
+
+    compiled = [re.compile(p) for p in patterns]
+    return lambda value: any(regex.match(value) for regex in compiled)
+
+
+def factorize_labels(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Splits a column of set elements into integer codes and unique labels
+
+    Categorical columns already hold this representation. Missing values are
+    given the code -1.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def match_labels(
+    codes: np.ndarray, uniques: pd.Index, patterns: List[str]
+) -> np.ndarray:
+    """Returns a row mask of the labels which match any of ``patterns``
+
+    The patterns are evaluated once per unique label and the result is
+    broadcast to the rows through ``codes``. Missing and non-string values
+    never match.
+    """
+    matches = compile_patterns(tuple(patterns))
+    unique_mask = np.fromiter(
+        (isinstance(label, str) and matches(label) for label in uniques),
+        dtype=bool,
+        count=len(uniques),
+    )
+    # The extra trailing ``False`` is picked up by the code -1 of missing values
+    return np.append(unique_mask, False)[codes]
+
+
+def match_patterns(values: pd.Series, patterns: List[str]) -> np.ndarray:
+    """Returns a boolean mask of the ``values`` which match any of ``patterns``
+
+    The cost of the regular expressions depends on the number of distinct
+    values, not on the number of rows.
+    """
+    codes, uniques = factorize_labels(values)
+    return match_labels(codes, uniques, patterns)
+
+
+def filter_regex(
+    df: pd.DataFrame, patterns: List[str], column: str, keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Generic filtering of rows based on columns that match a list of patterns
 
     This function returns the rows where the values in a ``column`` match the
     list of regular expression ``patterns``
+
+    All patterns are evaluated in a single pass and a row which matches several
+    patterns is returned once. Set ``keep_duplicates`` to return a row once for
+    every pattern it matches, grouped by pattern, as earlier versions did.
+    """
+    with profiling.phase("filter", rows_in=len(df), patterns=len(patterns)) as measures:
+        if keep_duplicates:
+            codes, uniques = factorize_labels(df[column])
+            rows = [np.flatnonzero(match_labels(codes, uniques, [p])) for p in patterns]
+            df = df.iloc[np.concatenate(rows) if rows else []]
+        else:
+            df = df[match_patterns(df[column], patterns)]
+        measures["rows_out"] = len(df)
+    return df
+
+
+def sum_by_region_year(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the non-zero totals of VALUE by REGION and YEAR
+
+    The result uses plain types whatever the types of ``df``, so typed and
+    untyped loading give identical aggregates.
     """
-    masks = [df[column].str.match(p) for p in patterns]
-    return pd.concat([df[mask] for mask in masks])
+    with profiling.phase("aggregate", rows_in=len(df)) as measures:
+        df = df.groupby(by=["REGION", "YEAR"], as_index=False, observed=True)[
+            "VALUE"
+        ].sum()
+        df = tidy_totals(df)
+        measures["rows_out"] = len(df)
+    return df
+
+
+def tidy_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the non-zero rows of totals by REGION and YEAR in plain types"""
+    df = df.astype({"REGION": object, "YEAR": "int64", "VALUE": "float64"})
+    # Categorical groups follow the order of the categories, not of the names
+    df = df.sort_values(["REGION", "YEAR"], ignore_index=True)
+    return df[df.VALUE != 0]
+
 
+def plain_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns ``df`` with categorical columns as strings and 64-bit numbers"""
+    types = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            types[column] = object
+        elif pd.api.types.is_integer_dtype(dtype):
+            types[column] = "int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            types[column] = "float64"
+    return df.astype(types)
 
-def filter_fuels(df: pd.DataFrame, fuels: List[str]) -> pd.DataFrame:
+
+def filter_fuels(
+    df: pd.DataFrame, fuels: List[str], keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Returns rows which match list of regex patterns in ``technologies``
 
     Parameters
@@ -182,11 +747,15 @@ def filter_fuels(df: pd.DataFrame, fuels: List[str]) -> pd.DataFrame:
         The input data
     fuels: List[str]
         List of regex patterns
+    keep_duplicates: bool, default=False
+        Return rows once for every pattern they match
     """
-    return filter_regex(df, fuels, "FUEL")
+    return filter_regex(df, fuels, "FUEL", keep_duplicates)
 
 
-def filter_technologies(df: pd.DataFrame, technologies: List[str]) -> pd.DataFrame:
+def filter_technologies(
+    df: pd.DataFrame, technologies: List[str], keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Returns rows which match list of regex patterns in ``technologies``
 
     Parameters
@@ -195,23 +764,27 @@ def filter_technologies(df: pd.DataFrame, technologies: List[str]) -> pd.DataFra
         The input data
     technologies: List[str]
         List of regex patterns
+    keep_duplicates: bool, default=False
+        Return rows once for every pattern they match
     """
-    return filter_regex(df, technologies, "TECHNOLOGY")
+    return filter_regex(df, technologies, "TECHNOLOGY", keep_duplicates)
 
 
 def filter_technology_fuel(
-    df: pd.DataFrame, technologies: List, fuels: List
+    df: pd.DataFrame, technologies: List, fuels: List, keep_duplicates: bool = False
 ) -> pd.DataFrame:
     """Return rows which match ``technologies`` and ``fuels``"""
-    df = filter_technologies(df, technologies)
-    df = filter_fuels(df, fuels)
+    df = filter_technologies(df, technologies, keep_duplicates)
+    df = filter_fuels(df, fuels, keep_duplicates)
 
-    df = df.groupby(by=["REGION", "YEAR"], as_index=False)["VALUE"].sum()
-    return df[df.VALUE != 0]
+    return sum_by_region_year(df)
 
 
 def filter_emission_tech(
-    df: pd.DataFrame, emission: List[str], technologies: Optional[List[str]] = None
+    df: pd.DataFrame,
+    emission: List[str],
+    technologies: Optional[List[str]] = None,
+    keep_duplicates: bool = False,
 ) -> pd.DataFrame:
     """Return annual emissions or captured emissions by one or several technologies.
 
@@ -222,23 +795,26 @@ def filter_emission_tech(
         List of regex patterns
     technologies: List[str], default=None
         List of regex patterns
+    keep_duplicates: bool, default=False
+        Count rows once for every pattern they match
 
     Returns
     -------
     pandas.DataFrame
     """
 
-    df = filter_regex(df, emission, "EMISSION")
+    df = filter_regex(df, emission, "EMISSION", keep_duplicates)
 
     if technologies:
-        # Create a list of masks, one for each row that matches the pattern listed in ``tech``
-        df = filter_technologies(df, technologies)
+        # Keep the rows that match any of the patterns listed in ``technologies``
+        df = filter_technologies(df, technologies, keep_duplicates)
 
-    df = df.groupby(by=["REGION", "YEAR"], as_index=False)["VALUE"].sum()
-    return df[df.VALUE != 0]
+    return sum_by_region_year(df)
 
 
-def filter_capacity(df: pd.DataFrame, technologies: List[str]) -> pd.DataFrame:
+def filter_capacity(
+    df: pd.DataFrame, technologies: List[str], keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Return aggregated rows filtered on technology column.
 
     Parameters
@@ -247,45 +823,178 @@ def filter_capacity(df: pd.DataFrame, technologies: List[str]) -> pd.DataFrame:
         The input data
     technologies: List[str]
         List of regex patterns
+    keep_duplicates: bool, default=False
+        Count rows once for every pattern they match
 
     Returns
     -------
     pandas.DataFrame
     """
-    df = filter_technologies(df, technologies)
+    df = filter_technologies(df, technologies, keep_duplicates)
 
-    df = df.groupby(by=["REGION", "YEAR"], as_index=False)["VALUE"].sum()
-    return df[df.VALUE != 0]
+    return sum_by_region_year(df)
 
 
-def filter_final_energy(df: pd.DataFrame, fuels: List) -> pd.DataFrame:
+def filter_final_energy(
+    df: pd.DataFrame, fuels: List, keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Return dataframe that indicate the final energy demand/use per country and year."""
-    df_f = filter_fuels(df, fuels)
+    df_f = filter_fuels(df, fuels, keep_duplicates)
 
-    df = df_f.groupby(by=["REGION", "YEAR"], as_index=False)["VALUE"].sum()
-    return df[df.VALUE != 0]
+    return sum_by_region_year(df_f)
 
 
-def calculate_trade(results: dict, techs: List) -> pd.DataFrame:
+def calculate_trade(
+    results: dict, techs: List, keep_duplicates: bool = False
+) -> pd.DataFrame:
     """Return dataframe with the net exports of a commodity"""
 
-    exports = filter_capacity(results["UseByTechnology"], techs).set_index(
-        ["REGION", "YEAR"]
-    )
-    imports = filter_capacity(results["ProductionByTechnologyAnnual"], techs).set_index(
-        ["REGION", "YEAR"]
+    exports = filter_capacity(results["UseByTechnology"], techs, keep_duplicates)
+    imports = filter_capacity(
+        results["ProductionByTechnologyAnnual"], techs, keep_duplicates
     )
+    return net_trade(exports, imports)
+
+
+def net_trade(exports: pd.DataFrame, imports: pd.DataFrame) -> pd.DataFrame:
+    """Return the difference of aggregated exports and imports by region and year"""
+    exports = exports.set_index(["REGION", "YEAR"])
+    imports = imports.set_index(["REGION", "YEAR"])
     df = exports.subtract(imports, fill_value=0)
 
     return df.reset_index()
 
 
+def combine_chunks(
+    parts: Iterable[pd.DataFrame], aggregated: bool = True
+) -> pd.DataFrame:
+    """Combines the results of a filter applied to the chunks of a parameter
+
+    Parameters
+    ----------
+    parts: Iterable[pandas.DataFrame]
+        Filter results, one per chunk
+    aggregated: bool, default=True
+        Whether the filter returns totals by REGION and YEAR. Partial totals
+        are then summed, otherwise the filtered rows are concatenated
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    if aggregated:
+        # Keeps only the running totals, so memory is bounded by the chunk
+        # size and the number of regions and years
+        total = None
+        for part in parts:
+            if total is None:
+                total = part
+            else:
+                total = sum_by_region_year(pd.concat([total, part]))
+        if total is None:
+            return pd.DataFrame(columns=["REGION", "YEAR", "VALUE"])
+        return total
+    parts = list(parts)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def filter_shared(
+    df: pd.DataFrame,
+    column: str,
+    pattern_lists: List[Tuple[str, ...]],
+    keep_duplicates: bool = False,
+) -> List[pd.DataFrame]:
+    """Returns the totals by REGION and YEAR of the rows matching each pattern list
+
+    Gives the same result as calling :func:`filter_regex` and
+    :func:`sum_by_region_year` once per list of patterns, in a single pass
+    over ``df``. The values are first summed by region, year and label of
+    ``column``. Each pattern list is then evaluated once against the distinct
+    labels, giving a sparse (label x pattern list) membership matrix, and all
+    totals are obtained as the product of the sparse (region-year x label)
+    sums with that matrix.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        The input data
+    column: str
+        Column the patterns are matched against
+    pattern_lists: List[Tuple[str, ...]]
+        Lists of regex patterns, one per result
+    keep_duplicates: bool, default=False
+        Count rows once for every pattern they match
+
+    Returns
+    -------
+    List[pandas.DataFrame]
+        The totals for each list of patterns, in order
+    """
+    from scipy import sparse
+
+    with profiling.phase("aggregate", rows_in=len(df)) as measures:
+        sums = df.groupby(["REGION", "YEAR", column], observed=True, sort=False)[
+            "VALUE"
+        ].sum()
+        measures["rows_out"] = len(sums)
+    if sums.empty:
+        empty = pd.DataFrame(columns=["REGION", "YEAR", "VALUE"])
+        return [tidy_totals(empty) for _ in pattern_lists]
+
+    groups, keys = sums.index.droplevel(column).factorize()
+    labels, uniques = pd.factorize(sums.index.get_level_values(column))
+    uniques = pd.Index(uniques)
+
+    n_patterns = sum(len(patterns) for patterns in pattern_lists)
+    with profiling.phase("filter", rows_in=len(uniques), patterns=n_patterns):
+        # Only the (label, pattern list) pairs which match are stored, the
+        # entries of labels matched by several patterns are summed
+        rows = [np.array([], dtype=np.intp)]
+        columns = [np.array([], dtype=np.intp)]
+        codes = np.arange(len(uniques))
+        for position, patterns in enumerate(pattern_lists):
+            if keep_duplicates:
+                alternatives = [[pattern] for pattern in patterns]
+            else:
+                alternatives = [list(patterns)]
+            for alternative in alternatives:
+                matched = np.flatnonzero(match_labels(codes, uniques, alternative))
+                rows.append(matched)
+                columns.append(np.full(len(matched), position))
+        rows = np.concatenate(rows)
+        membership = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, np.concatenate(columns))),
+            shape=(len(uniques), len(pattern_lists)),
+        )
+
+    with profiling.phase("aggregate", rows_in=len(sums)) as measures:
+        matrix = sparse.csr_matrix(
+            (sums.to_numpy(dtype="float64"), (groups, labels)),
+            shape=(len(keys), len(uniques)),
+        )
+        totals = (matrix @ membership).toarray()
+
+        regions = keys.get_level_values(0)
+        years = keys.get_level_values(1)
+        results = [
+            tidy_totals(
+                pd.DataFrame({"REGION": regions, "YEAR": years, "VALUE": totals[:, i]})
+            )
+            for i in range(len(pattern_lists))
+        ]
+        measures["rows_out"] = sum(len(result) for result in results)
+    return results
+
+
 def extract_results(df: pd.DataFrame, technologies: List) -> pd.DataFrame:
     """Return rows which match ``technologies``"""
 
-    mask = df.TECHNOLOGY.isin(technologies)
-
-    return df[mask]
+    with profiling.phase(
+        "filter", rows_in=len(df), patterns=len(technologies)
+    ) as measures:
+        df = df[df.TECHNOLOGY.isin(technologies)]
+        measures["rows_out"] = len(df)
+    return df
 
 
 def load_config(filepath: str) -> Dict:
@@ -298,10 +1007,16 @@ def load_config(filepath: str) -> Dict:
     """
     with open(filepath, "r") as configfile:
         config = load(configfile, Loader=SafeLoader)
+
+    # A file of unit conversions is given relative to the config file
+    units = config.get("unit_conversions") if isinstance(config, dict) else None
+    if isinstance(units, str):
+        folder = os.path.dirname(os.path.abspath(filepath))
+        config["unit_conversions"] = os.path.join(folder, units)
     return config
 
 
-def make_plots(df: pyam.IamDataFrame, model: str, scenario: str, regions: List[str]):
+def make_plots(df: "pyam.IamDataFrame", model: str, scenario: str, regions: List[str]):
     """Creates standard plots
 
     Arguments
@@ -310,6 +1025,9 @@ def make_plots(df: pyam.IamDataFrame, model: str, scenario: str, regions: List[s
     scenario: str
     """
 
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
     # df = all_data #for testing
     # model = config['model'] #for testing
     # scenario = config['scenario'] #for testing
@@ -392,167 +1110,883 @@ def make_plots(df: pyam.IamDataFrame, model: str, scenario: str, regions: List[s
         plt.clf()
 
 
-def main(config: Dict, inputs_path: str, results_path: str) -> pyam.IamDataFrame:
-    """Create the IAM data frame from results
+# Filters which may be named by the ``kernel`` of an entry plan
+KERNELS = {
+    "filter_capacity": filter_capacity,
+    "filter_technologies": filter_technologies,
+    "filter_technology_fuel": filter_technology_fuel,
+    "filter_emission_tech": filter_emission_tech,
+    "filter_final_energy": filter_final_energy,
+    "extract_results": extract_results,
+}
 
-    Loops over each entry in the configuration file, extracts the data from
-    the relevant result file and puts this into the IAMC data format
+
+# Filters which a query engine can run, with the column matched by each keyword
+ENGINE_KERNELS = {
+    "filter_capacity": {"technologies": "TECHNOLOGY"},
+    "filter_final_energy": {"fuels": "FUEL"},
+    "filter_technology_fuel": {"technologies": "TECHNOLOGY", "fuels": "FUEL"},
+    "filter_emission_tech": {"emission": "EMISSION", "technologies": "TECHNOLOGY"},
+}
+
+
+def engine_filters(
+    engine: DuckDBEngine, kernel: str, arguments: Dict
+) -> Optional[List[Tuple[str, Tuple[str, ...]]]]:
+    """Returns the column and patterns of each filter the engine runs for a kernel
+
+    Returns ``None`` if the engine cannot run the kernel or its patterns.
+    """
+    columns = ENGINE_KERNELS.get(kernel)
+    if columns is None:
+        return None
+    filters = [
+        (column, tuple(arguments[keyword]))
+        for keyword, column in columns.items()
+        # The technologies of emission filters are optional
+        if arguments.get(keyword)
+    ]
+    if not all(engine.supports(patterns) for _, patterns in filters):
+        return None
+    return filters
+
+
+def engine_totals(
+    engine: DuckDBEngine,
+    path: Union[str, ParameterFrames],
+    osemosys_param: str,
+    region_name_option: str,
+    kernel: functools.partial,
+    disk_cache: Optional[ColumnarCache] = None,
+    years: Optional[Sequence[int]] = None,
+    regions: Optional[Sequence[str]] = None,
+) -> Optional[pd.DataFrame]:
+    """Applies ``kernel`` to a parameter with a query engine
+
+    The engine sums the matching rows of ``years`` by YEAR and the column the
+    region is taken from, the region is then tagged on these totals as
+    :func:`read_file` does on the rows, and ``regions`` are selected.
+    Returns ``None`` if the engine cannot
+    run the filter, or the parameter is held in memory, which is then
+    filtered with pandas.
+    """
+    filters = engine_filters(engine, kernel.func.__name__, kernel.keywords)
+    if filters is None or isinstance(path, ParameterFrames):
+        return None
+
+    filename = parameter_file(path, osemosys_param)
+    header = sources.read_csv(filename, nrows=0).columns
+    if "YEAR" not in header or any(column not in header for column, _ in filters):
+        return None
+    if "iso" in region_name_option:
+        group = region_source(header)
+    elif region_name_option == "from_csv":
+        group = ["REGION"]
+    else:
+        group = []
+    if disk_cache is not None:
+        filename = disk_cache.build(filename)
+    elif not engine.reads(filename):
+        return None
+
+    n_patterns = sum(len(patterns) for _, patterns in filters)
+    with profiling.phase("filter", patterns=n_patterns) as measures:
+        df = engine.totals(
+            filename,
+            filters,
+            group,
+            kernel.keywords.get("keep_duplicates", False),
+            years,
+        )
+        measures["rows_out"] = len(df)
+    df = tag_regions(df, region_name_option, osemosys_param)
+    df = select_regions(df, regions)
+    return sum_by_region_year(df)
+
+
+# Filters which :func:`filter_shared` computes together for all entries which
+# apply them to the same parameter, with the column and keyword of the patterns
+SHARED_KERNELS = {
+    "filter_capacity": ("TECHNOLOGY", "technologies"),
+    "filter_final_energy": ("FUEL", "fuels"),
+}
+
+
+def shared_key(
+    path: str, osemosys_param: str, kernel: str, arguments: Dict
+) -> Optional[Tuple[Tuple, Tuple[str, ...]]]:
+    """Returns the group and patterns of a filter :func:`filter_shared` supports
+
+    Filters in the same group read the same parameter and match the same
+    column, so their results can be computed together.
+    """
+    if kernel not in SHARED_KERNELS:
+        return None
+    column, keyword = SHARED_KERNELS[kernel]
+    keep_duplicates = arguments.get("keep_duplicates", False)
+    group = (path, osemosys_param, column, keep_duplicates)
+    return group, tuple(arguments[keyword])
+
+
+def shared_filters(
+    plan: Plan,
+    inputs_path: str,
+    results_path: str,
+    positions: Optional[Iterable[int]] = None,
+) -> Dict[Tuple, List[Tuple[str, ...]]]:
+    """Returns the pattern lists of each group of filters used by several entries
+
+    See :func:`shared_key` for the groups.
+    """
+    uses = {}  # type: Dict[Tuple, int]
+    patterns = {}  # type: Dict[Tuple, List[Tuple[str, ...]]]
+    for _, (path, param, _), entry in parameter_uses(
+        plan, inputs_path, results_path, positions
+    ):
+        key = shared_key(path, param, entry.kernel, dict(entry.arguments))
+        if key is None:
+            continue
+        group, pattern_list = key
+        uses[group] = uses.get(group, 0) + 1
+        patterns.setdefault(group, [])
+        if pattern_list not in patterns[group]:
+            patterns[group].append(pattern_list)
+    return {group: patterns[group] for group in uses if uses[group] > 1}
+
+
+def entry_path(entry: EntryPlan, inputs_path: str, results_path: str) -> str:
+    """Returns the folder an entry reads its parameters from"""
+    return inputs_path if entry.section == "inputs" else results_path
+
+
+def entry_files(entry: EntryPlan, inputs_path: str, results_path: str) -> List[str]:
+    """Returns the files an entry of a plan reads"""
+    path = entry_path(entry, inputs_path, results_path)
+    filenames = [parameter_file(path, param) for param in entry.parameters]
+    if entry.expand_years:
+        filenames.append(sources.locate(inputs_path, "YEAR.csv"))
+    return filenames
+
+
+def entry_description(plan: Plan, entry: EntryPlan) -> str:
+    """Returns a text which identifies how an entry of a plan computes its data
+
+    The position, variable name and unit of the entry are left out as they do
+    not change its data.
+    """
+    entry = dataclasses.replace(entry, position=0, variable="", unit="")
+    return repr((plan.region, plan.float32, plan.years, plan.regions, entry))
+
+
+def parameter_uses(
+    plan: Plan,
+    inputs_path: str,
+    results_path: str,
+    positions: Optional[Iterable[int]] = None,
+):
+    """Yields the position, cache key and entry of each parameter a plan reads
+
+    The keys match those used by :class:`~osemosys2iamc.cache.ParameterCache`.
+    Only the entries at ``positions`` are considered, if given.
+    """
+    if positions is not None:
+        positions = set(positions)
+    for entry in plan.entries:
+        if positions is not None and entry.position not in positions:
+            continue
+        path = entry_path(entry, inputs_path, results_path)
+        for param in entry.parameters:
+            yield entry.position, (path, param, plan.region), entry
+
+
+def parameter_last_use(
+    plan: Plan,
+    inputs_path: str,
+    results_path: str,
+    positions: Optional[Iterable[int]] = None,
+) -> Dict:
+    """Returns the position of the last entry which reads each parameter
 
     Arguments
     ---------
-    config : dict
-        The configuration dictionary
+    plan : Plan
+        The compiled configuration
     inputs_path: str
         Path to a folder of CSV files (OSeMOSYS inputs)
     results_path: str
         Path to a folder of CSV files (OSeMOSYS results)
+    positions: Iterable[int], default=None
+        Only consider the entries at these positions
+
+    Returns
+    -------
+    dict
     """
-    blob = []
-    filename = os.path.join(inputs_path, "YEAR.csv")
-    years = pd.read_csv(filename)
+    last_use = {}
+    for position, key, _ in parameter_uses(plan, inputs_path, results_path, positions):
+        last_use[key] = position
+    return last_use
 
-    try:
-        for input in config["inputs"]:
-
-            inputs = read_file(inputs_path, input["osemosys_param"], config["region"])
-
-            unit = input["unit"]
-
-            if "variable_cost" in input.keys():
-                technologies = input["variable_cost"]
-                data = filter_capacity(inputs, technologies)
-            elif "reg_tech_param" in input.keys():
-                technologies = input["reg_tech_param"]
-                data = filter_technologies(inputs, technologies)
-                list_years = years["VALUE"]
-                data["YEAR"] = [list_years] * len(data)
-                data = data.explode("YEAR").reset_index(drop=True)
-                data = data.drop(["TECHNOLOGY"], axis=1)
-
-            if not data.empty:
-                data = data.rename(
-                    columns={"REGION": "region", "YEAR": "year", "VALUE": "value"}
-                )
-                iamc = pyam.IamDataFrame(
-                    data,
-                    model=config["model"],
-                    scenario=config["scenario"],
-                    variable=input["iamc_variable"],
-                    unit=unit,
-                )
-                blob.append(iamc)
-    except KeyError:
-        pass
 
-    try:
-        for result in config["results"]:
+def parameter_columns(plan: Plan, inputs_path: str, results_path: str) -> Dict:
+    """Returns the set columns needed from each parameter by all entries
 
-            if isinstance(result["osemosys_param"], str):
-                results = read_file(
-                    results_path, result["osemosys_param"], config["region"]
-                )
+    ``None`` means that all columns are needed.
 
-                try:
-                    technologies = result["technology"]
-                except KeyError:
-                    pass
-                unit = result["unit"]
-                if "fuel" in result.keys():
-                    fuels = result["fuel"]
-                    data = filter_technology_fuel(results, technologies, fuels)
-                elif "emissions" in result.keys():
-                    if "tech_emi" in result.keys():
-                        emission = result["emissions"]
-                        technologies = result["tech_emi"]
-                        data = filter_emission_tech(results, emission, technologies)
-                    else:
-                        emission = result["emissions"]
-                        data = filter_emission_tech(results, emission)
-                elif "capacity" in result.keys():
-                    technologies = result["capacity"]
-                    data = filter_capacity(results, technologies)
-                elif "primary_technology" in result.keys():
-                    technologies = result["primary_technology"]
-                    data = filter_capacity(results, technologies)
-                elif "excluded_prod_tech" in result.keys():
-                    technologies = result["excluded_prod_tech"]
-                    data = filter_capacity(results, technologies)
-                elif "el_prod_technology" in result.keys():
-                    technologies = result["el_prod_technology"]
-                    data = filter_capacity(results, technologies)
-                elif "demand" in result.keys():
-                    demands = result["demand"]
-                    data = filter_final_energy(results, demands)
-                else:
-                    data = extract_results(results, technologies)
+    Arguments
+    ---------
+    plan : Plan
+        The compiled configuration
+    inputs_path: str
+        Path to a folder of CSV files (OSeMOSYS inputs)
+    results_path: str
+        Path to a folder of CSV files (OSeMOSYS results)
+
+    Returns
+    -------
+    dict
+    """
+    columns = {}
+    for _, key, entry in parameter_uses(plan, inputs_path, results_path):
+        needed = None if entry.columns is None else list(entry.columns)
+        if key in columns and (columns[key] is None or needed is None):
+            columns[key] = None
+        elif key in columns:
+            columns[key] = columns[key] + [c for c in needed if c not in columns[key]]
+        else:
+            columns[key] = needed
+    return columns
 
-            elif isinstance(result["osemosys_param"], list):
-                results = {}
-                unit = result["unit"]
-                for p in result["osemosys_param"]:
-                    results[p] = read_file(results_path, p, config["region"])
 
-                if "trade_tech" in result.keys():
-                    technologies = result["trade_tech"]
-                    data = calculate_trade(results, technologies)
+def parameter_drop_zeros(plan: Plan, inputs_path: str, results_path: str) -> Set:
+    """Returns the parameters whose rows with a zero value no entry needs
 
-                else:
-                    name = result["iamc_variable"]
-                    raise ValueError(f"No data found for {name}")
+    Filters which sum rows by region and year drop zero totals, so zero rows
+    do not change their result and are dropped while the parameter is read.
+    Entries which pass rows through, such as ``reg_tech_param``, keep them.
 
-            else:
-                name = result["iamc_variable"]
-                msg = f"Error in configuration file for entry {name}. The `osemosys_param` key must be a string or a list"
-                raise ValueError(msg)
+    Arguments
+    ---------
+    plan : Plan
+        The compiled configuration
+    inputs_path: str
+        Path to a folder of CSV files (OSeMOSYS inputs)
+    results_path: str
+        Path to a folder of CSV files (OSeMOSYS results)
+
+    Returns
+    -------
+    set
+        The cache keys of the parameters
+    """
+    aggregated = {}  # type: Dict[Tuple, bool]
+    for _, key, entry in parameter_uses(plan, inputs_path, results_path):
+        aggregated[key] = aggregated.get(key, True) and entry.aggregated
+    return {key for key, value in aggregated.items() if value}
+
+
+def schedule_entries(plan: Plan, n_jobs: int) -> List[List[int]]:
+    """Splits the entries of a plan into at most ``n_jobs`` batches of positions
+
+    Entries which read a common OSeMOSYS parameter are placed in the same
+    batch, so that each parameter is parsed by a single worker. Groups of
+    entries are handed out largest first to the batch with the fewest entries.
+
+    Arguments
+    ---------
+    plan : Plan
+        The compiled configuration
+    n_jobs: int
+        Maximum number of batches
+
+    Returns
+    -------
+    List[List[int]]
+        Sorted positions of the entries in each non-empty batch
+    """
+    groups = {}  # type: Dict[int, List[int]]
+    names = {}  # type: Dict[int, Set[str]]
+    owner = {}  # type: Dict[str, int]
+    for entry in plan.entries:
+        position = entry.position
+        members = [position]
+        params = set(entry.parameters)
+        for group in {owner[param] for param in params if param in owner}:
+            members.extend(groups.pop(group))
+            params |= names.pop(group)
+        groups[position] = members
+        names[position] = params
+        for param in params:
+            owner[param] = position
+
+    batches = [[] for _ in range(max(1, n_jobs))]  # type: List[List[int]]
+    for members in sorted(groups.values(), key=len, reverse=True):
+        min(batches, key=len).extend(members)
+    return [sorted(batch) for batch in batches if batch]
+
+
+def model_years(inputs_path: Union[str, ParameterFrames]) -> np.ndarray:
+    """Returns the model years listed in ``YEAR.csv``"""
+    if isinstance(inputs_path, ParameterFrames):
+        return inputs_path.read("YEAR")["VALUE"].to_numpy(dtype="int64")
+    filename = sources.locate(inputs_path, "YEAR.csv")
+    return sources.read_csv(filename, usecols=["VALUE"])["VALUE"].to_numpy(
+        dtype="int64"
+    )
+
+
+def expand_years(data: pd.DataFrame, years: np.ndarray) -> pd.DataFrame:
+    """Repeats each row of ``data`` for every one of ``years``
+
+    The TECHNOLOGY column is dropped and a YEAR column is set, with the
+    years of each row in order. Rows and years are combined by repeating and
+    tiling positions, without creating a Python object per row.
+    """
+    data = data.drop(columns=["TECHNOLOGY"])
+    rows = np.repeat(np.arange(len(data)), len(years))
+    data = data.iloc[rows].reset_index(drop=True)
+    data["YEAR"] = np.tile(years, len(data) // max(len(years), 1))
+    return data
+
+
+def entry_data(
+    entry: EntryPlan,
+    compute: Callable[..., pd.DataFrame],
+    path: str,
+    years: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """Extracts the data of one entry of a plan
 
-            if "transform" in result.keys():
-                if result["transform"] == "abs":
-                    data["VALUE"] = data["VALUE"].abs()
+    Arguments
+    ---------
+    entry : EntryPlan
+        The compiled config entry
+    compute: Callable
+        Called as ``compute(path, osemosys_param, kernel, aggregated)`` to apply
+        a filter to a parameter
+    path: str
+        Path to the folder of CSV files the entry reads
+    years: numpy.ndarray, default=None
+        The model years, needed by entries which expand their rows to every
+        year
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    kernel = functools.partial(KERNELS[entry.kernel], **dict(entry.arguments))
+
+    if entry.net_trade:
+        exports, imports = [
+            compute(path, param, kernel, entry.aggregated) for param in entry.parameters
+        ]
+        data = net_trade(exports, imports)
+    else:
+        data = compute(path, entry.parameters[0], kernel, entry.aggregated)
+
+    if entry.expand_years:
+        if entry.years is not None:
+            years = years[np.isin(years, entry.years)]
+        data = expand_years(data, years)
+
+    if entry.transform == "abs":
+        data["VALUE"] = data["VALUE"].abs()
+
+    return data
+
+
+def convert_entries(
+    plan: Plan,
+    inputs_path: str,
+    results_path: str,
+    positions: Optional[Iterable[int]] = None,
+    max_cache_bytes: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    rebuild_cache: bool = False,
+    years: Optional[np.ndarray] = None,
+    engine: str = "pandas",
+    parser: str = "c",
+    prefetch: int = 0,
+) -> List[Tuple[int, pd.DataFrame]]:
+    """Extracts the data of the entries of a plan at ``positions``
+
+    This is the unit of work of :func:`main`, run either in process or by the
+    workers of a process pool.
+
+    Arguments
+    ---------
+    plan : Plan
+        The compiled configuration
+    inputs_path: str
+        Path to a folder of CSV files (OSeMOSYS inputs)
+    results_path: str
+        Path to a folder of CSV files (OSeMOSYS results)
+    positions: Iterable[int], default=None
+        Positions of the entries to extract, all entries by default
+    years: numpy.ndarray, default=None
+        The model years, read from ``YEAR.csv`` if an entry needs them
+
+    See :func:`main` for the remaining arguments.
+
+    Returns
+    -------
+    List[Tuple[int, pandas.DataFrame]]
+        The position and data of each entry, in config order
+    """
+    if positions is not None:
+        positions = set(positions)
+    if years is None and any(
+        entry.expand_years
+        for entry in plan.entries
+        if positions is None or entry.position in positions
+    ):
+        years = model_years(inputs_path)
+    if years is not None and plan.years is not None:
+        years = years[np.isin(years, plan.years)]
+    region = plan.region
+    columns = parameter_columns(plan, inputs_path, results_path)
+    drop_zeros = parameter_drop_zeros(plan, inputs_path, results_path)
+    disk_cache = None
+    if cache_dir is not None:
+        disk_cache = ColumnarCache(cache_dir, OSEMOSYS_DTYPES, rebuild=rebuild_cache)
+
+    query_engine = DuckDBEngine() if engine == "duckdb" else None
+
+    def load(path: str, osemosys_param: str, region_name_option: str):
+        key = (path, osemosys_param, region_name_option)
+        return read_file(
+            path,
+            osemosys_param,
+            region_name_option,
+            columns=columns.get(key),
+            typed=True,
+            float32=plan.float32,
+            disk_cache=disk_cache,
+            parser=parser,
+            years=plan.years,
+            regions=plan.regions,
+            drop_zeros=key in drop_zeros,
+        )
+
+    prefetcher = None
+    if prefetch and chunksize is None:
+        # The entry which reads each parameter first, skipping the entries
+        # run by the query engine as they do not read into pandas
+        first_use = {}  # type: Dict[Tuple, str]
+        for _, key, entry in parameter_uses(plan, inputs_path, results_path, positions):
+            if (
+                query_engine is not None
+                and not isinstance(key[0], ParameterFrames)
+                and engine_filters(query_engine, entry.kernel, dict(entry.arguments))
+                is not None
+            ):
+                continue
+            first_use.setdefault(key, entry.variable)
+
+        def load_ahead(path: str, osemosys_param: str, region_name_option: str):
+            key = (path, osemosys_param, region_name_option)
+            with profiling.entry(first_use.get(key, "")):
+                return load(*key)
+
+        prefetcher = Prefetcher(load_ahead, list(first_use), prefetch)
+
+    cache = ParameterCache(
+        prefetcher or load,
+        last_use=parameter_last_use(plan, inputs_path, results_path, positions),
+        max_bytes=max_cache_bytes,
+    )
+
+    def chunks(path: str, osemosys_param: str) -> Iterator[pd.DataFrame]:
+        key = (path, osemosys_param, region)
+        return read_file_chunks(
+            path,
+            osemosys_param,
+            region,
+            chunksize,
+            columns=columns.get(key),
+            typed=True,
+            float32=plan.float32,
+            disk_cache=disk_cache,
+            years=plan.years,
+            regions=plan.regions,
+            drop_zeros=key in drop_zeros,
+        )
+
+    shared = shared_filters(plan, inputs_path, results_path, positions)
+    shared_totals = {}  # type: Dict[Tuple, Dict[Tuple[str, ...], pd.DataFrame]]
+
+    def compute_shared(group: Tuple) -> Dict[Tuple[str, ...], pd.DataFrame]:
+        """Computes the totals of all filters of a group in one pass"""
+        path, osemosys_param, column, keep_duplicates = group
+        pattern_lists = shared[group]
+        if chunksize is None:
+            df = cache.get(path, osemosys_param, region)
+            totals = filter_shared(df, column, pattern_lists, keep_duplicates)
+        else:
+            totals = None
+            for chunk in chunks(path, osemosys_param):
+                parts = filter_shared(chunk, column, pattern_lists, keep_duplicates)
+                if totals is None:
+                    totals = parts
                 else:
-                    pass
+                    totals = [combine_chunks(pair) for pair in zip(totals, parts)]
+            if totals is None:
+                totals = [combine_chunks([]) for _ in pattern_lists]
+        return dict(zip(pattern_lists, totals))
+
+    def compute(
+        path: str,
+        osemosys_param: str,
+        kernel: Callable[[pd.DataFrame], pd.DataFrame],
+        aggregated: bool = True,
+    ) -> pd.DataFrame:
+        """Applies ``kernel`` to a parameter, chunk by chunk when streaming"""
+        if query_engine is not None and isinstance(kernel, functools.partial):
+            data = engine_totals(
+                query_engine,
+                path,
+                osemosys_param,
+                region,
+                kernel,
+                disk_cache,
+                plan.years,
+                plan.regions,
+            )
+            if data is not None:
+                return data
 
-            if not data.empty:
-                data = data.rename(
-                    columns={"REGION": "region", "YEAR": "year", "VALUE": "value"}
-                )
+        key = None
+        if isinstance(kernel, functools.partial):
+            key = shared_key(
+                path, osemosys_param, kernel.func.__name__, kernel.keywords
+            )
+        if key is not None and key[0] in shared:
+            group, patterns = key
+            if group not in shared_totals:
+                shared_totals[group] = compute_shared(group)
+            return shared_totals[group][patterns].copy()
 
-                iamc = pyam.IamDataFrame(
-                    data,
-                    model=config["model"],
-                    scenario=config["scenario"],
-                    variable=result["iamc_variable"],
-                    unit=unit,
-                )
-                blob.append(iamc)
-    except KeyError:
-        pass
+        if chunksize is None:
+            return kernel(cache.get(path, osemosys_param, region))
+        return combine_chunks(map(kernel, chunks(path, osemosys_param)), aggregated)
+
+    converted = []
+    try:
+        for entry in plan.entries:
+            if positions is not None and entry.position not in positions:
+                continue
+            path = entry_path(entry, inputs_path, results_path)
+            with profiling.entry(entry.variable):
+                data = entry_data(entry, compute, path, years)
+            converted.append((entry.position, data))
+            cache.release(entry.position)
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+        if query_engine is not None:
+            query_engine.close()
+    cache.clear()
+    return converted
+
+
+def main(
+    config: Union[Dict, Plan],
+    inputs_path: Union[str, ParameterFrames],
+    results_path: Union[str, ParameterFrames],
+    max_cache_bytes: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    rebuild_cache: bool = False,
+    n_jobs: Optional[int] = None,
+    result_store: Optional[str] = None,
+    hash_contents: bool = False,
+    engine: str = "pandas",
+    parser: str = "c",
+    prefetch: int = 0,
+) -> "pyam.IamDataFrame":
+    """Create the IAM data frame from results
+
+    Loops over each entry in the configuration file, extracts the data from
+    the relevant result file and puts this into the IAMC data format
 
-    if len(blob) > 0:
-        all_data = pyam.concat(blob)
+    The configuration is compiled with
+    :func:`~osemosys2iamc.plan.compile_config` first, so errors in it are
+    reported before any file is read. Pass a compiled plan to reuse it over
+    many runs.
+
+    The inputs and results may be folders or zip or tar archives, which are
+    read without extracting them, and their CSV files may be compressed, see
+    :mod:`osemosys2iamc.sources`. Parameters held in memory are converted
+    with :func:`convert`.
+
+    Each OSeMOSYS parameter is read once per run and shared between all
+    entries which use it. A parameter is dropped from memory after the last
+    entry which needs it has been processed. Entries which filter the same
+    parameter by technology or fuel are computed together by
+    :func:`filter_shared`. Parameters are parsed with
+    narrow types and only the columns the config entries use; set the
+    top-level config key ``float32: true`` to also store values as ``float32``.
+
+    With ``chunksize``, parameters are instead streamed in chunks of that many
+    rows and each entry keeps only running totals by region and year, so
+    files larger than memory can be converted.
+
+    With ``cache_dir``, typed Parquet copies of the CSV files are kept in that
+    folder and read in place of the CSV files on later runs.
+
+    With ``result_store``, the data of each entry is kept in that folder and
+    reused by later runs for as long as the entry and the files it reads are
+    unchanged. The number of reused entries is logged at the ``INFO`` level.
+
+    With ``engine="duckdb"``, filters which sum rows by region and year run
+    as queries of an embedded DuckDB database over the files, see
+    :mod:`osemosys2iamc.engines`. Filters DuckDB cannot evaluate are applied
+    with pandas, and the output is the same.
+
+    With ``parser="pyarrow"``, the CSV files are parsed by the multi-threaded
+    Arrow parser. Its floats may differ from those of the default parser in
+    the last digit. With ``prefetch``, that many threads load the parameters
+    ahead of the entries which use them, overlapping the reads with the
+    filters. Neither applies when streaming in chunks.
+
+    With ``n_jobs``, the entries are converted by a pool of that many
+    processes. Entries which read a common parameter run on the same worker
+    and the results are gathered in config order, so the output is the same
+    as that of a serial run.
 
-        all_data.convert_unit("PJ/yr", to="EJ/yr", inplace=True)
-        all_data.convert_unit("ktCO2/yr", to="Mt CO2/yr", factor=0.001, inplace=True)
-        all_data.convert_unit(
-            "MEUR_2015/PJ", to="EUR_2020/GJ", factor=1.05, inplace=True
+    Arguments
+    ---------
+    config : dict or Plan
+        The configuration dictionary, or the plan compiled from it
+    inputs_path: str or ParameterFrames
+        Path to a folder or archive of CSV files (OSeMOSYS inputs), or the
+        inputs held in memory
+    results_path: str or ParameterFrames
+        Path to a folder or archive of CSV files (OSeMOSYS results), or the
+        results held in memory
+    max_cache_bytes: int, default=None
+        Optional memory budget for the parsed parameters held between entries,
+        per worker
+    chunksize: int, default=None
+        Stream parameters in chunks of this many rows instead of caching them
+    cache_dir: str, default=None
+        Folder of the columnar copies of the CSV files, requires ``pyarrow``
+    rebuild_cache: bool, default=False
+        Rewrite the columnar copies of the CSV files read in this run
+    n_jobs: int, default=None
+        Number of worker processes, ``-1`` for one per CPU. By default the
+        entries are converted in this process
+    result_store: str, default=None
+        Folder of the results of earlier runs, see above
+    hash_contents: bool, default=False
+        Compare the contents of the CSV files, not only their size and
+        modification time, to find the results which can be reused
+    engine: str, default="pandas"
+        One of :data:`~osemosys2iamc.engines.ENGINES`
+    parser: str, default="c"
+        One of :data:`PARSERS`, ``pyarrow`` requires ``pyarrow``
+    prefetch: int, default=0
+        Number of threads loading parameters ahead of their use, per worker
+    """
+    plan = config if isinstance(config, Plan) else compile_config(config)
+    if engine not in ENGINES:
+        raise ValueError(
+            f"Unknown engine {engine}. Use one of the engines {', '.join(ENGINES)}"
         )
-        all_data.convert_unit(
-            "MEUR_2015/GW", to="EUR_2020/kW", factor=1.05, inplace=True
+    if parser not in PARSERS:
+        raise ValueError(
+            f"Unknown parser {parser}. Use one of the parsers {', '.join(PARSERS)}"
         )
-        all_data.convert_unit("kt CO2/yr", to="Mt CO2/yr", inplace=True)
+    if prefetch < 0:
+        raise ValueError(f"Prefetch threads must not be negative, got {prefetch}")
+    if result_store is not None and any(
+        isinstance(path, ParameterFrames) for path in [inputs_path, results_path]
+    ):
+        raise ValueError("The result store needs inputs and results read from files")
+    options = dict(
+        max_cache_bytes=max_cache_bytes,
+        chunksize=chunksize,
+        cache_dir=cache_dir,
+        rebuild_cache=rebuild_cache,
+        engine=engine,
+        parser=parser,
+        prefetch=prefetch,
+    )
 
-        dic_country_name_variants = {
-            "Netherlands": "The Netherlands",
-            "Czechia": "Czech Republic",
-            "United Kingdom of Great Britain and Northern Ireland": "United Kingdom",
-        }
-        all_data.rename(region=dic_country_name_variants, inplace=True)
+    # Entries which are not found in the result store
+    pending = plan
+    data_by_position = {}  # type: Dict[int, pd.DataFrame]
+    if result_store is not None:
+        store = ResultStore(result_store, hash_contents=hash_contents)
+        keys = {}
+        for entry in plan.entries:
+            filenames = entry_files(entry, inputs_path, results_path)
+            keys[entry.position] = store.key(entry_description(plan, entry), filenames)
+            data = store.get(keys[entry.position])
+            if data is not None:
+                data_by_position[entry.position] = data
+        logger.info(
+            "Reused %d of %d entries from the result store",
+            store.hits,
+            len(plan.entries),
+        )
+        entries = [e for e in plan.entries if e.position not in data_by_position]
+        pending = dataclasses.replace(plan, entries=tuple(entries))
+
+    # The model years are read once and shared by all workers
+    if any(entry.expand_years for entry in pending.entries):
+        options["years"] = model_years(inputs_path)
+
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    batches = schedule_entries(pending, n_jobs or 1)
+
+    if not pending.entries:
+        converted = []
+    elif len(batches) > 1:
+        converted = []
+        # Workers profile their own phases, which are added to this profiler
+        profiler = profiling.active()
+        task = convert_entries
+        if profiler is not None:
+            task = functools.partial(profiling.profiled, convert_entries)
+        with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+            futures = [
+                pool.submit(
+                    task,
+                    pending,
+                    inputs_path,
+                    results_path,
+                    positions=batch,
+                    **options,
+                )
+                for batch in batches
+            ]
+            for future in futures:
+                result = future.result()
+                if profiler is not None:
+                    result, records = result
+                    profiler.merge(records)
+                converted.extend(result)
+        converted.sort(key=lambda item: item[0])
+    else:
+        converted = convert_entries(pending, inputs_path, results_path, **options)
+
+    if result_store is not None:
+        for position, data in converted:
+            store.put(keys[position], data)
+    data_by_position.update(converted)
+
+    frames = []
+    for entry in plan.entries:
+        data = data_by_position[entry.position]
+        if not data.empty:
+            data = plain_types(data).rename(
+                columns={"REGION": "region", "YEAR": "year", "VALUE": "value"}
+            )
+            frames.append(
+                data.assign(
+                    model=plan.model,
+                    scenario=plan.scenario,
+                    variable=entry.variable,
+                    unit=entry.unit,
+                )
+            )
 
-        all_data = pyam.IamDataFrame(all_data)
-        return all_data
+    if len(frames) > 0:
+        return assemble(frames, dict(plan.unit_conversions))
     else:
         raise ValueError("No data found")
 
 
+def convert(
+    config: Union[Dict, Plan],
+    inputs: Union[Mapping[str, FrameSource], ParameterFrames],
+    results: Union[Mapping[str, FrameSource], ParameterFrames],
+    **options,
+) -> "pyam.IamDataFrame":
+    """Create the IAM data frame from OSeMOSYS parameters held in memory
+
+    Takes the data of each parameter as a DataFrame in the layout of its CSV
+    file, so results post-processed in Python need not be written to disk
+    first. The frames are not copied: only the columns the config entries
+    use are taken, and set columns are typed as categoricals, before the
+    entries are extracted as by :func:`main`.
+
+    Arguments
+    ---------
+    config : dict or Plan
+        The configuration dictionary, or the plan compiled from it
+    inputs : Mapping[str, FrameSource]
+        The OSeMOSYS inputs by parameter name. Each is a DataFrame, or a
+        function without arguments which returns one when it is first needed.
+        ``YEAR`` is needed by entries of the ``inputs`` section which expand
+        their rows to every year, with the years in its ``VALUE`` column
+    results : Mapping[str, FrameSource]
+        The OSeMOSYS results by variable name, as for ``inputs``
+    **options
+        Passed on to :func:`main`. ``cache_dir``, ``parser`` and ``engine``
+        only apply to files. With ``n_jobs`` the data is copied to each
+        worker process, so the frames and functions must be picklable
+
+    Returns
+    -------
+    pyam.IamDataFrame
+    """
+    if not isinstance(inputs, ParameterFrames):
+        inputs = ParameterFrames(inputs, "inputs")
+    if not isinstance(results, ParameterFrames):
+        results = ParameterFrames(results, "results")
+    return main(config, inputs, results, **options)
+
+
+def assemble(
+    frames: List[pd.DataFrame],
+    unit_conversions: Optional[Dict[str, Tuple[str, float]]] = None,
+) -> "pyam.IamDataFrame":
+    """Builds the IAM data frame from the long-format data of all entries
+
+    Units are converted and region names are replaced with
+    :data:`COUNTRY_NAME_VARIANTS` as table lookups on the whole column, before
+    the data is validated by pyam once. The units are factorized, so the
+    conversion costs one pass over the data however many rules there are.
+
+    Arguments
+    ---------
+    frames : List[pandas.DataFrame]
+        Data with the columns ``model``, ``scenario``, ``variable``, ``unit``,
+        ``region``, ``year`` and ``value``
+    unit_conversions : dict, default=None
+        Converted unit and factor of each unit, :data:`UNIT_CONVERSIONS` by
+        default
+
+    Returns
+    -------
+    pyam.IamDataFrame
+    """
+    data = pd.concat(frames, ignore_index=True)
+
+    with profiling.phase("unit conversion", rows_in=len(data)):
+        if unit_conversions is None:
+            unit_conversions = UNIT_CONVERSIONS
+        codes, units = pd.factorize(data["unit"])
+        rules = [unit_conversions.get(unit, (unit, 1.0)) for unit in units]
+        targets = np.array([target for target, _ in rules], dtype=object)
+        factors = np.array([factor for _, factor in rules], dtype="float64")
+        data["value"] = data["value"].to_numpy() * factors[codes]
+        data["unit"] = targets[codes]
+
+        # Regions tagged from ISO codes already use these names, those taken
+        # from the CSV files or the config may not
+        data["region"] = data["region"].replace(COUNTRY_NAME_VARIANTS)
+
+    import pyam
+
+    with profiling.phase("pyam build", rows_in=len(data)):
+        return pyam.IamDataFrame(data)
+
+
 def aggregate(func):
     """Decorator for filters which returns the aggregated data"""
 
@@ -563,6 +1997,8 @@ def aggregate(func):
         # Apply the aggregation
         data = data.groupby(by=["REGION", "YEAR"]).sum()
         # Make the IAMDataFrame
+        import pyam
+
         return pyam.IamDataFrame(
             data,
             model=iam_model,
@@ -575,23 +2011,159 @@ def aggregate(func):
 
 
 def entry_point():
+    # The solutions module builds on this one
+    from osemosys2iamc.solutions import SOLVERS, convert_solution
 
-    args = sys.argv[1:]
-
-    if len(args) != 4:
-        print(
-            "Usage: osemosys2iamc <inputs_path> <results_path> <config_path> <output_path>"
-        )
-        exit(1)
+    parser = argparse.ArgumentParser(
+        prog="osemosys2iamc",
+        description="Convert a package of OSeMOSYS results to the IAMC format",
+    )
+    parser.add_argument(
+        "inputs_path",
+        help="Path to a folder or zip/tar archive of CSV files (OSeMOSYS inputs)",
+    )
+    parser.add_argument(
+        "results_path",
+        help="Path to a folder or zip/tar archive of CSV files (OSeMOSYS "
+        "results), or to a solution file with --solver",
+    )
+    parser.add_argument(
+        "config_path",
+        help="Path to the config.yaml file containing the results mapping",
+    )
+    parser.add_argument(
+        "output_path", help="Path to the .xlsx, .csv or .parquet file to write"
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(WRITERS),
+        default=None,
+        help="Format of the output file, taken from its extension by default",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream parameters in chunks of this many rows to bound memory use",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Keep typed Parquet copies of the CSV files in this folder "
+        "and read them in place of the CSV files (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all copies from the cache folder before converting",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Rewrite the copies of the CSV files read in this run",
+    )
+    parser.add_argument(
+        "--result-store",
+        default=None,
+        help="Keep the data of each config entry in this folder and only "
+        "recompute the entries whose mapping or CSV files changed",
+    )
+    parser.add_argument(
+        "--hash-contents",
+        action="store_true",
+        help="Compare the contents of the CSV files to find changed entries, "
+        "not only their size and modification time",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Convert the config entries in this many processes, -1 for one per CPU",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandas",
+        help="Filter and sum the parameters with pandas, or with DuckDB queries "
+        "over the files (requires duckdb)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="c",
+        help="Parse the CSV files with the default parser, or with the "
+        "multi-threaded Arrow parser (requires pyarrow)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="THREADS",
+        help="Load parameters ahead of their use on this many threads",
+    )
+    parser.add_argument(
+        "--solver",
+        choices=SOLVERS,
+        default=None,
+        help="Read results_path as the solution file written by this solver, "
+        "instead of a folder of CSV files",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="REPORT",
+        help="Write the time, rows and peak memory of each phase and config "
+        "entry to this .json or .csv file",
+    )
+    parser.add_argument(
+        "--profile-summary",
+        action="store_true",
+        help="Print a table of the time spent by phase and entry",
+    )
+    args = parser.parse_args()
 
-    inputs_path = args[0]
-    results_path = args[1]
-    configpath = args[2]
-    outpath = args[3]
+    if (args.clear_cache or args.rebuild_cache) and args.cache_dir is None:
+        parser.error("--clear-cache and --rebuild-cache require --cache-dir")
+    try:
+        output_format(args.output_path, args.format)
+    except ValueError as ex:
+        parser.error(str(ex))
+    if args.clear_cache:
+        ColumnarCache(args.cache_dir).clear()
+    if args.result_store is not None:
+        # Reports how many entries are reused from the store
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    inputs_path = args.inputs_path
+    results_path = args.results_path
+    configpath = args.config_path
+    outpath = args.output_path
 
     config = load_config(configpath)
 
-    all_data = main(config, inputs_path, results_path)
+    profiler = None
+    if args.profile is not None or args.profile_summary:
+        profiler = profiling.Profiler().start()
+
+    options = dict(
+        chunksize=args.chunksize,
+        cache_dir=args.cache_dir,
+        rebuild_cache=args.rebuild_cache,
+        n_jobs=args.jobs,
+        result_store=args.result_store,
+        hash_contents=args.hash_contents,
+        engine=args.engine,
+        parser=args.parser,
+        prefetch=args.prefetch,
+    )
+    if args.solver is None:
+        all_data = main(config, inputs_path, results_path, **options)
+    else:
+        all_data = convert_solution(
+            config, results_path, inputs_path, solver=args.solver, **options
+        )
 
     model = config["model"]
     scenario = config["scenario"]
@@ -600,7 +2172,15 @@ def entry_point():
     # Plotting fail reported in [issue 25](https://github.com/OSeMOSYS/osemosys2iamc/issues/25)
     # make_plots(all_data, model, scenario, regions)
 
-    all_data.to_excel(outpath, sheet_name="data")
+    with profiling.phase("write", rows_in=len(all_data)):
+        write(all_data, outpath, args.format)
+
+    if profiler is not None:
+        profiler.stop()
+        if args.profile is not None:
+            profiler.write(args.profile)
+        if args.profile_summary:
+            print(profiler.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,357 @@
+"""Reads OSeMOSYS results straight from the solution file of a solver
+
+Solvers write the value of every variable of the model to a solution file,
+which is usually converted to a folder of CSV files before it is converted
+to the IAMC format. :func:`convert_solution` skips that step: the solution
+file is read once, keeping only the variables the config entries use, and
+the values are passed to :func:`~osemosys2iamc.resultify.convert`.
+
+Three formats are read, see :data:`SOLVERS`:
+
+``cbc``
+    The solution file written by CBC with ``-solu``, one variable per line as
+    ``index name value reduced_cost``
+``cplex``
+    The XML solution file written by CPLEX, one ``<variable .../>`` element
+    per line
+``glpk``
+    The printable report written by GLPK with ``-o``, whose columns section
+    lists the activity of each variable. GLPK rounds the values of this
+    report to six significant digits, so they differ slightly from those of
+    the CSV files and a :class:`GLPKPrecisionWarning` is issued. The raw
+    solution written with ``-w`` holds full precision but no variable names
+
+Variables are named as in the OSeMOSYS model, such as
+``TotalCapacityAnnual(REGION1,ATBMCSPN2,2015)``. GLPK writes the indices in
+square brackets. The sets of the indices of common result variables are
+listed in :data:`VARIABLE_SETS`, others are given with the ``sets`` argument.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import re
+import warnings
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from osemosys2iamc.plan import Plan, compile_config
+from osemosys2iamc.resultify import OSEMOSYS_DTYPES, concat_parts, convert, main
+from osemosys2iamc.sources import COMPRESSIONS, FrameSource, ParameterFrames
+
+if TYPE_CHECKING:
+    import pyam
+
+SOLVERS = ["cbc", "cplex", "glpk"]
+
+# Sets indexing the result variables of OSeMOSYS, in the order of the indices
+VARIABLE_SETS = {
+    "AccumulatedNewCapacity": ["REGION", "TECHNOLOGY", "YEAR"],
+    "AnnualEmissions": ["REGION", "EMISSION", "YEAR"],
+    "AnnualFixedOperatingCost": ["REGION", "TECHNOLOGY", "YEAR"],
+    "AnnualTechnologyEmission": ["REGION", "TECHNOLOGY", "EMISSION", "YEAR"],
+    "AnnualTechnologyEmissions": ["REGION", "TECHNOLOGY", "EMISSION", "YEAR"],
+    "AnnualTechnologyEmissionByMode": [
+        "REGION",
+        "TECHNOLOGY",
+        "EMISSION",
+        "MODE_OF_OPERATION",
+        "YEAR",
+    ],
+    "AnnualVariableOperatingCost": ["REGION", "TECHNOLOGY", "YEAR"],
+    "CapitalInvestment": ["REGION", "TECHNOLOGY", "YEAR"],
+    "Demand": ["REGION", "TIMESLICE", "FUEL", "YEAR"],
+    "DiscountedSalvageValue": ["REGION", "TECHNOLOGY", "YEAR"],
+    "NewCapacity": ["REGION", "TECHNOLOGY", "YEAR"],
+    "ProductionByTechnology": ["REGION", "TIMESLICE", "TECHNOLOGY", "FUEL", "YEAR"],
+    "ProductionByTechnologyAnnual": ["REGION", "TECHNOLOGY", "FUEL", "YEAR"],
+    "RateOfActivity": [
+        "REGION",
+        "TIMESLICE",
+        "TECHNOLOGY",
+        "MODE_OF_OPERATION",
+        "YEAR",
+    ],
+    "SalvageValue": ["REGION", "TECHNOLOGY", "YEAR"],
+    "TotalAnnualTechnologyActivityByMode": [
+        "REGION",
+        "TECHNOLOGY",
+        "MODE_OF_OPERATION",
+        "YEAR",
+    ],
+    "TotalCapacityAnnual": ["REGION", "TECHNOLOGY", "YEAR"],
+    "TotalDiscountedCost": ["REGION", "YEAR"],
+    "TotalTechnologyAnnualActivity": ["REGION", "TECHNOLOGY", "YEAR"],
+    "Trade": ["REGION", "_REGION", "TIMESLICE", "FUEL", "YEAR"],
+    "UseByTechnology": ["REGION", "TIMESLICE", "TECHNOLOGY", "FUEL", "YEAR"],
+}
+
+# Variable name and indices, as in ``TotalCapacityAnnual(REGION1,ATBM,2015)``
+_VARIABLE = re.compile(r"([^(\[]+)[(\[](.*)[)\]]$")
+
+# Name and value of a variable of a CPLEX solution file
+_CPLEX_VARIABLE = re.compile(r'<variable\b.*?\bname="([^"]*)".*?\bvalue="([^"]*)"')
+
+# Status of a column in the printable report of GLPK
+_GLPK_STATUS = {"B", "NL", "NU", "NF", "NS", "*"}
+
+
+# Records of a variable held as text before they are parsed into a typed frame
+SOLUTION_CHUNKSIZE = 100_000
+
+
+class GLPKPrecisionWarning(UserWarning):
+    """Issued when values are read from the rounded printable report of GLPK"""
+
+
+def open_solution(filename: str) -> IO[str]:
+    """Opens a solution file, which may be compressed, as text"""
+    compression = COMPRESSIONS.get("." + filename.rsplit(".", 1)[-1].lower())
+    openers = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+    return openers.get(compression, open)(filename, "rt")
+
+
+def detect_solver(filename: str) -> str:
+    """Returns the solver which wrote a solution file, from its first line"""
+    with open_solution(filename) as solution:
+        first = solution.readline().strip()
+    if first.startswith("<?xml") or first.startswith("<CPLEXSolution"):
+        return "cplex"
+    if first.startswith("Problem:"):
+        return "glpk"
+    return "cbc"
+
+
+def cbc_records(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yields the name and value of each variable of a CBC solution file"""
+    lines = iter(lines)
+    # The first line holds the status and objective value
+    next(lines, None)
+    for line in lines:
+        fields = line.split()
+        if fields and fields[0] == "**":
+            # Marks variables which break a bound
+            fields = fields[1:]
+        if len(fields) >= 3:
+            yield fields[1], fields[2]
+
+
+def cplex_records(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yields the name and value of each variable of a CPLEX solution file"""
+    for line in lines:
+        match = _CPLEX_VARIABLE.search(line)
+        if match is not None:
+            yield match.group(1), match.group(2)
+
+
+def glpk_records(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yields the name and activity of each column of a GLPK report
+
+    Names longer than their column are written on a line of their own, and
+    the activity on the next line.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if line.split()[:3] == ["No.", "Column", "name"]:
+            break
+    # The rule below the header
+    next(lines, None)
+    name = None
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            if name is None:
+                return
+            continue
+        if name is None:
+            if not fields[0].isdigit():
+                return
+            name, fields = fields[1], fields[2:]
+            if not fields:
+                continue
+        while fields and fields[0] in _GLPK_STATUS:
+            fields = fields[1:]
+        if fields:
+            yield name, fields[0]
+        name = None
+
+
+RECORD_READERS = {"cbc": cbc_records, "cplex": cplex_records, "glpk": glpk_records}
+
+
+def read_solution(
+    filename: str,
+    variables: Optional[Iterable[str]] = None,
+    solver: Optional[str] = None,
+    sets: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Reads the values of OSeMOSYS variables from a solution file
+
+    The file is read line by line and only the values of ``variables`` are
+    kept. Every :data:`SOLUTION_CHUNKSIZE` records of a variable are parsed
+    into a frame with typed set columns, as those of a parameter file are by
+    :func:`~osemosys2iamc.resultify.read_file`, so at most that many records
+    of each variable are held as text. The frames of each variable are
+    concatenated at the end of the file.
+
+    Parameters
+    ----------
+    filename: str
+        Path to the solution file, which may be compressed
+    variables: Iterable[str], default=None
+        Names of the variables to read, all by default
+    solver: str, default=None
+        One of :data:`SOLVERS`, detected from the file by default
+    sets: Dict[str, List[str]], default=None
+        Sets of the indices of variables not in :data:`VARIABLE_SETS`
+
+    Returns
+    -------
+    Dict[str, pandas.DataFrame]
+        The values of each variable found, with one column per set and a
+        ``VALUE`` column
+    """
+    if solver is None:
+        solver = detect_solver(filename)
+    if solver not in SOLVERS:
+        raise ValueError(
+            f"Unknown solver {solver}. Use one of the solvers {', '.join(SOLVERS)}"
+        )
+    if solver == "glpk":
+        warnings.warn(
+            f"The GLPK report {filename} holds values rounded to six significant "
+            "digits, which may differ slightly from the results written as CSV "
+            "files",
+            GLPKPrecisionWarning,
+            stacklevel=2,
+        )
+    variable_sets = dict(VARIABLE_SETS, **(sets or {}))
+    wanted = None if variables is None else set(variables)
+
+    indices = {}  # type: Dict[str, List[str]]
+    values = {}  # type: Dict[str, List[str]]
+    parts = {}  # type: Dict[str, List[pd.DataFrame]]
+
+    def flush(variable: str):
+        parts.setdefault(variable, []).append(
+            variable_frame(variable_sets[variable], indices[variable], values[variable])
+        )
+        indices[variable] = []
+        values[variable] = []
+
+    with open_solution(filename) as solution:
+        for name, value in RECORD_READERS[solver](solution):
+            match = _VARIABLE.match(name)
+            if match is None:
+                continue
+            variable = match.group(1)
+            if wanted is not None and variable not in wanted:
+                continue
+            if variable not in indices:
+                if variable not in variable_sets:
+                    raise ValueError(
+                        f"The sets of the variable {variable} are unknown. "
+                        "Give them with the sets argument"
+                    )
+                indices[variable] = []
+                values[variable] = []
+            indices[variable].append(match.group(2))
+            values[variable].append(value)
+            if len(indices[variable]) >= SOLUTION_CHUNKSIZE:
+                flush(variable)
+
+    for variable in indices:
+        if indices[variable]:
+            flush(variable)
+    return {variable: concat_parts(parts[variable]) for variable in indices}
+
+
+def variable_frame(
+    columns: List[str], indices: List[str], values: List[str]
+) -> pd.DataFrame:
+    """Returns the values of a variable with its indices split into set columns"""
+    if not indices:
+        return pd.DataFrame(
+            {c: pd.Series(dtype=OSEMOSYS_DTYPES.get(c, object)) for c in columns}
+        ).assign(VALUE=pd.Series(dtype="float64"))
+    text = "\n".join(indices).replace("'", "")
+    df = pd.read_csv(
+        io.StringIO(text),
+        header=None,
+        names=columns,
+        dtype={c: OSEMOSYS_DTYPES[c] for c in columns if c in OSEMOSYS_DTYPES},
+        keep_default_na=False,
+    )
+    df["VALUE"] = np.array(values, dtype="float64")
+    return df
+
+
+def convert_solution(
+    config: Union[Dict, Plan],
+    filename: str,
+    inputs: Union[str, Dict[str, FrameSource], None] = None,
+    solver: Optional[str] = None,
+    sets: Optional[Dict[str, List[str]]] = None,
+    **options,
+) -> "pyam.IamDataFrame":
+    """Create the IAM data frame from the solution file of a solver
+
+    Only the variables read by the ``results`` entries of the config are
+    kept from the solution file. Variables which the solver does not write,
+    as they are zero, are read as empty.
+
+    Arguments
+    ---------
+    config : dict or Plan
+        The configuration dictionary, or the plan compiled from it
+    filename : str
+        Path to the solution file
+    inputs : str or Mapping[str, FrameSource], default=None
+        Path to a folder or archive of CSV files (OSeMOSYS inputs), or the
+        inputs held in memory. Needed if the config has ``inputs`` entries
+    solver: str, default=None
+        One of :data:`SOLVERS`, detected from the file by default
+    sets: Dict[str, List[str]], default=None
+        Sets of the indices of variables not in :data:`VARIABLE_SETS`
+    **options
+        Passed on to :func:`~osemosys2iamc.resultify.main`
+
+    Returns
+    -------
+    pyam.IamDataFrame
+    """
+    plan = config if isinstance(config, Plan) else compile_config(config)
+    variables = {
+        param
+        for entry in plan.entries
+        if entry.section == "results"
+        for param in entry.parameters
+    }
+    variable_sets = dict(VARIABLE_SETS, **(sets or {}))
+    unknown = sorted(variables - set(variable_sets))
+    if unknown:
+        raise ValueError(
+            f"The sets of the variables {', '.join(unknown)} are unknown. "
+            "Give them with the sets argument"
+        )
+    frames = read_solution(filename, variables, solver, sets)
+
+    for variable in variables - set(frames):
+        frames[variable] = variable_frame(variable_sets[variable], [], [])
+
+    results = ParameterFrames(frames, filename)
+    if isinstance(inputs, str):
+        return main(plan, inputs, results, **options)
+    return convert(plan, inputs or {}, results, **options)
@@ -0,0 +1,216 @@
+"""Locates and opens the CSV files of OSeMOSYS parameters
+
+The inputs and results of a model run may be held in a folder or in a zip or
+tar archive (``.zip``, ``.tar``, ``.tar.gz``, ``.tgz``, ``.tar.bz2`` or
+``.tar.xz``). Each file may be compressed on its own: a parameter ``P`` is
+read from ``P.csv``, or else from ``P.csv.gz``, ``P.csv.bz2`` or ``P.csv.xz``.
+
+Members of an archive are found by their file name, in any folder of the
+archive, and are read as streams without extracting the archive. They are
+named by the path of the archive joined with the name of the member, as in
+``results.zip/results/TotalCapacityAnnual.csv``, so a file in an archive is
+passed around as a plain string, like any other file.
+
+Parameters which are already held in memory are passed in place of a path as
+:class:`ParameterFrames`.
+"""
+import contextlib
+import functools
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import IO, Callable, Dict, Iterator, Mapping, Optional, Tuple, Union
+
+import pandas as pd
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Compression of single CSV files, by extension, as understood by pandas
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+# The data of a parameter, or a function without arguments which returns it
+FrameSource = Union[pd.DataFrame, Callable[[], pd.DataFrame]]
+
+
+class ParameterFrames:
+    """OSeMOSYS parameters held in memory, in place of a folder of CSV files
+
+    The frames are not copied. Each is read in the layout of its CSV file,
+    with one column per set and a ``VALUE`` column. Instances compare and hash
+    by identity, as a folder compares by its path.
+
+    Parameters
+    ----------
+    frames: Mapping[str, FrameSource]
+        The data of each parameter by name, or a function which returns it.
+        A function is called each time the parameter is read, which is once
+        per conversion unless the parameter cache runs out of memory
+    name: str, default="memory"
+        Name of the data in messages
+    """
+
+    def __init__(self, frames: Mapping[str, FrameSource], name: str = "memory"):
+        self.frames = frames
+        self.name = name
+
+    def __contains__(self, osemosys_param: str) -> bool:
+        return osemosys_param in self.frames
+
+    def __repr__(self) -> str:
+        return f"ParameterFrames({self.name})"
+
+    def read(self, osemosys_param: str) -> pd.DataFrame:
+        """Returns the data of ``osemosys_param``"""
+        if osemosys_param not in self.frames:
+            raise ValueError(
+                f"No parameter {osemosys_param} in the {self.name} data. "
+                f"Parameters given are {', '.join(sorted(self.frames))}"
+            )
+        frame = self.frames[osemosys_param]
+        if callable(frame):
+            frame = frame()
+        if not isinstance(frame, pd.DataFrame):
+            raise ValueError(
+                f"The {self.name} data of {osemosys_param} is not a DataFrame"
+            )
+        return frame
+
+
+def is_archive(path: str) -> bool:
+    """Returns whether ``path`` is a zip or tar archive"""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+@functools.lru_cache(maxsize=32)
+def _members(
+    archive: str, size: int, mtime_ns: int
+) -> Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]]:
+    """Returns the files of an archive by name
+
+    Cached by the size and modification time of the archive, as listing the
+    members of a compressed tar archive decompresses all of it.
+    """
+    if archive.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive) as zip_file:
+            return {
+                info.filename: info for info in zip_file.infolist() if not info.is_dir()
+            }
+    with tarfile.open(archive, "r:*") as tar_file:
+        return {info.name: info for info in tar_file.getmembers() if info.isfile()}
+
+
+def members(archive: str) -> Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]]:
+    """Returns the files of ``archive`` by their name in the archive"""
+    stat = os.stat(archive)
+    return _members(os.path.abspath(archive), stat.st_size, stat.st_mtime_ns)
+
+
+def candidates(filename: str) -> Iterator[str]:
+    """Yields ``filename`` and the names of its compressed versions"""
+    yield filename
+    for extension in COMPRESSIONS:
+        yield filename + extension
+
+
+def locate(path: str, filename: str) -> str:
+    """Returns the path of ``filename`` in a folder or archive
+
+    The plain file is preferred over a compressed one. In an archive, the
+    member closest to the top of the archive is used. If no file is found,
+    the path the plain file would have is returned.
+
+    Parameters
+    ----------
+    path: str
+        Path to a folder, or to a zip or tar archive
+    filename: str
+        Name of the file, such as ``TotalCapacityAnnual.csv``
+
+    Returns
+    -------
+    str
+    """
+    if is_archive(path):
+        names = members(path)
+        for candidate in candidates(filename):
+            matches = [name for name in names if posixpath.basename(name) == candidate]
+            if matches:
+                member = min(matches, key=lambda name: (name.count("/"), name))
+                return os.path.join(path, *member.split("/"))
+        return os.path.join(path, filename)
+
+    for candidate in candidates(filename):
+        located = os.path.join(path, candidate)
+        if os.path.exists(located):
+            return located
+    return os.path.join(path, filename)
+
+
+def split_archive(filename: str) -> Tuple[Optional[str], str]:
+    """Returns the archive holding ``filename`` and the name of its member
+
+    Returns ``None`` and ``filename`` if the file is not in an archive.
+    """
+    if os.path.exists(filename):
+        return None, filename
+    head = filename
+    parts = []
+    while True:
+        head, tail = os.path.split(head)
+        if not tail:
+            return None, filename
+        parts.insert(0, tail)
+        if is_archive(head):
+            return head, "/".join(parts)
+
+
+def source_file(filename: str) -> str:
+    """Returns the file on disk which holds ``filename``, which may be an archive"""
+    archive, _ = split_archive(filename)
+    return filename if archive is None else archive
+
+
+def compression(filename: str) -> Optional[str]:
+    """Returns the compression of a CSV file, as taken from its extension"""
+    return COMPRESSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+@contextlib.contextmanager
+def open_source(filename: str) -> Iterator[Union[str, IO[bytes]]]:
+    """Yields what :func:`pandas.read_csv` reads ``filename`` from
+
+    That is the path of a file on disk, or a stream of a member of an archive.
+    """
+    archive, member = split_archive(filename)
+    if archive is None:
+        yield filename
+        return
+    info = members(archive).get(member)
+    if info is None:
+        raise FileNotFoundError(f"No file {member} in the archive {archive}")
+    if isinstance(info, zipfile.ZipInfo):
+        with zipfile.ZipFile(archive) as zip_file, zip_file.open(info) as stream:
+            yield stream
+    else:
+        with tarfile.open(archive, "r:*") as tar_file:
+            with tar_file.extractfile(info) as stream:
+                yield stream
+
+
+def read_csv(filename: str, **kwargs) -> pd.DataFrame:
+    """Reads a CSV file, which may be compressed or held in an archive
+
+    The keyword arguments are passed on to :func:`pandas.read_csv`.
+    """
+    with open_source(filename) as source:
+        return pd.read_csv(source, compression=compression(filename), **kwargs)
+
+
+def read_csv_chunks(filename: str, chunksize: int, **kwargs) -> Iterator[pd.DataFrame]:
+    """Yields a CSV file in chunks of ``chunksize`` rows, see :func:`read_csv`"""
+    with open_source(filename) as source:
+        with pd.read_csv(
+            source, compression=compression(filename), chunksize=chunksize, **kwargs
+        ) as reader:
+            yield from reader
@@ -0,0 +1,295 @@
+"""Generates synthetic OSeMOSYS result folders and matching configurations
+
+The generated files follow the layout and naming of the OSeMBE model: names
+of technologies and fuels start with an ISO 3166-1 alpha-2 country code,
+followed by a two letter fuel code, for example ``ATBM00X00`` or ``ATNUG2PH3``.
+They are intended for benchmarks and tests at realistic sizes, the values are
+random.
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Countries with results in OSeMBE, in the order they are used
+COUNTRIES = [
+    "AT", "BE", "BG", "CH", "CY", "CZ", "DE", "DK", "EE", "ES", "FI", "FR",
+    "GR", "HR", "HU", "IE", "IT", "LT", "LU", "LV", "MT", "NL", "NO", "PL",
+    "PT", "RO", "SE", "SI", "SK", "UK",
+]  # fmt: skip
+
+# Fuel codes, the fossil ones emit CO2
+FUEL_CODES = [
+    "BM", "CO", "EL", "GO", "HY", "NG", "NU", "OI", "SO", "WI", "WS", "BF", "HF",
+]  # fmt: skip
+FOSSIL_FUELS = ["CO", "GO", "NG", "OI", "HF"]
+
+# Technology suffixes, ``00X00`` are extraction and ``CS`` capture technologies
+TECHNOLOGY_TYPES = ["00X00", "00I00", "STPH3", "CCPH2", "CHPH1", "CSPN2", "G2PH3"]
+
+# Technologies generated first, so that each kind of config entry finds data:
+# an extraction, a capture, which emits, and an electricity trade technology
+CORE_TECHNOLOGIES = ["BM00X00", "BMCSPN2", "ELSTPH3"]
+
+# Demand fuels of each country
+DEMAND_FUELS = ["E1", "E2"]
+
+# Kinds of config entries created by :func:`synthetic_config`
+CONFIG_KINDS = ["variable_cost", "capacity", "fuel", "emissions", "demand", "trade"]
+
+
+def country_codes(countries: int) -> List[str]:
+    """Returns ``countries`` country codes, extended with other ISO codes if needed"""
+    if countries <= len(COUNTRIES):
+        return COUNTRIES[:countries]
+    from iso3166 import countries_by_alpha2
+
+    others = sorted(c for c in countries_by_alpha2 if c not in COUNTRIES)
+    codes = COUNTRIES + others
+    if countries > len(codes):
+        raise ValueError(f"At most {len(codes)} countries can be generated")
+    return codes[:countries]
+
+
+def technology_names(technologies: int) -> List[str]:
+    """Returns ``technologies`` distinct names of technologies without country code
+
+    The names start with :data:`CORE_TECHNOLOGIES` and then combine each fuel
+    code with all technology types, electricity interconnectors are added once
+    these run out.
+    """
+    if technologies < len(CORE_TECHNOLOGIES):
+        raise ValueError(
+            f"At least {len(CORE_TECHNOLOGIES)} technologies must be generated"
+        )
+    names = CORE_TECHNOLOGIES + [
+        fuel + kind
+        for fuel in FUEL_CODES
+        for kind in TECHNOLOGY_TYPES
+        if fuel + kind not in CORE_TECHNOLOGIES
+    ]
+    number = 0
+    while len(names) < technologies:
+        names.append(f"EL{number:04d}IC")
+        number += 1
+    return names[:technologies]
+
+
+def generate_results(
+    path: str,
+    countries: int = 4,
+    technologies: int = 20,
+    years: int = 10,
+    timeslices: int = 4,
+    start_year: int = 2015,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """Writes a synthetic folder of OSeMOSYS inputs and results
+
+    Arguments
+    ---------
+    path: str
+        Folder to write the CSV files to. Created if it does not exist
+    countries: int, default=4
+        Number of countries
+    technologies: int, default=20
+        Number of technologies per country
+    years: int, default=10
+        Number of model years
+    timeslices: int, default=4
+        Number of timeslices
+    start_year: int, default=2015
+        First model year
+    seed: int, default=0
+        Seed of the random values
+
+    Returns
+    -------
+    Dict[str, int]
+        Number of rows written to each file, by parameter name
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+
+    codes = country_codes(countries)
+    names = technology_names(technologies)
+    year_values = np.arange(start_year, start_year + years)
+    slices = [f"S{1 + s // 3:02d}B{1 + s % 3}" for s in range(timeslices)]
+
+    techs = pd.DataFrame(
+        [(c + name, c + name[:2]) for c in codes for name in names],
+        columns=["TECHNOLOGY", "FUEL"],
+    )
+    fossil = techs.FUEL.str[2:4].isin(FOSSIL_FUELS)
+    capture = techs.TECHNOLOGY.str[4:6] == "CS"
+    demand_fuels = pd.DataFrame({"FUEL": [c + f for c in codes for f in DEMAND_FUELS]})
+
+    def product(*frames: pd.DataFrame) -> pd.DataFrame:
+        df = frames[0]
+        for other in frames[1:]:
+            df = df.merge(other, how="cross")
+        return df
+
+    year_frame = pd.DataFrame({"YEAR": year_values})
+    slice_frame = pd.DataFrame({"TIMESLICE": slices})
+    mode_frame = pd.DataFrame({"MODE_OF_OPERATION": [1, 2]})
+
+    def write(name: str, df: pd.DataFrame, scale: float, columns: List[str]):
+        df = df.assign(REGION="REGION1", VALUE=rng.random(len(df)) * scale)
+        df[["REGION"] + columns + ["VALUE"]].to_csv(
+            os.path.join(path, name + ".csv"), index=False
+        )
+        rows[name] = len(df)
+
+    rows = {}  # type: Dict[str, int]
+    pd.DataFrame({"VALUE": year_values}).to_csv(
+        os.path.join(path, "YEAR.csv"), index=False
+    )
+    rows["YEAR"] = years
+
+    write(
+        "TotalCapacityAnnual",
+        product(techs[["TECHNOLOGY"]], year_frame),
+        10.0,
+        ["TECHNOLOGY", "YEAR"],
+    )
+    write(
+        "ProductionByTechnologyAnnual",
+        product(techs[["TECHNOLOGY", "FUEL"]], year_frame),
+        100.0,
+        ["TECHNOLOGY", "FUEL", "YEAR"],
+    )
+    write(
+        "UseByTechnology",
+        product(slice_frame, techs[["TECHNOLOGY", "FUEL"]], year_frame),
+        10.0,
+        ["TIMESLICE", "TECHNOLOGY", "FUEL", "YEAR"],
+    )
+    write(
+        "VariableCost",
+        product(techs[["TECHNOLOGY"]], mode_frame, year_frame),
+        5.0,
+        ["TECHNOLOGY", "MODE_OF_OPERATION", "YEAR"],
+    )
+    write(
+        "Demand",
+        product(slice_frame, demand_fuels, year_frame),
+        50.0,
+        ["TIMESLICE", "FUEL", "YEAR"],
+    )
+
+    emitters = techs.loc[fossil | capture, ["TECHNOLOGY"]]
+    emissions = product(emitters, pd.DataFrame({"EMISSION": ["CO2"]}), year_frame)
+    write(
+        "AnnualTechnologyEmissions",
+        emissions,
+        1000.0,
+        ["TECHNOLOGY", "EMISSION", "YEAR"],
+    )
+
+    return rows
+
+
+def synthetic_config(kinds: Optional[List[str]] = None, entries: int = 3) -> Dict:
+    """Returns a configuration for the folders written by :func:`generate_results`
+
+    Arguments
+    ---------
+    kinds: List[str], default=None
+        Kinds of entries to include, all of :data:`CONFIG_KINDS` by default
+    entries: int, default=3
+        Number of entries of each kind, except ``trade`` which has one entry
+
+    Returns
+    -------
+    dict
+    """
+    kinds = CONFIG_KINDS if kinds is None else kinds
+    unknown = [kind for kind in kinds if kind not in CONFIG_KINDS]
+    if unknown:
+        raise ValueError(f"Unknown kinds of entries {', '.join(unknown)}")
+
+    # Pairs of fuel code and variable name suffix, unique for any ``entries``
+    fuels = [
+        (FUEL_CODES[i % len(FUEL_CODES)], str(i // len(FUEL_CODES) or ""))
+        for i in range(entries)
+    ]
+    inputs = []
+    results = []
+    for kind in kinds:
+        if kind == "variable_cost":
+            inputs += [
+                {
+                    "iamc_variable": f"Price|Primary Energy|{fuel}{suffix}",
+                    "variable_cost": [f"(?=^.{{2}}({fuel}))^.{{6}}(X0)"],
+                    "unit": "MEUR_2015/PJ",
+                    "osemosys_param": "VariableCost",
+                }
+                for fuel, suffix in fuels
+            ]
+        elif kind == "capacity":
+            results += [
+                {
+                    "iamc_variable": f"Capacity|Electricity|{fuel}{suffix}",
+                    "capacity": [f"^.{{2}}({fuel})"],
+                    "unit": "GW",
+                    "osemosys_param": "TotalCapacityAnnual",
+                }
+                for fuel, suffix in fuels
+            ]
+        elif kind == "fuel":
+            results += [
+                {
+                    "iamc_variable": f"Primary Energy|{fuel}{suffix}",
+                    "technology": [f"^.{{2}}({fuel})"],
+                    "fuel": [f"^.{{2}}({fuel})"],
+                    "unit": "PJ/yr",
+                    "osemosys_param": "ProductionByTechnologyAnnual",
+                }
+                for fuel, suffix in fuels
+            ]
+        elif kind == "emissions":
+            results += [
+                {
+                    "iamc_variable": f"Emissions|CO2|{fuel}{suffix}",
+                    "emissions": ["CO2"],
+                    "tech_emi": [f"^.{{2}}({fuel})"],
+                    "unit": "kt CO2/yr",
+                    "osemosys_param": "AnnualTechnologyEmissions",
+                }
+                for fuel, suffix in fuels
+            ]
+        elif kind == "demand":
+            results += [
+                {
+                    "iamc_variable": f"Final Energy|Electricity|{demand}",
+                    "demand": [f"^.{{2}}({demand})"],
+                    "unit": "PJ/yr",
+                    "osemosys_param": "Demand",
+                }
+                for demand in DEMAND_FUELS
+            ]
+        elif kind == "trade":
+            results.append(
+                {
+                    "iamc_variable": "Trade|Secondary Energy|Electricity|Volume",
+                    "osemosys_param": [
+                        "UseByTechnology",
+                        "ProductionByTechnologyAnnual",
+                    ],
+                    "trade_tech": ["(?=^.{2}(EL))^((?!00).)*$"],
+                    "unit": "PJ/yr",
+                }
+            )
+
+    config = {
+        "model": "Synthetic",
+        "scenario": "Benchmark",
+        "region": "iso2_start",
+    }
+    if inputs:
+        config["inputs"] = inputs
+    if results:
+        config["results"] = results
+    return config
@@ -0,0 +1,122 @@
+"""Writes converted data to disk
+
+The output format is chosen from the file extension or given explicitly:
+
+- ``xlsx``: IAMC-wide table in the ``data`` sheet of an Excel workbook, written
+  row by row with a constant-memory workbook when ``xlsxwriter`` is installed
+- ``csv``: IAMC-wide table in a CSV file, pivoted and written one region at
+  a time
+- ``parquet``: long-format data, one row per value, requires ``pyarrow``
+"""
+import math
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pyam
+
+IAMC_COLUMNS = ["Model", "Scenario", "Region", "Variable", "Unit"]
+
+
+def output_format(path: str, format: Optional[str] = None) -> str:
+    """Returns the output format for ``path``
+
+    Arguments
+    ---------
+    path : str
+        Path to the output file
+    format : str, default=None
+        One of :data:`WRITERS`, taken from the extension of ``path`` by default
+
+    Returns
+    -------
+    str
+    """
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip(".").lower()
+    if format not in WRITERS:
+        options = ", ".join(WRITERS)
+        raise ValueError(
+            f"Cannot write {path} as '{format}'. Use one of the formats {options}"
+        )
+    return format
+
+
+def write(df: "pyam.IamDataFrame", path: str, format: Optional[str] = None):
+    """Writes ``df`` to ``path`` in the given or inferred format
+
+    Arguments
+    ---------
+    df : pyam.IamDataFrame
+        The data to write
+    path : str
+        Path to the output file
+    format : str, default=None
+        One of :data:`WRITERS`, taken from the extension of ``path`` by default
+    """
+    WRITERS[output_format(path, format)](df, path)
+
+
+def write_excel(df: "pyam.IamDataFrame", path: str):
+    """Writes ``df`` to the ``data`` sheet of an Excel workbook
+
+    Rows are streamed to disk as they are written, so the workbook is never
+    held in memory. Falls back to :meth:`pyam.IamDataFrame.to_excel` if
+    ``xlsxwriter`` is not installed.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        df.to_excel(path, sheet_name="data")
+        return
+
+    wide = df.timeseries()
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        worksheet = workbook.add_worksheet("data")
+        worksheet.write_row(0, 0, IAMC_COLUMNS + [str(c) for c in wide.columns])
+        n_index = len(IAMC_COLUMNS)
+        for row, (index, values) in enumerate(
+            zip(wide.index, wide.itertuples(index=False)), start=1
+        ):
+            worksheet.write_row(row, 0, index)
+            for column, value in enumerate(values, start=n_index):
+                if not math.isnan(value):
+                    worksheet.write_number(row, column, value)
+    finally:
+        workbook.close()
+
+
+def write_csv(df: "pyam.IamDataFrame", path: str):
+    """Writes ``df`` as an IAMC-wide CSV file
+
+    The long-format data is pivoted and appended one model, scenario and
+    region at a time, so the whole wide table is never held in memory. The
+    file matches the one written by :meth:`pyam.IamDataFrame.to_csv`.
+    """
+    data = df.data
+    index = [column.lower() for column in IAMC_COLUMNS]
+    years = sorted(data["year"].unique())
+    with open(path, "w", newline="") as csvfile:
+        csvfile.write(",".join(IAMC_COLUMNS + [str(year) for year in years]) + "\n")
+        for _, group in data.groupby(index[:3], sort=True, observed=True):
+            wide = group.set_index(index + ["year"])["value"].unstack("year")
+            wide.reindex(columns=years).to_csv(csvfile, header=False)
+
+
+def write_parquet(df: "pyam.IamDataFrame", path: str):
+    """Writes the long-format data of ``df`` to a Parquet file
+
+    Requires the optional dependency ``pyarrow``.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as ex:
+        raise ImportError(
+            "Writing Parquet files requires pyarrow. "
+            "Install it with `pip install osemosys2iamc[parquet]`"
+        ) from ex
+    df.data.to_parquet(path, index=False)
+
+
+WRITERS = {"xlsx": write_excel, "csv": write_csv, "parquet": write_parquet}
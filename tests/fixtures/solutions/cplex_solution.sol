@@ -0,0 +1,105 @@
+<?xml version = "1.0" encoding="UTF-8" standalone="yes"?>
+<CPLEXSolution version="1.2">
+ <header
+   problemName="osemosys.lp"
+   objectiveValue="4483.96263"
+   solutionStatusValue="1"
+   solutionStatusString="optimal"/>
+ <linearConstraints>
+  <constraint name="EBa11_EnergyBalanceEachTS5(REGION1,S01B1,ATE2,2015)" index="0" slack="0"/>
+ </linearConstraints>
+ <variables>
+  <variable name="TotalCapacityAnnual(REGION1,ATBFHPFH1,2015)" index="0" value="0.02941"/>
+  <variable name="TotalCapacityAnnual(REGION1,ATBMSTPH3,2015)" index="1" value="0.417366"/>
+  <variable name="TotalCapacityAnnual(REGION1,ATELCHPH1,2015)" index="2" value="1.898"/>
+  <variable name="RateOfActivity(REGION1,S01B1,ATNGCCPH2,1,2015)" index="3" value="0.5"/>
+  <variable name="RateOfActivity(REGION1,S01B1,ATBM00X00,1,2015)" index="4" value="1.25"/>
+  <variable name="TotalCapacityAnnual(REGION1,BEBFHPFH1,2016)" index="5" value="0.184866"/>
+  <variable name="TotalCapacityAnnual(REGION1,BGCOSTPH3,2015)" index="6" value="4.141"/>
+  <variable name="TotalCapacityAnnual(REGION1,CHGOCVPH2,2026)" index="7" value="0.0045639753915826"/>
+  <variable name="TotalCapacityAnnual(REGION1,CYHFCCPH2,2015)" index="8" value="0.3904880555817921"/>
+  <variable name="TotalCapacityAnnual(REGION1,CZHYDMPH1,2015)" index="9" value="0.299709"/>
+  <variable name="TotalCapacityAnnual(REGION1,DENGCCPH2,2015)" index="10" value="9.62143"/>
+  <variable name="TotalCapacityAnnual(REGION1,DKOCWVPH1,2015)" index="11" value="0.0005"/>
+  <variable name="TotalCapacityAnnual(REGION1,EESOUTPH2,2015)" index="12" value="0.006"/>
+  <variable name="TotalCapacityAnnual(REGION1,ESNUG2PH3,2015)" index="13" value="7.7308"/>
+  <variable name="TotalCapacityAnnual(REGION1,FIWIOFPH3,2015)" index="14" value="0.0263"/>
+  <variable name="TotalCapacityAnnual(REGION1,FRWSCHPH2,2015)" index="15" value="0.47835"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATBMCSPN2,CO2,2026)" index="16" value="-7573.069442598169"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATBMCSPN2,CO2,2027)" index="17" value="-7766.777427515737"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATNG00I00,CO2,2030)" index="18" value="3043.14883455963"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATNG00I00,CO2,2031)" index="19" value="2189.064680841067"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATNG00I00,CO2,2032)" index="20" value="2315.8212665203155"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATNG00X00,CO2,2026)" index="21" value="1328.206881170592"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,ATNG00X00,CO2,2027)" index="22" value="1237.245344603424"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BEBMCSPN2,CO2,2026)" index="23" value="-2244.98280006968"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BEBMCSPN2,CO2,2027)" index="24" value="-6746.886436926597"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCO00X00,CO2,2030)" index="25" value="11096.55693088164"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCO00X00,CO2,2031)" index="26" value="11069.257140908643"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCO00X00,CO2,2032)" index="27" value="11041.957354265856"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCOCHPH3,BGPM25,2030)" index="28" value="0.1029940513163551"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCOCHPH3,BGPM25,2031)" index="29" value="0.1029940513163552"/>
+  <variable name="AnnualTechnologyEmissions(REGION1,BGCOCHPH3,BGPM25,2032)" index="30" value="0.1029940513163551"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBM00X00,ATBM,2015)" index="31" value="26.324108350683797"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBM00X00,ATBM,2016)" index="32" value="26.324108350683797"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBM00X00,ATBM,2017)" index="33" value="26.324108350683797"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBM00X00,ATBM,2018)" index="34" value="26.324108350683787"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBM00X00,ATBM,2019)" index="35" value="26.324108350683797"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBMCCPH1,ATE1,2042)" index="36" value="0.6636346353894057"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBMCCPH1,ATE1,2043)" index="37" value="1.3300518531620575"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBMCCPH1,ATE1,2044)" index="38" value="1.999269143206764"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBMCCPH1,ATE1,2045)" index="39" value="2.6713041901899794"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ATBMCCPH1,ATE1,2046)" index="40" value="3.4778527409138"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCO00I00,CHCO,2047)" index="41" value="69.9750212433476"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCO00I00,CHCO,2048)" index="42" value="91.45662886581977"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCO00I00,CHCO,2049)" index="43" value="76.86770297185006"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCO00I00,CHCO,2050)" index="44" value="70.86078033897608"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCO00I00,CHCO,2051)" index="45" value="53.88447040760964"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCOCHPH3,CHE1,2021)" index="46" value="19.890328147278243"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCOCHPH3,CHE1,2022)" index="47" value="23.58621982567319"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCOCHPH3,CHE1,2023)" index="48" value="29.88940241258817"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CHCOCHPH3,CHE1,2024)" index="49" value="36.16264054793611"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,BENG00I00,BENG,2016)" index="50" value="141.0"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,BGGO00X00,BGGO,2015)" index="51" value="1.423512"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CZHYDMPH2,CZE1,2015)" index="52" value="3.3637616987287244"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,CZUR00I00,CZUR,2015)" index="53" value="326.2313192401038"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,DKOCWVPH1,DKE1,2015)" index="54" value="0.0031536"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,EEOI00X00,EEOS,2015)" index="55" value="28.512108"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,ESSOUTPH2,ESE1,2015)" index="56" value="26.75595496070811"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,FIWIOFPH3,FIE1,2015)" index="57" value="0.2965811015844217"/>
+  <variable name="ProductionByTechnologyAnnual(REGION1,FRWIONPH3,FRE1,2015)" index="58" value="72.25974845531343"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_CLS,2010)" index="59" value="1.040250961"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_CLS,2011)" index="60" value="1.033029058"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_CLS,2012)" index="61" value="1.010488475"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_HEA_I,2010)" index="62" value="0.47521805"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_HEA_I,2011)" index="63" value="0.473186157"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_F_HEA_I,2012)" index="64" value="0.464106331"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_P_HCO,2010)" index="65" value="0.399179303"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_P_HCO,2011)" index="66" value="0.397804018"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,C1_P_HCO,2012)" index="67" value="0.390495285"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,XALU,2010)" index="68" value="166.2780819"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,XALU,2011)" index="69" value="166.7892412"/>
+  <variable name="UseByTechnology(Globe,ID,ALUPLANT,XALU,2012)" index="70" value="164.7837512"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_CLS,2010)" index="71" value="1.040250961"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_CLS,2011)" index="72" value="1.033029058"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_CLS,2012)" index="73" value="1.010488475"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_HEA_I,2010)" index="74" value="0.47521805"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_HEA_I,2011)" index="75" value="0.473186157"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_F_HEA_I,2012)" index="76" value="0.464106331"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_P_HCO,2010)" index="77" value="0.399179303"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_P_HCO,2011)" index="78" value="0.397804018"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,C1_P_HCO,2012)" index="79" value="0.390495285"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,XALU,2010)" index="80" value="166.2780819"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,XALU,2011)" index="81" value="166.7892412"/>
+  <variable name="UseByTechnology(Globe,IN,ALUPLANT,XALU,2012)" index="82" value="164.7837512"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_F_CLS,2011)" index="83" value="0.077227692"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_F_CLS,2012)" index="84" value="0.183885531"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_F_HEA_I,2011)" index="85" value="0.035374682"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_F_HEA_I,2012)" index="86" value="0.084456618"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_P_HCO,2010)" index="87" value="0.029739228"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_P_HCO,2011)" index="88" value="0.029739228"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,C1_P_HCO,2012)" index="89" value="0.07106111"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,XALU,2011)" index="90" value="12.46891175"/>
+  <variable name="UseByTechnology(Globe,IP,ALUPLANT,XALU,2012)" index="91" value="29.98683145"/>
+ </variables>
+</CPLEXSolution>
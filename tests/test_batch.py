@@ -0,0 +1,139 @@
+import os
+
+import pytest
+from pyam.testing import assert_iamframe_equal
+
+from osemosys2iamc import batch
+from osemosys2iamc.batch import iter_batch, load_manifest, run_batch, scenario_filename
+from osemosys2iamc.resultify import load_config, main
+
+FIXTURES = os.path.abspath(os.path.join("tests", "fixtures"))
+TRADE = os.path.join(FIXTURES, "trade")
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "scenario,inputs_path,results_path\n"
+        f"Base,{FIXTURES},{FIXTURES}\n"
+        f"Trade,{TRADE},{TRADE}\n"
+    )
+    return str(manifest)
+
+
+class TestLoadManifest:
+    def test_csv(self, manifest_path):
+
+        actual = load_manifest(manifest_path)
+
+        assert [run["scenario"] for run in actual] == ["Base", "Trade"]
+        assert actual[1]["results_path"] == TRADE
+
+    def test_yaml_relative_paths(self, tmp_path):
+
+        manifest = tmp_path / "manifest.yaml"
+        manifest.write_text(
+            "- scenario: Base\n  inputs_path: inputs\n  results_path: results\n"
+        )
+
+        actual = load_manifest(str(manifest))
+
+        assert actual == [
+            {
+                "scenario": "Base",
+                "inputs_path": str(tmp_path / "inputs"),
+                "results_path": str(tmp_path / "results"),
+            }
+        ]
+
+    def test_missing_path(self, tmp_path):
+
+        manifest = tmp_path / "manifest.yaml"
+        manifest.write_text("- scenario: Base\n  inputs_path: inputs\n")
+
+        with pytest.raises(ValueError, match="missing results_path"):
+            load_manifest(str(manifest))
+
+    def test_blank_cell(self, tmp_path):
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text("scenario,inputs_path,results_path\nA,,results\n")
+
+        with pytest.raises(ValueError, match="missing inputs_path"):
+            load_manifest(str(manifest))
+
+    def test_duplicate_scenario(self, tmp_path):
+
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text("scenario,inputs_path,results_path\nA,a,a\nA,b,b\n")
+
+        with pytest.raises(ValueError, match="Scenario A appears twice"):
+            load_manifest(str(manifest))
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_run_batch(tmp_path, n_jobs):
+
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "scenario,inputs_path,results_path\n"
+        f"Low,{TRADE},{TRADE}\n"
+        f"High,{TRADE},{TRADE}\n"
+    )
+    config = load_config(os.path.join(TRADE, "config_trade.yaml"))
+
+    actual = run_batch(config, load_manifest(str(manifest)), n_jobs=n_jobs)
+
+    assert list(actual) == ["Low", "High"]
+    for scenario, data in actual.items():
+        expected = main(dict(config, scenario=scenario), TRADE, TRADE)
+        assert_iamframe_equal(data, expected)
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_iter_batch(tmp_path, n_jobs):
+
+    manifest = [
+        dict(scenario=scenario, inputs_path=TRADE, results_path=TRADE)
+        for scenario in ["Low", "High", "Mid"]
+    ]
+    config = load_config(os.path.join(TRADE, "config_trade.yaml"))
+
+    actual = dict(iter_batch(config, manifest, n_jobs=n_jobs))
+
+    assert sorted(actual) == ["High", "Low", "Mid"]
+    for scenario, data in actual.items():
+        assert list(data.scenario) == [scenario]
+
+
+def test_iter_batch_converts_lazily(monkeypatch):
+
+    converted = []
+    monkeypatch.setattr(
+        batch, "convert_scenario", lambda plan, run: converted.append(run["scenario"])
+    )
+    manifest = [
+        dict(scenario=scenario, inputs_path=TRADE, results_path=TRADE)
+        for scenario in ["Low", "High"]
+    ]
+    config = load_config(os.path.join(TRADE, "config_trade.yaml"))
+
+    runs = iter_batch(config, manifest)
+    next(runs)
+
+    assert converted == ["Low"]
+
+
+@pytest.mark.parametrize(
+    "scenario, expected",
+    [
+        ("SSP2 Low-2.6", "SSP2 Low-2.6.xlsx"),
+        ("a/b", "a_b.xlsx"),
+        ("../up", "_up.xlsx"),
+        ("..", "_.xlsx"),
+        ("C:\\x", "C__x.xlsx"),
+    ],
+)
+def test_scenario_filename(scenario, expected):
+
+    assert scenario_filename(scenario, "xlsx") == expected
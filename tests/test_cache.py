@@ -0,0 +1,288 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from osemosys2iamc import cache as cache_module
+from osemosys2iamc import sources
+from osemosys2iamc.cache import ColumnarCache, ParameterCache, Prefetcher, ResultStore
+from osemosys2iamc.resultify import OSEMOSYS_DTYPES, read_file
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path, osemosys_param, region_name_option):
+        self.calls.append((path, osemosys_param, region_name_option))
+        return pd.DataFrame({"TECHNOLOGY": ["ATBM00X00"] * 100, "VALUE": 1.0})
+
+
+class TestParameterCache:
+    def test_parsed_once(self):
+        loader = CountingLoader()
+        cache = ParameterCache(loader)
+
+        first = cache.get("results", "TotalCapacityAnnual", "iso2_start")
+        second = cache.get("results", "TotalCapacityAnnual", "iso2_start")
+
+        assert first is second
+        assert loader.calls == [("results", "TotalCapacityAnnual", "iso2_start")]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_key_includes_region_option(self):
+        loader = CountingLoader()
+        cache = ParameterCache(loader)
+
+        cache.get("results", "TotalCapacityAnnual", "iso2_start")
+        cache.get("results", "TotalCapacityAnnual", "from_csv")
+
+        assert len(loader.calls) == 2
+
+    def test_release_after_last_use(self):
+        key_a = ("results", "A", "from_csv")
+        key_b = ("results", "B", "from_csv")
+        cache = ParameterCache(CountingLoader(), last_use={key_a: 0, key_b: 2})
+
+        cache.get(*key_a)
+        cache.get(*key_b)
+        cache.release(0)
+
+        assert key_a not in cache
+        assert key_b in cache
+
+        cache.release(2)
+        assert len(cache) == 0
+
+    def test_memory_budget(self):
+        cache = ParameterCache(CountingLoader(), max_bytes=1)
+
+        cache.get("results", "A", "from_csv")
+        cache.get("results", "B", "from_csv")
+
+        assert ("results", "A", "from_csv") not in cache
+        assert ("results", "B", "from_csv") in cache
+
+
+class TestPrefetcher:
+    keys = [("results", param, "from_csv") for param in ["A", "B", "C"]]
+
+    def test_loads_in_order(self):
+        loader = CountingLoader()
+        prefetcher = Prefetcher(loader, self.keys, threads=1)
+
+        frames = [prefetcher(*key) for key in self.keys]
+        prefetcher.close()
+
+        assert loader.calls == self.keys
+        assert all(len(df) == 100 for df in frames)
+
+    def test_window(self):
+        loader = CountingLoader()
+        prefetcher = Prefetcher(loader, self.keys, threads=1, window=2)
+
+        assert len(prefetcher._futures) == 2
+        prefetcher(*self.keys[0])
+        assert list(prefetcher._futures) == self.keys[1:]
+        prefetcher.close()
+
+    def test_out_of_order(self):
+        loader = CountingLoader()
+        prefetcher = Prefetcher(loader, self.keys, threads=1)
+
+        for key in [self.keys[2], self.keys[0], self.keys[1], self.keys[0]]:
+            prefetcher(*key)
+        prefetcher.close()
+
+        # C is loaded once when requested early, A again after its future is used
+        assert sorted(loader.calls) == [self.keys[0]] * 2 + self.keys[1:]
+
+    def test_cache_loader(self):
+        loader = CountingLoader()
+        prefetcher = Prefetcher(loader, self.keys, threads=2)
+        cache = ParameterCache(prefetcher)
+
+        for key in self.keys + self.keys:
+            cache.get(*key)
+        prefetcher.close()
+
+        assert sorted(loader.calls) == self.keys
+        assert (cache.hits, cache.misses) == (3, 3)
+
+
+class TestColumnarCache:
+    @pytest.fixture
+    def csv(self, tmp_path):
+        source = os.path.join("tests", "fixtures", "UseByTechnology.csv")
+        target = tmp_path / "UseByTechnology.csv"
+        shutil.copy(source, target)
+        return str(target)
+
+    def test_read(self, tmp_path, csv):
+        pytest.importorskip("pyarrow")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+
+        actual = cache.read(csv, ["TECHNOLOGY", "YEAR", "VALUE"])
+
+        expected = pd.read_csv(
+            csv,
+            usecols=["TECHNOLOGY", "YEAR", "VALUE"],
+            dtype={"TECHNOLOGY": "category", "YEAR": "int16"},
+        )
+        pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+        assert os.path.exists(cache.location(csv))
+
+    def test_copy_reused(self, tmp_path, csv, monkeypatch):
+        pytest.importorskip("pyarrow")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+        cache.read(csv)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV file parsed again")
+
+        monkeypatch.setattr(pd, "read_csv", fail)
+        ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES).read(csv)
+
+    def test_modified_file_invalidates_copy(self, tmp_path, csv):
+        pytest.importorskip("pyarrow")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+        before = cache.read(csv)
+
+        with open(csv, "a") as csvfile:
+            csvfile.write("Globe,ID,ALUPLANT,C1_F_CLS,2013,1.0\n")
+        os.utime(csv, ns=(0, os.stat(csv).st_mtime_ns + 1_000_000))
+
+        after = cache.read(csv)
+
+        assert len(after) == len(before) + 1
+        assert len(os.listdir(tmp_path / "cache")) == 1
+
+    def test_read_chunks(self, tmp_path, csv):
+        pytest.importorskip("pyarrow")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+
+        chunks = list(cache.read_chunks(csv, 4))
+
+        assert all(len(chunk) <= 4 for chunk in chunks)
+        assert sum(len(chunk) for chunk in chunks) == len(pd.read_csv(csv))
+
+    def test_read_file(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        folderpath = os.path.join("tests", "fixtures")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+
+        for typed in (False, True):
+            expected = read_file(
+                folderpath, "ProductionByTechnologyAnnual", "iso2_start", typed=typed
+            )
+            actual = read_file(
+                folderpath,
+                "ProductionByTechnologyAnnual",
+                "iso2_start",
+                typed=typed,
+                disk_cache=cache,
+            )
+            pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+
+    def test_clear(self, tmp_path, csv):
+        pytest.importorskip("pyarrow")
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+        cache.read(csv)
+
+        cache.clear()
+
+        assert os.listdir(tmp_path / "cache") == []
+
+    def test_values_typed_across_chunks(self, tmp_path, monkeypatch):
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(cache_module, "BUILD_CHUNKSIZE", 2)
+        csv = tmp_path / "TotalCapacityAnnual.csv"
+        csv.write_text(
+            "REGION,TECHNOLOGY,YEAR,VALUE\n"
+            "R1,ATBM00X00,2015,1\nR1,ATBM00X00,2016,2\nR1,ATBM00X00,2017,2.5\n"
+        )
+        cache = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+
+        actual = cache.read(str(csv))
+
+        assert actual["VALUE"].tolist() == [1.0, 2.0, 2.5]
+        assert actual["VALUE"].dtype == "float64"
+        assert actual["YEAR"].dtype == "int16"
+
+    def test_concurrent_builders(self, tmp_path, csv, monkeypatch):
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(cache_module, "BUILD_CHUNKSIZE", 4)
+        first = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+        second = ColumnarCache(str(tmp_path / "cache"), OSEMOSYS_DTYPES)
+        read_csv_chunks = sources.read_csv_chunks
+        interrupted = []
+
+        def interleaved(*args, **kwargs):
+            # The second builder writes the whole copy while the first is busy
+            for chunk in read_csv_chunks(*args, **kwargs):
+                yield chunk
+                if not interrupted:
+                    interrupted.append(True)
+                    second.build(csv)
+
+        monkeypatch.setattr(sources, "read_csv_chunks", interleaved)
+
+        target = first.build(csv)
+
+        assert interrupted
+        assert os.listdir(tmp_path / "cache") == [os.path.basename(target)]
+        assert len(first.read(csv)) == len(pd.read_csv(csv))
+
+
+class TestResultStore:
+    @pytest.fixture
+    def csv(self, tmp_path):
+        filename = tmp_path / "TotalCapacityAnnual.csv"
+        filename.write_text("REGION,TECHNOLOGY,YEAR,VALUE\nR1,ATBM00X00,2015,1.0\n")
+        return str(filename)
+
+    def test_round_trip(self, tmp_path, csv):
+        store = ResultStore(str(tmp_path / "store"))
+        key = store.key("entry", [csv])
+        df = pd.DataFrame({"REGION": ["Austria"], "YEAR": [2015], "VALUE": [1.0]})
+
+        assert store.get(key) is None
+        store.put(key, df)
+
+        pd.testing.assert_frame_equal(store.get(key), df)
+        assert (store.hits, store.misses) == (1, 1)
+
+    def test_key(self, tmp_path, csv):
+        store = ResultStore(str(tmp_path / "store"))
+        key = store.key("entry", [csv])
+
+        assert store.key("entry", [csv]) == key
+        assert store.key("other entry", [csv]) != key
+
+        with open(csv, "a") as csv_file:
+            csv_file.write("R1,ATNU00X00,2015,2.0\n")
+        assert store.key("entry", [csv]) != key
+
+    def test_hash_contents(self, tmp_path, csv):
+        store = ResultStore(str(tmp_path / "store"), hash_contents=True)
+        key = store.key("entry", [csv])
+        stat = os.stat(csv)
+
+        # Same size and modification time, different contents
+        with open(csv, "r") as csv_file:
+            contents = csv_file.read()
+        with open(csv, "w") as csv_file:
+            csv_file.write(contents.replace("1.0", "2.0"))
+        os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert store.key("entry", [csv]) != key
+        assert ResultStore(store.directory).key("entry", [csv]) != key
+
+    def test_clear(self, tmp_path, csv):
+        store = ResultStore(str(tmp_path / "store"))
+        key = store.key("entry", [csv])
+        store.put(key, pd.DataFrame({"VALUE": [1.0]}))
+
+        store.clear()
+
+        assert store.get(key) is None
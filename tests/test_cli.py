@@ -1,9 +1,32 @@
 from pytest import mark
 
 import os
+import sys
+import time
 from subprocess import run
 from tempfile import NamedTemporaryFile, mkdtemp
 
+# Dependencies which are slow to import and only needed by some conversions
+HEAVY_MODULES = ["pyam", "pyarrow", "duckdb", "matplotlib", "scipy", "iso3166"]
+
+
+def heavy_imports(code: str) -> str:
+    """Runs ``code`` and returns the heavy modules it imported
+
+    Modules which pandas imports itself, such as pyarrow when it is
+    installed, are not counted.
+    """
+    code = (
+        "import sys, pandas\n"
+        "loaded = set(sys.modules)\n"
+        f"{code}\n"
+        f"print(sorted(m for m in {HEAVY_MODULES!r} "
+        "if m in sys.modules and m not in loaded))"
+    )
+    actual = run([sys.executable, "-c", code], capture_output=True)
+    assert actual.returncode == 0, print(actual.stderr)
+    return actual.stdout.decode().strip().splitlines()[-1]
+
 
 class TestCLI:
     def test_convert_commands(self):
@@ -23,3 +46,178 @@ class TestCLI:
         assert expected in str(actual.stdout)
         print(" ".join(commands))
         assert actual.returncode == 0, print(actual.stdout)
+
+    def test_profile_report(self, tmp_path):
+
+        fixtures = os.path.join("tests", "fixtures")
+        config_path = os.path.join(fixtures, "config_result.yaml")
+        report = tmp_path / "profile.csv"
+
+        commands = [
+            "osemosys2iamc",
+            fixtures,
+            fixtures,
+            config_path,
+            str(tmp_path / "iamc.csv"),
+            "--profile",
+            str(report),
+            "--profile-summary",
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 0, print(actual.stderr)
+        assert "Time by phase" in actual.stdout.decode()
+        assert "write" in report.read_text()
+
+    def test_result_store_report(self, tmp_path):
+
+        fixtures = os.path.join("tests", "fixtures")
+        config_path = os.path.join(fixtures, "config_result.yaml")
+
+        commands = [
+            "osemosys2iamc",
+            fixtures,
+            fixtures,
+            config_path,
+            str(tmp_path / "iamc.csv"),
+            "--result-store",
+            str(tmp_path / "store"),
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 0, print(actual.stderr)
+        assert "Reused 0 of 1 entries" in actual.stderr.decode()
+
+    def test_solution_file(self, tmp_path):
+
+        fixtures = os.path.join("tests", "fixtures")
+        config_path = os.path.join(fixtures, "config_result.yaml")
+        solution = os.path.join(fixtures, "solutions", "cbc_solution.txt")
+        target = tmp_path / "iamc.csv"
+
+        commands = [
+            "osemosys2iamc",
+            fixtures,
+            solution,
+            config_path,
+            str(target),
+            "--solver",
+            "cbc",
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 0, print(actual.stderr)
+        assert "Capacity|Electricity" in target.read_text()
+
+    def test_batch_command(self, tmp_path):
+
+        trade = os.path.abspath(os.path.join("tests", "fixtures", "trade"))
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(
+            "scenario,inputs_path,results_path\n"
+            f"Low,{trade},{trade}\n"
+            f"High,{trade},{trade}\n"
+        )
+        config_path = os.path.join(trade, "config_trade.yaml")
+        output = tmp_path / "scenarios"
+
+        commands = [
+            "osemosys2iamc-batch",
+            str(manifest),
+            config_path,
+            str(output),
+            "--split",
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 0, print(actual.stderr)
+        assert sorted(os.listdir(output)) == ["High.xlsx", "Low.xlsx"]
+
+    def test_batch_scenario_file_names(self, tmp_path):
+
+        trade = os.path.abspath(os.path.join("tests", "fixtures", "trade"))
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(
+            "scenario,inputs_path,results_path\n"
+            f"../Low,{trade},{trade}\n"
+            f"High/1,{trade},{trade}\n"
+        )
+        config_path = os.path.join(trade, "config_trade.yaml")
+        output = tmp_path / "scenarios"
+
+        commands = [
+            "osemosys2iamc-batch",
+            str(manifest),
+            config_path,
+            str(output),
+            "--split",
+            "--format",
+            "csv",
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 0, print(actual.stderr)
+        assert sorted(os.listdir(output)) == ["High_1.csv", "_Low.csv"]
+        assert sorted(os.listdir(tmp_path)) == ["manifest.csv", "scenarios"]
+
+    def test_batch_scenario_file_name_clash(self, tmp_path):
+
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text("scenario,inputs_path,results_path\na/b,x,x\na_b,y,y\n")
+
+        commands = [
+            "osemosys2iamc-batch",
+            str(manifest),
+            str(tmp_path / "config.yaml"),
+            str(tmp_path / "scenarios"),
+            "--split",
+        ]
+
+        actual = run(commands, capture_output=True)
+        assert actual.returncode == 2
+        assert "would both be written to a_b.xlsx" in actual.stderr.decode()
+
+    @mark.parametrize("command", ["osemosys2iamc", "osemosys2iamc-batch"])
+    def test_unknown_format(self, command, tmp_path):
+
+        # The paths do not exist, the format is checked before they are read
+        missing = str(tmp_path / "missing")
+        arguments = [missing] * (2 if command == "osemosys2iamc" else 1)
+        commands = [command] + arguments + [missing, str(tmp_path / "iamc.json")]
+
+        actual = run(commands, capture_output=True)
+
+        assert actual.returncode == 2
+        assert "Cannot write" in actual.stderr.decode()
+
+    @mark.parametrize("command", ["osemosys2iamc", "osemosys2iamc-batch"])
+    @mark.parametrize("arguments, returncode", [(["--help"], 0), ([], 2)])
+    def test_usage(self, command, arguments, returncode):
+
+        start = time.perf_counter()
+        actual = run([command] + arguments, capture_output=True)
+        # Informational only, the time depends on the load of the machine
+        print(f"{command} {' '.join(arguments)}: {time.perf_counter() - start:.2f} s")
+
+        assert actual.returncode == returncode, print(actual.stderr)
+        assert f"usage: {command}" in (actual.stdout + actual.stderr).decode()
+
+    @mark.parametrize("module", ["resultify", "batch"])
+    def test_no_heavy_imports_on_help(self, module):
+
+        code = (
+            f"from osemosys2iamc.{module} import entry_point\n"
+            f"sys.argv = ['osemosys2iamc', '--help']\n"
+            f"try:\n"
+            f"    entry_point()\n"
+            f"except SystemExit:\n"
+            f"    pass"
+        )
+
+        assert heavy_imports(code) == "[]"
+
+    def test_no_heavy_imports(self):
+
+        code = "import osemosys2iamc.resultify, osemosys2iamc.batch"
+
+        assert heavy_imports(code) == "[]"
@@ -0,0 +1,144 @@
+import os
+
+import pandas as pd
+import pytest
+from pyam.testing import assert_iamframe_equal
+
+from osemosys2iamc.resultify import load_config, main
+from osemosys2iamc.synthetic import generate_results, synthetic_config
+
+FIXTURES = os.path.join("tests", "fixtures")
+
+
+@pytest.fixture
+def engine():
+    pytest.importorskip("duckdb")
+    from osemosys2iamc.engines import DuckDBEngine
+
+    engine = DuckDBEngine(threads=2)
+    yield engine
+    engine.close()
+
+
+class TestDuckDBEngine:
+    def test_supports(self, engine):
+
+        assert engine.supports(("^.{2}(BM)", "^.{6}(X0)"))
+        assert not engine.supports(("^.{2}(BM)", "(?=^.{2}(BM))^.{4}(CS)"))
+        assert not engine.supports((r"(A)\1",))
+
+    def test_totals(self, engine, tmp_path):
+
+        filename = str(tmp_path / "TotalCapacityAnnual.csv")
+        pd.DataFrame(
+            {
+                "REGION": ["REGION1"] * 4,
+                "TECHNOLOGY": ["ATBM00X00", "ATNGCCPH2", "BENGCCPH2", "ATNGCCPH2"],
+                "YEAR": [2015, 2015, 2015, 2016],
+                "VALUE": [1.0, 2.0, 3.0, 4.0],
+            }
+        ).to_csv(filename, index=False)
+
+        actual = engine.totals(
+            filename, [("TECHNOLOGY", ("NG", "^.{2}NG"))], ["TECHNOLOGY"]
+        )
+
+        expected = pd.DataFrame(
+            {
+                "TECHNOLOGY": ["ATNGCCPH2", "ATNGCCPH2", "BENGCCPH2"],
+                "YEAR": [2015, 2016, 2015],
+                "VALUE": [2.0, 4.0, 3.0],
+            }
+        )
+        actual = actual.sort_values(["TECHNOLOGY", "YEAR"], ignore_index=True)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    def test_values_after_many_integers(self, engine, tmp_path):
+
+        # DuckDB guesses the column types from the first rows only
+        filename = str(tmp_path / "TotalCapacityAnnual.csv")
+        pd.DataFrame(
+            {
+                "TECHNOLOGY": "ATNGCCPH2",
+                "YEAR": 2015,
+                "VALUE": ["1"] * 299_990 + ["1.5"] * 10,
+            }
+        ).to_csv(filename, index=False)
+
+        actual = engine.totals(filename, [("TECHNOLOGY", ("^.{2}NG",))], [])
+
+        assert actual.VALUE.tolist() == [299_990 + 15.0]
+
+    def test_file_not_copied(self, engine, tmp_path):
+
+        filename = str(tmp_path / "TotalCapacityAnnual.csv")
+        pd.DataFrame(
+            {"TECHNOLOGY": ["ATNGCCPH2"], "YEAR": [2015], "VALUE": [2.0]}
+        ).to_csv(filename, index=False)
+
+        engine.totals(filename, [("TECHNOLOGY", ("^.{2}NG",))], [])
+
+        tables = engine.connection.execute("SELECT * FROM duckdb_tables()").df()
+        assert tables.empty
+
+    def test_totals_keep_duplicates(self, engine, tmp_path):
+
+        filename = str(tmp_path / "TotalCapacityAnnual.csv")
+        pd.DataFrame(
+            {
+                "TECHNOLOGY": ["ATNGCCPH2", "ATCOSTPH3"],
+                "YEAR": [2015, 2015],
+                "VALUE": [2.0, 5.0],
+            }
+        ).to_csv(filename, index=False)
+        filters = [("TECHNOLOGY", ("^.{2}NG", "^.{4}CC", "^.{2}CO"))]
+
+        actual = engine.totals(filename, filters, [], keep_duplicates=True)
+
+        assert actual.VALUE.tolist() == [2 * 2.0 + 5.0]
+
+
+class TestMainEngine:
+    @pytest.mark.parametrize(
+        "config_name",
+        ["config_result.yaml", "config_result_capture.yaml", "config_input.yaml"],
+    )
+    def test_same_output(self, engine, config_name):
+
+        config = load_config(os.path.join(FIXTURES, config_name))
+
+        actual = main(config, FIXTURES, FIXTURES, engine="duckdb")
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    @pytest.mark.parametrize("region", ["iso2_start", "from_csv", "Europe"])
+    @pytest.mark.parametrize("keep_duplicates", [False, True])
+    def test_synthetic(self, engine, tmp_path, region, keep_duplicates):
+
+        generate_results(str(tmp_path), countries=3, technologies=30, years=3)
+        config = synthetic_config(entries=4)
+        config.update(region=region, keep_duplicate_matches=keep_duplicates)
+        path = str(tmp_path)
+
+        actual = main(config, path, path, engine="duckdb")
+
+        assert_iamframe_equal(actual, main(config, path, path))
+
+    def test_parquet_copies(self, engine, tmp_path):
+
+        pytest.importorskip("pyarrow")
+        config = load_config(os.path.join(FIXTURES, "config_result.yaml"))
+        cache_dir = str(tmp_path / "cache")
+
+        actual = main(config, FIXTURES, FIXTURES, cache_dir=cache_dir, engine="duckdb")
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+        assert os.listdir(cache_dir)
+
+
+def test_unknown_engine():
+
+    config = load_config(os.path.join(FIXTURES, "config_result.yaml"))
+
+    with pytest.raises(ValueError, match="Unknown engine spark"):
+        main(config, FIXTURES, FIXTURES, engine="spark")
@@ -1,9 +1,16 @@
-from osemosys2iamc.resultify import main
+from osemosys2iamc.plan import compile_config
+from osemosys2iamc.resultify import (
+    main,
+    read_file as resultify_read_file,
+    schedule_entries,
+)
 import os
+import shutil
 from yaml import load, SafeLoader
 from pyam import IamDataFrame
 from pyam.testing import assert_iamframe_equal
 import pandas as pd
+import pytest
 
 
 def test_main_input():
@@ -151,3 +158,378 @@ def test_main_trade():
     )
 
     assert_iamframe_equal(actual, expected)
+
+
+def test_main_reads_parameter_once(monkeypatch):
+
+    inputs = os.path.join("tests", "fixtures")
+    results = os.path.join("tests", "fixtures")
+
+    config = {
+        "model": "OSeMBE v1.0.0",
+        "scenario": "DIAG-C400-lin-ResidualFossil",
+        "region": "iso2_start",
+        "results": [
+            {
+                "iamc_variable": "Capacity|Electricity|Hydro",
+                "capacity": ["^.{2}(HY)"],
+                "unit": "GW",
+                "osemosys_param": "TotalCapacityAnnual",
+            },
+            {
+                "iamc_variable": "Capacity|Electricity|Nuclear",
+                "capacity": ["^.{2}(NU)"],
+                "unit": "GW",
+                "osemosys_param": "TotalCapacityAnnual",
+            },
+        ],
+    }
+
+    calls = []
+
+    def read_file(path, osemosys_param, region_name_option, **kwargs):
+        calls.append(osemosys_param)
+        return resultify_read_file(path, osemosys_param, region_name_option, **kwargs)
+
+    monkeypatch.setattr("osemosys2iamc.resultify.read_file", read_file)
+
+    actual = main(config, inputs, results)
+
+    assert calls == ["TotalCapacityAnnual"]
+    assert sorted(actual.variable) == [
+        "Capacity|Electricity|Hydro",
+        "Capacity|Electricity|Nuclear",
+    ]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"chunksize": 2},
+        {"n_jobs": 2},
+        {"prefetch": 2, "max_cache_bytes": 1},
+    ],
+)
+@pytest.mark.parametrize(
+    "config_path",
+    [
+        os.path.join("tests", "fixtures", "config_input.yaml"),
+        os.path.join("tests", "fixtures", "config_result.yaml"),
+        os.path.join("tests", "fixtures", "config_result_capture.yaml"),
+        os.path.join("tests", "fixtures", "trade", "config_trade.yaml"),
+    ],
+)
+def test_main_options(options, config_path):
+
+    # Each config reads the files of its own folder
+    path = os.path.dirname(config_path)
+
+    with open(config_path, "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+
+    expected = main(config, path, path)
+    actual = main(config, path, path, **options)
+
+    assert_iamframe_equal(actual, expected)
+
+
+def test_main_cache_dir(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    config = os.path.join("tests", "fixtures", "config_result.yaml")
+    inputs = os.path.join("tests", "fixtures")
+    results = os.path.join("tests", "fixtures")
+
+    with open(config, "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+
+    expected = main(config, inputs, results)
+    cache_dir = str(tmp_path / "cache")
+
+    first = main(config, inputs, results, cache_dir=cache_dir)
+    second = main(config, inputs, results, cache_dir=cache_dir, chunksize=3)
+
+    assert len(os.listdir(cache_dir)) == 1
+    assert_iamframe_equal(first, expected)
+    assert_iamframe_equal(second, expected)
+
+
+def test_main_pyarrow_parser():
+    pytest.importorskip("pyarrow")
+
+    config = os.path.join("tests", "fixtures", "config_result.yaml")
+    path = os.path.join("tests", "fixtures")
+
+    with open(config, "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+
+    expected = main(config, path, path)
+    actual = main(config, path, path, parser="pyarrow", prefetch=1)
+
+    assert_iamframe_equal(actual, expected)
+
+
+def test_main_unknown_parser():
+
+    config = os.path.join("tests", "fixtures", "config_result.yaml")
+    path = os.path.join("tests", "fixtures")
+
+    with open(config, "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+
+    with pytest.raises(ValueError, match="Unknown parser python"):
+        main(config, path, path, parser="python")
+
+
+def test_schedule_entries_groups_parameters():
+    def entry(param):
+        return {
+            "iamc_variable": "Variable",
+            "unit": "GW",
+            "osemosys_param": param,
+            "capacity": ["^.*$"],
+        }
+
+    config = {
+        "model": "OSeMBE v1.0.0",
+        "scenario": "DIAG-C400-lin-ResidualFossil",
+        "region": "iso2_start",
+        "inputs": [
+            {
+                "iamc_variable": "Price",
+                "unit": "MEUR_2015/PJ",
+                "osemosys_param": "VariableCost",
+                "variable_cost": ["^.*$"],
+            },
+            {
+                "iamc_variable": "Fixed Cost",
+                "unit": "MEUR_2015/GW",
+                "osemosys_param": "FixedCost",
+                "variable_cost": ["^.*$"],
+            },
+        ],
+        "results": [
+            entry("ProductionByTechnologyAnnual"),
+            entry("VariableCost"),
+            {
+                "iamc_variable": "Trade",
+                "unit": "PJ/yr",
+                "osemosys_param": ["UseByTechnology", "ProductionByTechnologyAnnual"],
+                "trade_tech": ["^.*$"],
+            },
+            entry("AnnualEmissions"),
+        ],
+    }
+    plan = compile_config(config)
+
+    actual = schedule_entries(plan, 2)
+
+    assert actual == [[0, 1, 3], [2, 4, 5]]
+    assert schedule_entries(plan, 1) == [[0, 1, 2, 3, 4, 5]]
+    assert len(schedule_entries(plan, 10)) == 4
+
+
+@pytest.mark.parametrize("chunksize", [None, 5])
+def test_main_shared_filters(chunksize):
+
+    path = os.path.join("tests", "fixtures")
+    entries = [
+        {
+            "iamc_variable": f"Capacity|Electricity|{name}",
+            "capacity": patterns,
+            "unit": "GW",
+            "osemosys_param": "TotalCapacityAnnual",
+        }
+        for name, patterns in [
+            ("Hydro", ["^.{2}(HY)"]),
+            ("Nuclear", ["^.{2}(NU)"]),
+            ("Other", ["^.{2}(HY)", "^((?!(EL)|(00)).)*$"]),
+        ]
+    ]
+    entries.append(
+        {
+            "iamc_variable": "Final Energy|Electricity",
+            "demand": ["^.{2}(E2)"],
+            "unit": "PJ/yr",
+            "osemosys_param": "Demand",
+        }
+    )
+    config = {
+        "model": "OSeMBE v1.0.0",
+        "scenario": "DIAG-C400-lin-ResidualFossil",
+        "region": "iso2_start",
+        "results": entries,
+    }
+
+    actual = main(config, path, path, chunksize=chunksize)
+
+    for entry in entries:
+        expected = main(dict(config, results=[entry]), path, path)
+        assert_iamframe_equal(actual.filter(variable=entry["iamc_variable"]), expected)
+
+
+def test_main_result_store(tmp_path, caplog, capsys, monkeypatch):
+
+    fixtures = os.path.join("tests", "fixtures")
+    path = str(tmp_path / "results")
+    shutil.copytree(fixtures, path)
+    store = str(tmp_path / "store")
+
+    with open(os.path.join(fixtures, "config_result.yaml"), "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+    config["results"].append(
+        {
+            "iamc_variable": "Final Energy|Electricity",
+            "demand": ["^.{2}(E2)"],
+            "unit": "PJ/yr",
+            "osemosys_param": "Demand",
+        }
+    )
+
+    caplog.set_level("INFO", logger="osemosys2iamc.resultify")
+    expected = main(config, path, path)
+
+    first = main(config, path, path, result_store=store)
+    assert "Reused 0 of 2 entries" in caplog.text
+    assert capsys.readouterr().out == ""
+
+    calls = []
+
+    def read_file(path, osemosys_param, region_name_option, **kwargs):
+        calls.append(osemosys_param)
+        return resultify_read_file(path, osemosys_param, region_name_option, **kwargs)
+
+    monkeypatch.setattr("osemosys2iamc.resultify.read_file", read_file)
+
+    caplog.clear()
+    second = main(config, path, path, result_store=store)
+    assert "Reused 2 of 2 entries" in caplog.text
+    assert calls == []
+
+    demand = pd.read_csv(os.path.join(path, "Demand.csv"))
+    demand["VALUE"] *= 2
+    demand.to_csv(os.path.join(path, "Demand.csv"), index=False)
+    config["results"][0]["iamc_variable"] = "Capacity|Electricity|All"
+
+    caplog.clear()
+    third = main(config, path, path, result_store=store)
+    assert "Reused 1 of 2 entries" in caplog.text
+    assert calls == ["Demand"]
+
+    assert_iamframe_equal(first, expected)
+    assert_iamframe_equal(second, expected)
+    assert sorted(third.variable) == [
+        "Capacity|Electricity|All",
+        "Final Energy|Electricity",
+    ]
+    assert third.filter(variable="Final Energy|*").data.value.sum() == pytest.approx(
+        2 * expected.filter(variable="Final Energy|*").data.value.sum()
+    )
+
+
+@pytest.fixture
+def reg_tech_inputs(tmp_path):
+    pd.DataFrame({"VALUE": [2015, 2016, 2017]}).to_csv(
+        tmp_path / "YEAR.csv", index=False
+    )
+    pd.DataFrame(
+        {
+            "REGION": ["REGION1"] * 3,
+            "TECHNOLOGY": ["ATNGCCPH2", "BENGCCPH2", "ATCOSTPH3"],
+            "VALUE": [30.0, 25.0, 40.0],
+        }
+    ).to_csv(tmp_path / "OperationalLife.csv", index=False)
+    return str(tmp_path)
+
+
+def reg_tech_config(**entry):
+    return {
+        "model": "m",
+        "scenario": "s",
+        "region": "iso2_start",
+        "inputs": [
+            {
+                "iamc_variable": "Lifetime|Electricity|Gas",
+                "reg_tech_param": ["^.{2}NG"],
+                "unit": "yr",
+                "osemosys_param": "OperationalLife",
+                **entry,
+            }
+        ],
+    }
+
+
+def test_main_reg_tech_param(reg_tech_inputs):
+
+    actual = main(reg_tech_config(), reg_tech_inputs, reg_tech_inputs)
+
+    expected = IamDataFrame(
+        pd.DataFrame(
+            [
+                [region, year, value]
+                for region, value in [("Austria", 30.0), ("Belgium", 25.0)]
+                for year in [2015, 2016, 2017]
+            ],
+            columns=["region", "year", "value"],
+        ),
+        model="m",
+        scenario="s",
+        variable="Lifetime|Electricity|Gas",
+        unit="yr",
+    )
+    assert_iamframe_equal(actual, expected)
+
+
+def test_main_reg_tech_param_years(reg_tech_inputs):
+
+    config = reg_tech_config(years=[2015, 2017])
+
+    actual = main(config, reg_tech_inputs, reg_tech_inputs)
+
+    assert actual.year == [2015, 2017]
+    assert len(actual) == 4
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"chunksize": 2},
+        {"n_jobs": 2},
+        {"prefetch": 2},
+        {"engine": "duckdb"},
+    ],
+)
+@pytest.mark.parametrize(
+    "config_name,years,regions",
+    [
+        ("config_result.yaml", [2015, 2026], ["Austria", "Belgium", "France"]),
+        ("config_result_capture.yaml", {"start": 2026, "end": 2026}, ["Belgium"]),
+    ],
+)
+def test_main_selection(options, config_name, years, regions):
+    if options.get("engine") == "duckdb":
+        pytest.importorskip("duckdb")
+
+    path = os.path.join("tests", "fixtures")
+    with open(os.path.join(path, config_name), "r") as config_file:
+        config = load(config_file, Loader=SafeLoader)
+
+    expected = main(config, path, path).filter(
+        year=compile_config({**config, "years": years}).years, region=regions
+    )
+    actual = main({**config, "years": years, "regions": regions}, path, path, **options)
+
+    assert len(actual) > 0
+    assert_iamframe_equal(actual, expected)
+
+
+def test_main_reg_tech_param_selection(reg_tech_inputs):
+
+    config = reg_tech_config()
+    config.update(years=[2016, 2017, 2030], regions=["Belgium"])
+
+    actual = main(config, reg_tech_inputs, reg_tech_inputs)
+
+    assert actual.region == ["Belgium"]
+    assert actual.year == [2016, 2017]
@@ -0,0 +1,261 @@
+import os
+import pickle
+
+import pytest
+
+from osemosys2iamc.plan import UNIT_CONVERSIONS, EntryPlan, Plan, compile_config
+from osemosys2iamc.resultify import load_config, main
+
+FIXTURES = os.path.join("tests", "fixtures")
+
+
+@pytest.fixture
+def config():
+    return {
+        "model": "OSeMBE v1.0.0",
+        "scenario": "DIAG-C400-lin-ResidualFossil",
+        "region": "iso2_start",
+        "results": [
+            {
+                "iamc_variable": "Capacity|Electricity",
+                "capacity": ["^((?!(EL)|(00)).)*$"],
+                "unit": "GW",
+                "osemosys_param": "TotalCapacityAnnual",
+            },
+        ],
+    }
+
+
+class TestCompileConfig:
+    def test_result_entry(self, config):
+
+        actual = compile_config(config)
+
+        assert actual == Plan(
+            model="OSeMBE v1.0.0",
+            scenario="DIAG-C400-lin-ResidualFossil",
+            region="iso2_start",
+            entries=(
+                EntryPlan(
+                    position=0,
+                    section="results",
+                    variable="Capacity|Electricity",
+                    unit="GW",
+                    parameters=("TotalCapacityAnnual",),
+                    kernel="filter_capacity",
+                    arguments=(
+                        ("technologies", ("^((?!(EL)|(00)).)*$",)),
+                        ("keep_duplicates", False),
+                    ),
+                    columns=("TECHNOLOGY",),
+                ),
+            ),
+        )
+
+    def test_trade_entry(self):
+
+        config = load_config(os.path.join(FIXTURES, "trade", "config_trade.yaml"))
+
+        (actual,) = compile_config(config).entries
+
+        assert actual.parameters == ("UseByTechnology", "ProductionByTechnologyAnnual")
+        assert actual.net_trade
+
+    def test_reg_tech_param(self, config):
+
+        config["inputs"] = [
+            {
+                "iamc_variable": "Lifetime",
+                "reg_tech_param": ["^.*$"],
+                "unit": "yr",
+                "osemosys_param": "OperationalLife",
+            }
+        ]
+
+        actual = compile_config(config).entries[0]
+
+        assert actual.kernel == "filter_technologies"
+        assert actual.expand_years and not actual.aggregated
+        assert actual.columns is None
+        assert compile_config(config).entries[1].position == 1
+
+    def test_reg_tech_param_years(self, config):
+
+        config["inputs"] = [
+            {
+                "iamc_variable": "Lifetime",
+                "reg_tech_param": ["^.*$"],
+                "years": [2020, 2030],
+                "unit": "yr",
+                "osemosys_param": "OperationalLife",
+            }
+        ]
+
+        assert compile_config(config).entries[0].years == (2020, 2030)
+
+        config["inputs"][0]["years"] = "2020"
+        with pytest.raises(ValueError, match="`years` key of entry Lifetime"):
+            compile_config(config)
+
+    def test_picklable(self):
+
+        plan = compile_config(load_config(os.path.join(FIXTURES, "config_input.yaml")))
+
+        assert pickle.loads(pickle.dumps(plan)) == plan
+
+    def test_reports_all_errors(self, config):
+
+        del config["model"]
+        config["results"].append(
+            {
+                "iamc_variable": "Final Energy",
+                "demand": ["(unclosed"],
+                "unit": "PJ/yr",
+                "osemosys_param": "Demand",
+            }
+        )
+        config["results"].append(
+            {
+                "iamc_variable": "Secondary Energy",
+                "fuel": ["^.*$"],
+                "unit": "PJ/yr",
+                "osemosys_param": "UseByTechnology",
+            }
+        )
+
+        with pytest.raises(ValueError) as ex:
+            compile_config(config)
+
+        message = str(ex.value)
+        assert "The `model` key must be a string" in message
+        assert "Invalid pattern '(unclosed' in the `demand` key" in message
+        assert "The `technology` key of entry Secondary Energy" in message
+
+    def test_invalid_region(self, config):
+
+        config["region"] = "iso4_start"
+
+        with pytest.raises(ValueError, match="Invalid ISO type"):
+            compile_config(config)
+
+    def test_unknown_filter(self, config):
+
+        del config["results"][0]["capacity"]
+
+        with pytest.raises(
+            ValueError, match=r"Capacity\|Electricity has no filter key"
+        ):
+            compile_config(config)
+
+
+class TestSelection:
+    def test_default(self, config):
+
+        actual = compile_config(config)
+
+        assert actual.years is None and actual.regions is None
+
+    def test_years_range(self, config):
+
+        config["years"] = {"start": 2020, "end": 2060, "step": 10}
+        config["regions"] = ["Austria", "Belgium"]
+
+        actual = compile_config(config)
+
+        assert actual.years == (2020, 2030, 2040, 2050, 2060)
+        assert actual.regions == ("Austria", "Belgium")
+
+    def test_years_list(self, config):
+
+        config["years"] = [2030, 2020, 2030]
+
+        assert compile_config(config).years == (2020, 2030)
+
+    def test_invalid(self, config):
+
+        config["years"] = {"start": 2060, "end": 2020}
+        config["regions"] = "Austria"
+
+        with pytest.raises(ValueError) as excinfo:
+            compile_config(config)
+
+        message = str(excinfo.value)
+        assert "`end` after `start`" in message
+        assert "The `regions` key must be a list of region names" in message
+
+    def test_invalid_range_keys(self, config):
+
+        config["years"] = {"start": 2020, "stop": 2060}
+
+        with pytest.raises(ValueError, match="integer `start`, `end` and `step`"):
+            compile_config(config)
+
+
+class TestUnitConversions:
+    def test_defaults(self, config):
+
+        actual = compile_config(config)
+
+        assert dict(actual.unit_conversions) == UNIT_CONVERSIONS
+
+    def test_rules_in_config(self, config):
+
+        config["unit_conversions"] = {
+            "GW": {"to": "MW", "factor": 1000},
+            "PJ/yr": {"to": "TWh/yr", "factor": 277.78},
+        }
+
+        actual = dict(compile_config(config).unit_conversions)
+
+        assert actual["GW"] == ("MW", 1000.0)
+        assert actual["PJ/yr"] == ("TWh/yr", 277.78)
+        assert actual["ktCO2/yr"] == UNIT_CONVERSIONS["ktCO2/yr"]
+
+    def test_rules_in_file(self, config, tmp_path):
+
+        units = tmp_path / "units.yaml"
+        units.write_text("GW: {to: MW, factor: 1000}\n")
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(
+            "model: m\nscenario: s\nregion: Austria\nunit_conversions: units.yaml\n"
+        )
+
+        actual = compile_config(load_config(str(config_path)))
+
+        assert dict(actual.unit_conversions)["GW"] == ("MW", 1000.0)
+
+    def test_invalid_rules(self, config):
+
+        config["unit_conversions"] = {"GW": {"to": "MW", "factor": "1000"}}
+
+        with pytest.raises(ValueError, match="unit GW needs a numeric `factor`"):
+            compile_config(config)
+
+    def test_missing_file(self, config):
+
+        config["unit_conversions"] = os.path.join(FIXTURES, "missing.yaml")
+
+        with pytest.raises(ValueError, match="Cannot read the unit conversions"):
+            compile_config(config)
+
+    def test_main_converts_units(self, config):
+
+        config["unit_conversions"] = {"GW": {"to": "MW", "factor": 1000}}
+
+        actual = main(config, FIXTURES, FIXTURES)
+        expected = main(
+            compile_config({**config, "unit_conversions": None}), FIXTURES, FIXTURES
+        )
+
+        assert actual.unit == ["MW"]
+        assert actual.data.value.tolist() == [
+            1000 * value for value in expected.data.value
+        ]
+
+
+def test_main_fails_before_reading(config):
+
+    config["results"][0]["transform"] = "log"
+
+    with pytest.raises(ValueError, match="unknown transform log"):
+        main(config, "missing_inputs", "missing_results")
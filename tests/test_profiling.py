@@ -0,0 +1,127 @@
+import json
+import os
+
+import pandas as pd
+from pyam.testing import assert_iamframe_equal
+from yaml import load, SafeLoader
+
+from osemosys2iamc import profiling
+from osemosys2iamc.profiling import Profiler
+from osemosys2iamc.resultify import main
+
+
+def load_fixture_config(name: str):
+    with open(os.path.join("tests", "fixtures", name), "r") as config_file:
+        return load(config_file, Loader=SafeLoader)
+
+
+class TestProfiler:
+    def test_phase_without_profiler(self):
+
+        with profiling.phase("load") as measures:
+            measures["rows_out"] = 3
+
+        assert profiling.active() is None
+
+    def test_records_phases_by_entry(self):
+
+        with Profiler() as profiler:
+            with profiling.entry("Capacity"):
+                with profiling.phase("filter", rows_in=10, patterns=2) as measures:
+                    measures["rows_out"] = 4
+                with profiling.phase("filter", rows_in=5, patterns=1) as measures:
+                    measures["rows_out"] = 1
+            with profiling.phase("write"):
+                pass
+
+        assert profiling.active() is None
+        report = profiler.report()
+        assert report[["entry", "phase", "calls"]].values.tolist() == [
+            ["Capacity", "filter", 2],
+            ["", "write", 1],
+        ]
+        filter_phase = report.iloc[0]
+        assert filter_phase.rows_in == 15
+        assert filter_phase.rows_out == 5
+        assert filter_phase.patterns == 2
+
+    def test_peak_memory(self):
+
+        with Profiler() as profiler:
+            with profiling.phase("load"):
+                data = bytearray(8 * 2**20)
+                del data
+            with profiling.phase("filter"):
+                pass
+
+        report = profiler.report().set_index("phase")
+        assert report.loc["load", "peak_mb"] > 7.5
+        assert report.loc["filter", "peak_mb"] < 1
+
+    def test_merge(self):
+
+        with Profiler() as worker:
+            with profiling.entry("Capacity"), profiling.phase("load"):
+                pass
+
+        profiler = Profiler()
+        profiler.merge(list(worker.records.values()))
+        profiler.merge(list(worker.records.values()))
+
+        report = profiler.report()
+        assert report.calls.tolist() == [2]
+
+    def test_write(self, tmp_path):
+
+        with Profiler() as profiler:
+            with profiling.entry("Capacity"), profiling.phase("load") as measures:
+                measures["rows_out"] = 14
+
+        profiler.write(str(tmp_path / "profile.csv"))
+        profiler.write(str(tmp_path / "profile.json"))
+
+        csv = pd.read_csv(tmp_path / "profile.csv")
+        assert csv.columns.tolist() == profiling.REPORT_COLUMNS
+        with open(tmp_path / "profile.json") as report_file:
+            records = json.load(report_file)
+        assert records[0]["entry"] == "Capacity"
+        assert records[0]["rows_out"] == 14
+
+
+class TestProfileMain:
+    def test_main_phases(self):
+
+        config = load_fixture_config("config_result.yaml")
+        fixtures = os.path.join("tests", "fixtures")
+
+        with Profiler() as profiler:
+            actual = main(config, fixtures, fixtures)
+
+        assert_iamframe_equal(actual, main(config, fixtures, fixtures))
+        report = profiler.report()
+        phases = report[report.entry == "Capacity|Electricity"].phase.tolist()
+        assert phases == ["load", "region tagging", "filter", "aggregate"]
+        assert report[report.entry == ""].phase.tolist() == [
+            "unit conversion",
+            "pyam build",
+        ]
+        assert "No phases" not in profiler.summary()
+
+    def test_main_jobs(self):
+
+        config = load_fixture_config("config_result.yaml")
+        production = dict(
+            config["results"][0],
+            iamc_variable="Secondary Energy|Electricity",
+            unit="PJ/yr",
+            osemosys_param="ProductionByTechnologyAnnual",
+        )
+        config["results"].append(production)
+        fixtures = os.path.join("tests", "fixtures")
+
+        with Profiler() as profiler:
+            main(config, fixtures, fixtures, n_jobs=2)
+
+        # The entries read different parameters, so run in different workers
+        entries = set(profiler.report().entry)
+        assert entries == {"", "Capacity|Electricity", "Secondary Energy|Electricity"}
@@ -1,15 +1,25 @@
 from datetime import date
+import numpy as np
 import pandas as pd
 import os
 import pytest
+from pyam import IamDataFrame
+from pyam.testing import assert_iamframe_equal
 from osemosys2iamc.resultify import (
     filter_technology_fuel,
     filter_emission_tech,
     filter_final_energy,
     filter_capacity,
+    filter_regex,
     calculate_trade,
     read_file,
+    read_file_chunks,
+    combine_chunks,
     iso_to_country,
+    region_names,
+    assemble,
+    expand_years,
+    filter_shared,
 )
 
 
@@ -121,6 +131,109 @@ class TestFilter:
         pd.testing.assert_frame_equal(actual, expected)
 
 
+class TestFilterRegex:
+
+    data = pd.DataFrame(
+        [
+            ["Austria", "ATBM00X00", 2015, 1.0],
+            ["Austria", "ATBMCSPN2", 2015, 2.0],
+            ["Austria", "ATNG00I00", 2015, 4.0],
+        ],
+        columns=["REGION", "TECHNOLOGY", "YEAR", "VALUE"],
+    )
+
+    def test_overlapping_patterns_match_once(self):
+        actual = filter_regex(self.data, ["^.{2}(BM)", "^.{4}(00)"], "TECHNOLOGY")
+
+        expected = self.data.iloc[[0, 1, 2]]
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_keep_duplicates(self):
+        actual = filter_regex(
+            self.data, ["^.{2}(BM)", "^.{4}(00)"], "TECHNOLOGY", keep_duplicates=True
+        )
+
+        expected = self.data.iloc[[0, 1, 0, 2]]
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_capacity_sums_overlap_once(self):
+        actual = filter_capacity(self.data, ["^.{2}(BM)", "(?=^.{2}(BM))^.{4}(00)"])
+
+        expected = pd.DataFrame(
+            [["Austria", 2015, 3.0]], columns=["REGION", "YEAR", "VALUE"]
+        )
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_backreference_pattern(self):
+        actual = filter_regex(self.data, [r"^AT(B)M.*", r"^..(N)\1?G"], "TECHNOLOGY")
+
+        expected = self.data
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_categorical_column(self):
+        data = self.data.astype({"TECHNOLOGY": "category"})
+
+        actual = filter_regex(data, ["^.{2}(BM)"], "TECHNOLOGY")
+
+        expected = data.iloc[[0, 1]]
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_missing_values_never_match(self):
+        data = pd.DataFrame({"FUEL": ["ATE2", None, "BEE2"], "VALUE": [1.0, 2.0, 3.0]})
+
+        actual = filter_regex(data, ["^.*$"], "FUEL")
+
+        expected = data.iloc[[0, 2]]
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_no_patterns(self):
+        actual = filter_regex(self.data, [], "TECHNOLOGY")
+
+        assert actual.empty
+
+
+class TestFilterShared:
+
+    pattern_lists = [
+        ("^.{2}(BM)", "^.{4}(00)"),
+        ("^.{2}(NU)",),
+        ("^.{2}(HY)", "^((?!(EL)|(00)).)*$"),
+        ("^XX",),
+    ]
+
+    @pytest.mark.parametrize("typed", [False, True])
+    @pytest.mark.parametrize("keep_duplicates", [False, True])
+    def test_matches_filter_capacity(self, typed, keep_duplicates):
+        folderpath = os.path.join("tests", "fixtures")
+        data = read_file(
+            folderpath, "ProductionByTechnologyAnnual", "iso2_start", typed=typed
+        )
+        data.loc[data.index[::7], "VALUE"] = float("nan")
+
+        actual = filter_shared(data, "TECHNOLOGY", self.pattern_lists, keep_duplicates)
+
+        assert len(actual) == len(self.pattern_lists)
+        for frame, patterns in zip(actual, self.pattern_lists):
+            expected = filter_capacity(data, list(patterns), keep_duplicates)
+            pd.testing.assert_frame_equal(
+                frame.reset_index(drop=True), expected.reset_index(drop=True)
+            )
+
+    def test_empty(self):
+        data = pd.DataFrame(columns=["REGION", "FUEL", "YEAR", "VALUE"])
+
+        actual = filter_shared(data, "FUEL", [("^.*$",)])
+
+        assert actual[0].empty
+        assert list(actual[0].columns) == ["REGION", "YEAR", "VALUE"]
+
+
 class TestEnergy:
     def test_filter_capacity(self):
         folderpath = os.path.join("tests", "fixtures")
@@ -144,7 +257,7 @@ class TestEnergy:
             ["Austria", 2019, 26.324108350683794],
             ["Belgium", 2016, 141.0],
             ["Bulgaria", 2015, 1.423512],
-            ["Czechia", 2015, 329.5950809],
+            ["Czech Republic", 2015, 329.5950809],
             ["Denmark", 2015, 0.0031536],
             ["Estonia", 2015, 28.512108],
             ["Finland", 2015, 0.296581102],
@@ -236,7 +349,7 @@ class TestEnergy:
         actual = filter_capacity(input_data, technologies)
 
         data = [
-            ["Czechia", 2015, 3.3637616987287244],
+            ["Czech Republic", 2015, 3.3637616987287244],
         ]
 
         expected = pd.DataFrame(data=data, columns=["REGION", "YEAR", "VALUE"])
@@ -250,7 +363,7 @@ class TestEnergy:
         actual = filter_capacity(input_data, technologies)
 
         data = [
-            ["Czechia", 2015, 326.2313192401038],
+            ["Czech Republic", 2015, 326.2313192401038],
         ]
 
         expected = pd.DataFrame(data=data, columns=["REGION", "YEAR", "VALUE"])
@@ -372,7 +485,7 @@ class TestCapacity:
             ["Belgium", 2016, 0.184866],
             ["Bulgaria", 2015, 4.141],
             ["Cyprus", 2015, 0.3904880555817921],
-            ["Czechia", 2015, 0.299709],
+            ["Czech Republic", 2015, 0.299709],
             ["Denmark", 2015, 0.0005],
             ["Estonia", 2015, 0.006],
             ["Finland", 2015, 0.0263],
@@ -459,7 +572,7 @@ class TestCapacity:
         actual = filter_capacity(input_data, technologies)
 
         data = [
-            ["Czechia", 2015, 0.299709],
+            ["Czech Republic", 2015, 0.299709],
         ]
 
         expected = pd.DataFrame(data=data, columns=["REGION", "YEAR", "VALUE"])
@@ -559,6 +672,225 @@ class TestPrice:
         pd.testing.assert_frame_equal(actual, expected)
 
 
+class TestReadFile:
+    def test_typed(self):
+        folderpath = os.path.join("tests", "fixtures")
+        actual = read_file(folderpath, "UseByTechnology", "from_csv", typed=True)
+
+        assert isinstance(actual["TECHNOLOGY"].dtype, pd.CategoricalDtype)
+        assert isinstance(actual["REGION"].dtype, pd.CategoricalDtype)
+        assert actual["YEAR"].dtype == "int16"
+        assert actual["VALUE"].dtype == "float64"
+
+    def test_typed_region_name(self):
+        folderpath = os.path.join("tests", "fixtures")
+        actual = read_file(folderpath, "TotalCapacityAnnual", "Europe", typed=True)
+
+        assert isinstance(actual["REGION"].dtype, pd.CategoricalDtype)
+        assert set(actual["REGION"]) == {"Europe"}
+
+    def test_float32(self):
+        folderpath = os.path.join("tests", "fixtures")
+        actual = read_file(folderpath, "UseByTechnology", "from_csv", float32=True)
+
+        assert actual["VALUE"].dtype == "float32"
+
+    def test_columns(self):
+        folderpath = os.path.join("tests", "fixtures")
+        actual = read_file(
+            folderpath, "UseByTechnology", "iso2_start", columns=["TECHNOLOGY"]
+        )
+
+        assert list(actual.columns) == ["TECHNOLOGY", "FUEL", "YEAR", "VALUE", "REGION"]
+
+    def test_columns_from_csv(self):
+        folderpath = os.path.join("tests", "fixtures")
+        actual = read_file(folderpath, "UseByTechnology", "from_csv", columns=["FUEL"])
+
+        assert list(actual.columns) == ["REGION", "FUEL", "YEAR", "VALUE"]
+
+    def test_typed_filter_matches_untyped(self):
+        folderpath = os.path.join("tests", "fixtures")
+        technologies = ["^.{6}(I0)", "^.{6}(X0)", "^.{2}(HY)", "^.{2}(WI)"]
+
+        untyped = read_file(folderpath, "ProductionByTechnologyAnnual", "iso2_start")
+        typed = read_file(
+            folderpath,
+            "ProductionByTechnologyAnnual",
+            "iso2_start",
+            columns=["TECHNOLOGY"],
+            typed=True,
+        )
+
+        expected = filter_capacity(untyped, technologies)
+        actual = filter_capacity(typed, technologies)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+
+class TestSelectRows:
+    @pytest.mark.parametrize("chunksize", [4, 1000])
+    def test_years_and_regions(self, monkeypatch, chunksize):
+        monkeypatch.setattr("osemosys2iamc.resultify.SELECT_CHUNKSIZE", chunksize)
+        folderpath = os.path.join("tests", "fixtures")
+        years = [2015, 2016, 2050]
+        regions = ["Austria", "Belgium"]
+
+        data = read_file(
+            folderpath, "ProductionByTechnologyAnnual", "iso2_start", typed=True
+        )
+        actual = read_file(
+            folderpath,
+            "ProductionByTechnologyAnnual",
+            "iso2_start",
+            typed=True,
+            years=years,
+            regions=regions,
+        )
+
+        expected = data[data.YEAR.isin(years) & data.REGION.isin(regions)]
+        assert len(actual) == 3
+        assert isinstance(actual["TECHNOLOGY"].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(
+            actual.reset_index(drop=True),
+            expected.reset_index(drop=True),
+            check_categorical=False,
+        )
+
+    def test_drop_zeros(self, tmp_path):
+        pd.DataFrame(
+            {
+                "REGION": ["REGION1"] * 4,
+                "TECHNOLOGY": ["ATNGCCPH2", "BENGCCPH2", "ATCOSTPH3", "ATNGCCPH2"],
+                "YEAR": [2015, 2015, 2015, 2016],
+                "VALUE": [1.5, 0.0, 2.0, 0.0],
+            }
+        ).to_csv(tmp_path / "NewCapacity.csv", index=False)
+
+        actual = read_file(str(tmp_path), "NewCapacity", "iso2_start", drop_zeros=True)
+        chunks = read_file_chunks(
+            str(tmp_path), "NewCapacity", "iso2_start", 2, drop_zeros=True
+        )
+
+        assert actual.VALUE.tolist() == [1.5, 2.0]
+        assert pd.concat(chunks).VALUE.tolist() == [1.5, 2.0]
+
+    def test_no_rows_selected(self):
+        folderpath = os.path.join("tests", "fixtures")
+
+        actual = read_file(
+            folderpath, "TotalCapacityAnnual", "iso2_start", typed=True, years=[1990]
+        )
+
+        assert actual.empty
+        assert list(actual.columns) == ["REGION", "TECHNOLOGY", "YEAR", "VALUE"]
+
+
+class TestChunks:
+    def test_read_file_chunks(self):
+        folderpath = os.path.join("tests", "fixtures")
+        expected = read_file(folderpath, "TotalCapacityAnnual", "iso2_start")
+
+        chunks = list(
+            read_file_chunks(folderpath, "TotalCapacityAnnual", "iso2_start", 5)
+        )
+
+        assert all(len(chunk) <= 5 for chunk in chunks)
+        actual = pd.concat(chunks)
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_combine_aggregated(self):
+        folderpath = os.path.join("tests", "fixtures")
+        technologies = ["^.{6}(I0)", "^.{6}(X0)", "^.{2}(HY)", "^.{2}(WI)"]
+
+        expected = filter_capacity(
+            read_file(folderpath, "ProductionByTechnologyAnnual", "iso2_start"),
+            technologies,
+        )
+
+        chunks = read_file_chunks(
+            folderpath, "ProductionByTechnologyAnnual", "iso2_start", 3, typed=True
+        )
+        actual = combine_chunks(filter_capacity(c, technologies) for c in chunks)
+
+        pd.testing.assert_frame_equal(
+            actual.reset_index(drop=True), expected.reset_index(drop=True)
+        )
+
+    def test_combine_no_chunks(self):
+        assert combine_chunks([]).empty
+        assert combine_chunks([], aggregated=False).empty
+
+
+class TestAssemble:
+    def test_units_and_regions(self):
+
+        columns = ["model", "scenario", "variable", "unit", "region", "year"]
+        frames = [
+            pd.DataFrame(
+                [
+                    ["m", "s", "Final Energy", "PJ/yr", "Czechia", 2015, 2000.0],
+                    ["m", "s", "Final Energy", "PJ/yr", "Austria", 2015, 500.0],
+                ],
+                columns=columns + ["value"],
+            ),
+            pd.DataFrame(
+                [["m", "s", "Emissions|CO2", "ktCO2/yr", "Austria", 2015, 30.0]],
+                columns=columns + ["value"],
+            ),
+            pd.DataFrame(
+                [["m", "s", "Capacity", "GW", "Austria", 2015, 4.0]],
+                columns=columns + ["value"],
+            ),
+        ]
+
+        actual = assemble(frames)
+
+        expected = pd.DataFrame(
+            [
+                ["m", "s", "Austria", "Capacity", "GW", 2015, 4.0],
+                ["m", "s", "Austria", "Emissions|CO2", "Mt CO2/yr", 2015, 0.03],
+                ["m", "s", "Austria", "Final Energy", "EJ/yr", 2015, 0.5],
+                ["m", "s", "Czech Republic", "Final Energy", "EJ/yr", 2015, 2.0],
+            ],
+            columns=[
+                "model",
+                "scenario",
+                "region",
+                "variable",
+                "unit",
+                "year",
+                "value",
+            ],
+        )
+        assert_iamframe_equal(actual, IamDataFrame(expected))
+
+    def test_custom_units(self):
+
+        frame = pd.DataFrame(
+            [
+                ["m", "s", "Capacity", "GW", "Austria", 2015, 4.0],
+                ["m", "s", "Final Energy", "PJ/yr", "Austria", 2015, 500.0],
+            ],
+            columns=[
+                "model",
+                "scenario",
+                "variable",
+                "unit",
+                "region",
+                "year",
+                "value",
+            ],
+        )
+
+        actual = assemble([frame], {"GW": ("MW", 1000.0)})
+
+        assert sorted(zip(actual.data.unit, actual.data.value)) == [
+            ("MW", 4000.0),
+            ("PJ/yr", 500.0),
+        ]
+
+
 class TestCountryConversion:
     def test_iso_to_country_iso2start(self):
         techs = ["NGNGA2", "DENGA2", "NGKENGX", "ZXNGA"]
@@ -617,5 +949,62 @@ class TestCountryConversion:
     def test_iso_to_country_uk(self):
         techs = ["UKNGA"]
         actual = iso_to_country("iso2_start", techs, "TotalCapacityAnnual")
-        expected = ["United Kingdom of Great Britain and Northern Ireland"]
+        expected = ["United Kingdom"]
         assert actual == expected
+
+    def test_iso_to_country_el(self):
+        techs = ["ELNGA"]
+        actual = iso_to_country("iso2_start", techs, "TotalCapacityAnnual")
+        expected = ["Greece"]
+        assert actual == expected
+
+    def test_iso_to_country_name_variants(self):
+        techs = ["NLNGA", "CZNGA"]
+        actual = iso_to_country("iso2_start", techs, "TotalCapacityAnnual")
+        expected = ["The Netherlands", "Czech Republic"]
+        assert actual == expected
+
+    def test_iso_to_country_invalid_format(self):
+        with pytest.raises(ValueError):
+            iso_to_country("iso4_start", ["NGNGA2"], "TotalCapacityAnnual")
+
+    def test_region_names_repeated(self):
+        techs = pd.Series(["ATBM00X00", "ZXNGA", "ATBM00X00", None, "BEBM00X00"])
+
+        actual = region_names("iso2_start", techs, "TotalCapacityAnnual")
+
+        expected = ["Austria", "", "Austria", "", "Belgium"]
+
+        assert actual.tolist() == expected
+
+
+class TestExpandYears:
+    def test_rows_repeated_for_each_year(self):
+
+        data = pd.DataFrame(
+            {
+                "REGION": ["Austria", "Belgium"],
+                "TECHNOLOGY": ["ATNG", "BENG"],
+                "VALUE": [1.0, 2.0],
+            }
+        )
+
+        actual = expand_years(data, np.array([2015, 2016, 2017]))
+
+        expected = pd.DataFrame(
+            {
+                "REGION": ["Austria"] * 3 + ["Belgium"] * 3,
+                "VALUE": [1.0] * 3 + [2.0] * 3,
+                "YEAR": [2015, 2016, 2017] * 2,
+            }
+        )
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_no_rows(self):
+
+        data = pd.DataFrame(columns=["REGION", "TECHNOLOGY", "VALUE"])
+
+        actual = expand_years(data, np.array([2015, 2016]))
+
+        assert actual.empty
+        assert actual.columns.tolist() == ["REGION", "VALUE", "YEAR"]
@@ -0,0 +1,190 @@
+import gzip
+import os
+import shutil
+
+import pandas as pd
+import pytest
+from pyam.testing import assert_iamframe_equal
+from yaml import load, SafeLoader
+
+from osemosys2iamc import solutions
+from osemosys2iamc.resultify import main
+from osemosys2iamc.solutions import (
+    GLPKPrecisionWarning,
+    convert_solution,
+    detect_solver,
+    glpk_records,
+    read_solution,
+)
+
+FIXTURES = os.path.join("tests", "fixtures")
+
+SOLUTIONS = {
+    "cbc": os.path.join(FIXTURES, "solutions", "cbc_solution.txt"),
+    "cplex": os.path.join(FIXTURES, "solutions", "cplex_solution.sol"),
+    "glpk": os.path.join(FIXTURES, "solutions", "glpk_solution.txt"),
+}
+
+
+def load_fixture_config(name: str):
+    with open(os.path.join(FIXTURES, name), "r") as config_file:
+        return load(config_file, Loader=SafeLoader)
+
+
+class TestReadSolution:
+    @pytest.mark.parametrize("solver", ["cbc", "cplex", "glpk"])
+    def test_detect_solver(self, solver):
+
+        assert detect_solver(SOLUTIONS[solver]) == solver
+
+    @pytest.mark.filterwarnings("ignore::osemosys2iamc.solutions.GLPKPrecisionWarning")
+    @pytest.mark.parametrize("solver", ["cbc", "cplex", "glpk"])
+    def test_same_as_csv(self, solver):
+
+        actual = read_solution(SOLUTIONS[solver], ["TotalCapacityAnnual"])
+
+        assert list(actual) == ["TotalCapacityAnnual"]
+        capacity = actual["TotalCapacityAnnual"]
+        assert capacity.TECHNOLOGY.dtype == "category"
+        assert capacity.YEAR.dtype == "int16"
+        expected = pd.read_csv(os.path.join(FIXTURES, "TotalCapacityAnnual.csv"))
+        # GLPK rounds its report to six significant digits
+        pd.testing.assert_frame_equal(
+            capacity.astype({"REGION": str, "TECHNOLOGY": str, "YEAR": "int64"}),
+            expected,
+            check_exact=solver != "glpk",
+            rtol=5e-6,
+        )
+
+    def test_glpk_precision_warning(self):
+
+        with pytest.warns(GLPKPrecisionWarning, match="six significant digits"):
+            read_solution(SOLUTIONS["glpk"], ["TotalCapacityAnnual"])
+
+    def test_all_variables(self):
+
+        actual = read_solution(SOLUTIONS["cbc"])
+
+        assert sorted(actual) == [
+            "AnnualTechnologyEmissions",
+            "ProductionByTechnologyAnnual",
+            "RateOfActivity",
+            "TotalCapacityAnnual",
+            "UseByTechnology",
+        ]
+        activity = actual["RateOfActivity"]
+        assert activity.MODE_OF_OPERATION.tolist() == [1, 1]
+        assert activity.VALUE.tolist() == [0.5, 1.25]
+
+    @pytest.mark.parametrize("solver", ["cbc", "cplex"])
+    def test_chunks(self, solver, monkeypatch):
+
+        expected = read_solution(SOLUTIONS[solver])
+        monkeypatch.setattr(solutions, "SOLUTION_CHUNKSIZE", 3)
+
+        actual = read_solution(SOLUTIONS[solver])
+
+        assert list(actual) == list(expected)
+        for variable, frame in actual.items():
+            pd.testing.assert_frame_equal(frame, expected[variable])
+
+    def test_glpk_short_names(self):
+
+        lines = [
+            "   No. Column name  St   Activity     Lower bound   Upper bound",
+            "------ ------------ -- ------------- ------------- -------------",
+            "     1 x[A,1]       B            2.5             0",
+            "     2 NewCapacity[REGION1,ATBM,2015]",
+            "                    NL             0             0",
+            "",
+            "Karush-Kuhn-Tucker optimality conditions:",
+        ]
+
+        assert list(glpk_records(lines)) == [
+            ("x[A,1]", "2.5"),
+            ("NewCapacity[REGION1,ATBM,2015]", "0"),
+        ]
+
+    def test_compressed(self, tmp_path):
+
+        filename = str(tmp_path / "solution.txt.gz")
+        with open(SOLUTIONS["cbc"], "rb") as source:
+            with gzip.open(filename, "wb") as compressed:
+                shutil.copyfileobj(source, compressed)
+
+        actual = read_solution(filename, ["TotalCapacityAnnual"])
+
+        assert len(actual["TotalCapacityAnnual"]) == 14
+
+    def test_unknown_sets(self, tmp_path):
+
+        filename = str(tmp_path / "solution.txt")
+        with open(filename, "w") as solution:
+            solution.write("Optimal - objective value 1.0\n")
+            solution.write("      0 StorageLevel(REGION1,DAM,2015)   2.5   0\n")
+
+        with pytest.raises(ValueError, match="sets of the variable StorageLevel"):
+            read_solution(filename)
+
+        actual = read_solution(filename, sets={"StorageLevel": ["REGION", "S", "Y"]})
+        assert actual["StorageLevel"].values.tolist() == [["REGION1", "DAM", 2015, 2.5]]
+
+    def test_unknown_solver(self):
+
+        with pytest.raises(ValueError, match="Unknown solver gurobi"):
+            read_solution(SOLUTIONS["cbc"], solver="gurobi")
+
+
+class TestConvertSolution:
+    @pytest.mark.filterwarnings("ignore::osemosys2iamc.solutions.GLPKPrecisionWarning")
+    @pytest.mark.parametrize("solver", ["cbc", "cplex", "glpk"])
+    @pytest.mark.parametrize(
+        "config_name", ["config_result.yaml", "config_result_capture.yaml"]
+    )
+    def test_same_output(self, solver, config_name):
+
+        config = load_fixture_config(config_name)
+
+        actual = convert_solution(config, SOLUTIONS[solver], FIXTURES)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    def test_inputs_and_results(self):
+
+        config = load_fixture_config("config_result.yaml")
+        config.update(load_fixture_config("config_input.yaml"))
+        config["results"] = load_fixture_config("config_result.yaml")["results"]
+
+        actual = convert_solution(config, SOLUTIONS["cbc"], FIXTURES, chunksize=4)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    def test_missing_variable(self):
+
+        config = load_fixture_config("config_result.yaml")
+        config["results"].append(
+            dict(
+                config["results"][0],
+                iamc_variable="Capacity|New",
+                osemosys_param="NewCapacity",
+            )
+        )
+
+        actual = convert_solution(config, SOLUTIONS["cplex"])
+
+        assert list(actual.variable) == ["Capacity|Electricity"]
+
+    def test_unknown_variable(self):
+
+        config = load_fixture_config("config_result.yaml")
+        config["results"][0]["osemosys_param"] = "StorageLevel"
+
+        with pytest.raises(ValueError, match="variables StorageLevel are unknown"):
+            convert_solution(config, SOLUTIONS["cbc"])
+
+        with pytest.raises(ValueError, match="No data found"):
+            convert_solution(
+                config,
+                SOLUTIONS["cbc"],
+                sets={"StorageLevel": ["REGION", "TECHNOLOGY", "YEAR"]},
+            )
@@ -0,0 +1,270 @@
+import glob
+import gzip
+import os
+import shutil
+import tarfile
+import zipfile
+
+import pandas as pd
+import pytest
+from pyam.testing import assert_iamframe_equal
+from yaml import load, SafeLoader
+
+from osemosys2iamc import sources
+from osemosys2iamc.cache import ColumnarCache, file_fingerprint
+from osemosys2iamc.resultify import convert, main, parameter_file
+from osemosys2iamc.sources import ParameterFrames
+
+FIXTURES = os.path.join("tests", "fixtures")
+
+
+def load_fixture_config(name: str):
+    with open(os.path.join(FIXTURES, name), "r") as config_file:
+        return load(config_file, Loader=SafeLoader)
+
+
+def fixture_files(folder: str = FIXTURES):
+    return sorted(glob.glob(os.path.join(folder, "*.csv")))
+
+
+def fixture_frames(folder: str = FIXTURES):
+    return {
+        os.path.splitext(os.path.basename(filename))[0]: pd.read_csv(filename)
+        for filename in fixture_files(folder)
+    }
+
+
+@pytest.fixture
+def zip_archive(tmp_path):
+    archive = str(tmp_path / "results.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for filename in fixture_files():
+            zip_file.write(filename, "results/" + os.path.basename(filename))
+    return archive
+
+
+@pytest.fixture
+def tar_archive(tmp_path):
+    archive = str(tmp_path / "results.tar.gz")
+    with tarfile.open(archive, "w:gz") as tar_file:
+        for filename in fixture_files():
+            tar_file.add(filename, os.path.basename(filename))
+    return archive
+
+
+@pytest.fixture
+def gzip_folder(tmp_path):
+    folder = tmp_path / "gzipped"
+    folder.mkdir()
+    for filename in fixture_files():
+        target = str(folder / os.path.basename(filename)) + ".gz"
+        with open(filename, "rb") as source, gzip.open(target, "wb") as compressed:
+            shutil.copyfileobj(source, compressed)
+    return str(folder)
+
+
+class TestLocate:
+    def test_folder(self):
+
+        actual = sources.locate(FIXTURES, "YEAR.csv")
+
+        assert actual == os.path.join(FIXTURES, "YEAR.csv")
+        assert sources.split_archive(actual) == (None, actual)
+
+    def test_compressed(self, gzip_folder):
+
+        actual = parameter_file(gzip_folder, "TotalCapacityAnnual")
+
+        assert actual == os.path.join(gzip_folder, "TotalCapacityAnnual.csv.gz")
+
+    def test_plain_file_first(self, gzip_folder):
+
+        shutil.copy(os.path.join(FIXTURES, "YEAR.csv"), gzip_folder)
+
+        actual = sources.locate(gzip_folder, "YEAR.csv")
+
+        assert actual == os.path.join(gzip_folder, "YEAR.csv")
+
+    def test_archive(self, zip_archive):
+
+        actual = parameter_file(zip_archive, "TotalCapacityAnnual")
+
+        assert actual == os.path.join(zip_archive, "results", "TotalCapacityAnnual.csv")
+        assert sources.split_archive(actual) == (
+            zip_archive,
+            "results/TotalCapacityAnnual.csv",
+        )
+        assert sources.source_file(actual) == zip_archive
+
+    def test_missing(self, zip_archive):
+
+        filename = parameter_file(zip_archive, "Missing")
+
+        with pytest.raises(FileNotFoundError, match="No file Missing.csv"):
+            sources.read_csv(filename)
+
+
+class TestReadCsv:
+    @pytest.mark.parametrize("source", ["zip_archive", "tar_archive", "gzip_folder"])
+    def test_same_content(self, request, source):
+
+        path = request.getfixturevalue(source)
+        expected = pd.read_csv(os.path.join(FIXTURES, "TotalCapacityAnnual.csv"))
+
+        filename = parameter_file(path, "TotalCapacityAnnual")
+        chunks = list(sources.read_csv_chunks(filename, 3))
+
+        pd.testing.assert_frame_equal(sources.read_csv(filename), expected)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+class TestMainSources:
+    @pytest.mark.parametrize("source", ["zip_archive", "tar_archive", "gzip_folder"])
+    @pytest.mark.parametrize(
+        "config_name",
+        ["config_result.yaml", "config_result_capture.yaml", "config_input.yaml"],
+    )
+    def test_same_output(self, request, source, config_name):
+
+        path = request.getfixturevalue(source)
+        config = load_fixture_config(config_name)
+
+        actual = main(config, path, path)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    def test_streaming(self, tar_archive):
+
+        config = load_fixture_config("config_result.yaml")
+
+        actual = main(config, tar_archive, tar_archive, chunksize=2)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    def test_cache_dir(self, zip_archive, tmp_path):
+        pytest.importorskip("pyarrow")
+
+        config = load_fixture_config("config_result.yaml")
+        cache_dir = str(tmp_path / "cache")
+
+        actual = main(config, zip_archive, zip_archive, cache_dir=cache_dir)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+        filename = parameter_file(zip_archive, "TotalCapacityAnnual")
+        assert os.path.exists(ColumnarCache(cache_dir).location(filename))
+
+    def test_duckdb_engine(self, zip_archive, gzip_folder):
+        pytest.importorskip("duckdb")
+
+        config = load_fixture_config("config_result.yaml")
+        expected = main(config, FIXTURES, FIXTURES)
+
+        for path in [zip_archive, gzip_folder]:
+            actual = main(config, path, path, engine="duckdb")
+            assert_iamframe_equal(actual, expected)
+
+
+def test_fingerprint_follows_archive(zip_archive):
+
+    filename = parameter_file(zip_archive, "TotalCapacityAnnual")
+    before = file_fingerprint(filename, hash_contents=True)
+
+    with zipfile.ZipFile(zip_archive, "a") as zip_file:
+        zip_file.writestr("results/notes.txt", "rerun")
+
+    assert file_fingerprint(filename, hash_contents=True) != before
+
+
+class TestParameterFrames:
+    def test_read(self):
+
+        frames = fixture_frames()
+        data = ParameterFrames(frames)
+
+        assert "YEAR" in data
+        assert data.read("YEAR") is frames["YEAR"]
+
+    def test_lazy(self):
+
+        calls = []
+
+        def load():
+            calls.append("YEAR")
+            return pd.DataFrame({"VALUE": [2015]})
+
+        data = ParameterFrames({"YEAR": load})
+
+        assert calls == []
+        assert data.read("YEAR").VALUE.tolist() == [2015]
+        assert calls == ["YEAR"]
+
+    def test_missing(self):
+
+        data = ParameterFrames({"YEAR": pd.DataFrame()}, "results")
+
+        with pytest.raises(ValueError, match="No parameter Demand in the results"):
+            data.read("Demand")
+
+
+class TestConvert:
+    @pytest.mark.parametrize(
+        "config_name",
+        ["config_result.yaml", "config_result_capture.yaml", "config_input.yaml"],
+    )
+    def test_same_output(self, config_name):
+
+        config = load_fixture_config(config_name)
+        frames = fixture_frames()
+
+        actual = convert(config, frames, frames)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+
+    def test_trade(self):
+
+        folder = os.path.join(FIXTURES, "trade")
+        config = load_fixture_config(os.path.join("trade", "config_trade.yaml"))
+        frames = fixture_frames(folder)
+
+        actual = convert(config, frames, frames, chunksize=2)
+
+        assert_iamframe_equal(actual, main(config, folder, folder))
+
+    def test_loads_needed_parameters(self):
+
+        config = load_fixture_config("config_result.yaml")
+        frames = fixture_frames()
+        calls = []
+
+        def loader(name):
+            def load():
+                calls.append(name)
+                return frames[name]
+
+            return load
+
+        results = {name: loader(name) for name in frames}
+
+        actual = convert(config, {}, results)
+
+        assert_iamframe_equal(actual, main(config, FIXTURES, FIXTURES))
+        assert calls == ["TotalCapacityAnnual"]
+
+    def test_frames_unchanged(self):
+
+        config = load_fixture_config("config_result.yaml")
+        frames = fixture_frames()
+        expected = {name: frame.copy() for name, frame in frames.items()}
+
+        convert(config, frames, frames, max_cache_bytes=1)
+
+        for name, frame in frames.items():
+            pd.testing.assert_frame_equal(frame, expected[name])
+
+    def test_result_store(self, tmp_path):
+
+        config = load_fixture_config("config_result.yaml")
+        frames = fixture_frames()
+
+        with pytest.raises(ValueError, match="result store needs inputs"):
+            convert(config, frames, frames, result_store=str(tmp_path))
@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+from osemosys2iamc.resultify import main
+from osemosys2iamc.synthetic import (
+    CONFIG_KINDS,
+    CORE_TECHNOLOGIES,
+    country_codes,
+    generate_results,
+    synthetic_config,
+    technology_names,
+)
+
+
+def test_generate_results(tmp_path):
+
+    rows = generate_results(
+        str(tmp_path), countries=3, technologies=10, years=4, timeslices=2
+    )
+
+    capacity = pd.read_csv(tmp_path / "TotalCapacityAnnual.csv")
+    assert rows["TotalCapacityAnnual"] == len(capacity) == 3 * 10 * 4
+    assert rows["UseByTechnology"] == 3 * 10 * 4 * 2
+    assert list(capacity.columns) == ["REGION", "TECHNOLOGY", "YEAR", "VALUE"]
+    assert capacity.TECHNOLOGY.iloc[0] == "ATBM00X00"
+    assert sorted(os.listdir(tmp_path)) == sorted(name + ".csv" for name in rows)
+
+
+def test_names():
+
+    assert country_codes(2) == ["AT", "BE"]
+    assert len(set(country_codes(40))) == 40
+    assert len(set(technology_names(200))) == 200
+    assert technology_names(3) == CORE_TECHNOLOGIES
+
+
+@pytest.mark.parametrize("kind", CONFIG_KINDS)
+def test_config_kinds(tmp_path, kind):
+
+    generate_results(str(tmp_path), countries=2, technologies=30, years=3)
+
+    actual = main(synthetic_config([kind], entries=2), str(tmp_path), str(tmp_path))
+
+    assert sorted(actual.region) == ["Austria", "Belgium"]
+
+
+@pytest.mark.parametrize("technologies", [3, 10])
+def test_small_sizes(tmp_path, technologies):
+
+    generate_results(
+        str(tmp_path), countries=1, technologies=technologies, years=1, timeslices=1
+    )
+
+    for kind in CONFIG_KINDS:
+        actual = main(synthetic_config([kind], entries=1), str(tmp_path), str(tmp_path))
+        assert list(actual.region) == ["Austria"]
+    actual = main(synthetic_config(), str(tmp_path), str(tmp_path))
+    assert "Trade|Secondary Energy|Electricity|Volume" in actual.variable
+
+
+def test_too_few_technologies():
+
+    with pytest.raises(ValueError, match="At least 3 technologies"):
+        technology_names(2)
+
+
+def test_unknown_kind():
+
+    with pytest.raises(ValueError, match="Unknown kinds of entries plots"):
+        synthetic_config(["plots"])
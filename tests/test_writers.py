@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+import pytest
+from pyam import IamDataFrame
+from pyam.testing import assert_iamframe_equal
+
+from osemosys2iamc.writers import output_format, write
+
+
+@pytest.fixture
+def iamc():
+    return IamDataFrame(
+        pd.DataFrame(
+            [
+                ["m", "s", "Austria", "Capacity", "GW", 2015, 4.0],
+                ["m", "s", "Austria", "Capacity", "GW", 2016, 4.5],
+                ["m", "s", "Belgium", "Final Energy", "EJ/yr", 2016, 0.25],
+            ],
+            columns=[
+                "model",
+                "scenario",
+                "region",
+                "variable",
+                "unit",
+                "year",
+                "value",
+            ],
+        )
+    )
+
+
+class TestOutputFormat:
+    def test_extension(self):
+        assert output_format(os.path.join("out", "data.XLSX")) == "xlsx"
+        assert output_format("data.csv") == "csv"
+
+    def test_explicit(self):
+        assert output_format("data.out", "parquet") == "parquet"
+
+    def test_unknown(self):
+        with pytest.raises(ValueError, match="Cannot write data.json as 'json'"):
+            output_format("data.json")
+
+
+@pytest.mark.parametrize("extension", ["xlsx", "csv"])
+def test_write_wide(iamc, tmp_path, extension):
+
+    path = str(tmp_path / f"data.{extension}")
+
+    write(iamc, path)
+
+    assert_iamframe_equal(IamDataFrame(path), iamc)
+
+
+def test_write_excel_matches_pyam(iamc, tmp_path):
+
+    actual = str(tmp_path / "actual.xlsx")
+    expected = str(tmp_path / "expected.xlsx")
+
+    write(iamc, actual)
+    iamc.to_excel(expected, sheet_name="data")
+
+    pd.testing.assert_frame_equal(
+        pd.read_excel(actual, sheet_name=None)["data"],
+        pd.read_excel(expected, sheet_name=None)["data"],
+    )
+
+
+def test_write_csv_matches_pyam(iamc, tmp_path, monkeypatch):
+
+    actual = tmp_path / "actual.csv"
+    expected = tmp_path / "expected.csv"
+    iamc.to_csv(expected)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Whole wide table built")
+
+    monkeypatch.setattr(IamDataFrame, "timeseries", fail)
+    write(iamc, str(actual))
+
+    assert actual.read_text() == expected.read_text()
+
+
+def test_write_parquet(iamc, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    path = str(tmp_path / "data.parquet")
+
+    write(iamc, path)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(path), iamc.data)